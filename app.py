@@ -3,22 +3,88 @@ import streamlit as st
 import json
 import os
 import re
+import time
+import queue
+import hashlib
+import threading
+import multiprocessing
+from collections import Counter
 from pathlib import Path
 
+from bulk_matcher import match_upload
+from log_parser import DEFAULT_MATCH_TIMEOUT
+from output_reader import ResultFilter, list_outputs, open_output
+from regex_safety import check_pattern
+
+# Non-matching lines kept as examples by the bulk tester
+BULK_SAMPLE_MISSES = 20
+# Seconds between progress updates while a bulk test runs
+BULK_REFRESH_INTERVAL = 0.25
+# Seconds between checks of a running bulk test's budget, cancel button and time limit
+BULK_POLL_INTERVAL = 0.05
+# Seconds a bulk test may run before it stops with the counts so far
+BULK_TIME_LIMIT = 300
+RESULT_PAGE_SIZES = [50, 100, 500, 1000]
+
+@st.cache_data(show_spinner=False)
+def read_regex_file(regex_file, file_state):
+    """Parsed regex JSON, shared across reruns and sessions
+
+    file_state is the file's (mtime_ns, size): it's only part of the cache key,
+    so an edited file is read again while an unchanged one never is.
+    """
+    with open(regex_file, 'r') as f:
+        return json.load(f)
+
+
+@st.cache_resource(max_entries=4096, show_spinner=False)
+def compile_pattern(pattern):
+    """Compiled regex, memoized across reruns; raises re.error for invalid patterns"""
+    return re.compile(pattern)
+
+
+@st.cache_resource(max_entries=256, show_spinner="Checking the pattern for catastrophic backtracking...")
+def check_pattern_safety(pattern):
+    """Backtracking report for a pattern; the fuzz takes up to a second, so it runs once per pattern"""
+    return check_pattern(pattern)
+
+
+def show_safety_report(report):
+    """Verdict, measured worst case and findings of a pattern safety check"""
+    if report.verdict == 'block':
+        st.error(f"⛔ Catastrophic backtracking: {report.summary()}. Saving is blocked.")
+    elif report.verdict == 'warn':
+        st.warning(f"⚠️ Backtracking risk: {report.summary()}")
+    else:
+        st.info(f"⏱️ Backtracking check passed: {report.summary()}")
+    for finding in report.findings:
+        st.caption(f"[{finding.severity}] {finding.message}")
+
+
 class RegexManager:
     def __init__(self, regex_file="regex.json"):
         self.regex_file = regex_file
 
+    def _file_state(self):
+        try:
+            stat = os.stat(self.regex_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     def load_regex_patterns(self):
         """Load existing regex patterns from JSON file"""
-        try:
-            with open(self.regex_file, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
+        file_state = self._file_state()
+        if file_state is None:
             # Create empty file if it doesn't exist
             empty_patterns = {}
             self.save_regex_patterns(empty_patterns)
             return empty_patterns
+        try:
+            # A fresh copy each call, so callers can edit it before saving
+            return read_regex_file(self.regex_file, file_state)
+        except FileNotFoundError:
+            return {}
         except json.JSONDecodeError:
             st.error(f"Error decoding {self.regex_file}. Please check the JSON format.")
             return {}
@@ -36,7 +102,7 @@ class RegexManager:
     def validate_regex(self, pattern):
         """Validate if the regex pattern is valid"""
         try:
-            re.compile(pattern)
+            compile_pattern(pattern)
             return True, "Valid regex pattern"
         except re.error as e:
             return False, f"Invalid regex pattern: {e}"
@@ -44,7 +110,7 @@ class RegexManager:
     def test_regex_pattern(self, pattern, test_string):
         """Test regex pattern against a sample string"""
         try:
-            match = re.match(pattern, test_string)
+            match = compile_pattern(pattern).match(test_string)
             if match:
                 return True, match.groupdict() if match.groups() else match.group(0)
             else:
@@ -52,6 +118,177 @@ class RegexManager:
         except Exception as e:
             return False, f"Error testing regex: {e}"
 
+class BulkPatternTest:
+    """Matches every line of an upload against one pattern in a child process
+
+    A background thread starts the process and collects its progress reports,
+    so the counters can be read while the test runs. A runaway match holds the
+    GIL of the process it runs in, which is why it doesn't run in the app's:
+    the test stops, terminating the process, at the first line that takes
+    longer than the parser's default --match-timeout budget, after
+    BULK_TIME_LIMIT seconds, or when cancelled. Patterns the safety check
+    blocks are never run.
+    """
+
+    def __init__(self, data, pattern):
+        self.pattern = pattern
+        self.total_bytes = len(data)
+        self.bytes_read = 0
+        self.lines = 0
+        self.matched = 0
+        self.filled = Counter()
+        self.misses = []
+        self.error = None
+        self.stopped = None
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        self.done = False
+        self._data = data
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        child = None
+        try:
+            compiled = compile_pattern(self.pattern)
+            self.filled.update({name: 0 for name in compiled.groupindex})
+            context = multiprocessing.get_context('spawn')
+            reports = context.Queue()
+            current_line = context.RawValue('q', 0)
+            match_started = context.RawValue('d', 0.0)
+            child = context.Process(
+                target=match_upload,
+                args=(self._data, self.pattern, BULK_SAMPLE_MISSES, reports, current_line, match_started),
+                daemon=True,
+            )
+            child.start()
+            self._follow(child, reports, current_line, match_started)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            if child is not None and child.is_alive():
+                child.terminate()
+                child.join()
+            # The upload isn't needed once the test is over, however it ended
+            self._data = None
+            self.elapsed = time.monotonic() - self.started
+            self.done = True
+
+    def _follow(self, child, reports, current_line, match_started):
+        """Take the child's reports until it finishes or the test has to stop"""
+        deadline = self.started + BULK_TIME_LIMIT
+        while True:
+            try:
+                kind, report = reports.get(timeout=BULK_POLL_INTERVAL)
+            except queue.Empty:
+                kind, report = None, None
+            if kind == 'error':
+                self.error = report
+                return
+            if kind is not None:
+                self._take(report)
+                if kind == 'done':
+                    return
+            now = time.monotonic()
+            self.elapsed = now - self.started
+            started = match_started.value
+            if started and now - started > DEFAULT_MATCH_TIMEOUT:
+                self.stopped = (f"line {current_line.value} took over {DEFAULT_MATCH_TIMEOUT:g}s to match, "
+                                f"the parser's --match-timeout budget")
+                return
+            if self._cancel.is_set():
+                self.stopped = "cancelled"
+                return
+            if now > deadline:
+                self.stopped = f"time limit of {BULK_TIME_LIMIT}s reached"
+                return
+            if kind is None and child.exitcode is not None and reports.empty():
+                self.error = f"bulk test process ended without a result (exit code {child.exitcode})"
+                return
+
+    def _take(self, report):
+        self.bytes_read = report.bytes_read
+        self.lines = report.lines
+        self.matched = report.matched
+        self.filled = report.filled
+        self.misses = report.misses
+
+    @property
+    def progress(self):
+        return 1.0 if self.done or not self.total_bytes else min(1.0, self.bytes_read / self.total_bytes)
+
+    @property
+    def match_rate(self):
+        return self.matched / self.lines if self.lines else 0.0
+
+    @property
+    def lines_per_sec(self):
+        return self.lines / self.elapsed if self.elapsed else 0.0
+
+    def fill_rates(self):
+        """Share of matched lines in which each named group captured something"""
+        return {name: count / self.matched if self.matched else 0.0 for name, count in self.filled.items()}
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def start_bulk_test(file_hash, pattern, _data):
+    """One test per file content and pattern, shared by every rerun that asks for it"""
+    return BulkPatternTest(_data, pattern)
+
+
+def uploaded_file_hash(uploaded):
+    """Content hash of an uploaded file, computed once per upload"""
+    hashes = st.session_state.setdefault("upload_hashes", {})
+    if uploaded.file_id not in hashes:
+        hashes[uploaded.file_id] = hashlib.blake2b(uploaded.getvalue(), digest_size=16).hexdigest()
+    return hashes[uploaded.file_id]
+
+
+def show_bulk_test(test, progress_bar, summary):
+    """Render a bulk test's current counters into the given placeholders"""
+    progress_bar.progress(test.progress, text=f"{test.bytes_read:,} of {test.total_bytes:,} bytes")
+    with summary.container():
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Lines", f"{test.lines:,}")
+        col2.metric("Match Rate", f"{test.match_rate:.1%}")
+        col3.metric("Lines/sec", f"{test.lines_per_sec:,.0f}")
+        if test.done:
+            if test.error:
+                st.error(f"❌ Bulk test failed: {test.error}")
+            elif test.stopped:
+                st.warning(f"⏹️ Bulk test stopped, {test.stopped}; the counts cover the lines matched until then")
+            fill_rates = test.fill_rates()
+            if fill_rates:
+                st.markdown("**Group Fill Rates** (share of matched lines)")
+                st.dataframe(
+                    [{"group": name, "fill rate": f"{rate:.1%}"} for name, rate in fill_rates.items()],
+                    hide_index=True,
+                )
+            if test.misses:
+                st.markdown(f"**Non-Matching Lines** (first {len(test.misses)})")
+                st.code("\n".join(test.misses), language=None)
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_output_reader(path, file_state):
+    """Reader of a parser output with its block index, kept until the file changes (file_state)"""
+    return open_output(path)
+
+
+def output_file_state(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_resource
+def get_regex_manager(regex_file="regex.json"):
+    return RegexManager(regex_file)
+
+
 def main():
     st.set_page_config(
         page_title="Log Parser Regex Manager", 
@@ -63,10 +300,12 @@ def main():
     st.markdown("Manage regex patterns for log parsing")
 
     # Initialize regex manager
-    regex_manager = RegexManager()
+    regex_manager = get_regex_manager()
+    # Read once per rerun and shared by every tab and the sidebar
+    patterns = regex_manager.load_regex_patterns()
 
     # Create tabs
-    tab1, tab2, tab3 = st.tabs(["📝 Add/Edit Patterns", "📋 View Patterns", "🧪 Test Patterns"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📝 Add/Edit Patterns", "📋 View Patterns", "🧪 Test Patterns", "📊 Results"])
 
     # Tab 1: Add/Edit Patterns
     with tab1:
@@ -103,6 +342,10 @@ def main():
             - Time: `\d{2}:\d{2}:\d{2}`
             - Any text: `.*?`
             - Non-whitespace: `\S+`
+
+            **Avoid Backtracking Traps:**
+            - Nested quantifiers such as `(\w+\s?)*`
+            - Neighbouring `.*?`/`\S*` that can match the same text
             """)
 
         # Validation and testing
@@ -110,6 +353,7 @@ def main():
             is_valid, validation_msg = regex_manager.validate_regex(regex_pattern)
             if is_valid:
                 st.success(f"✅ {validation_msg}")
+                show_safety_report(check_pattern_safety(regex_pattern))
             else:
                 st.error(f"❌ {validation_msg}")
 
@@ -139,10 +383,13 @@ def main():
             if st.button("💾 Save Pattern", type="primary"):
                 if key_name and regex_pattern:
                     is_valid, _ = regex_manager.validate_regex(regex_pattern)
-                    if is_valid:
-                        patterns = regex_manager.load_regex_patterns()
-                        patterns[key_name] = regex_pattern
-                        if regex_manager.save_regex_patterns(patterns):
+                    if is_valid and check_pattern_safety(regex_pattern).verdict == 'block':
+                        st.error("❌ This pattern can hang the parser on hostile lines; "
+                                 "bound its quantifiers before saving")
+                    elif is_valid:
+                        updated = regex_manager.load_regex_patterns()
+                        updated[key_name] = regex_pattern
+                        if regex_manager.save_regex_patterns(updated):
                             st.success(f"✅ Pattern '{key_name}' saved successfully!")
                             st.rerun()
                     else:
@@ -158,8 +405,6 @@ def main():
     with tab2:
         st.header("Existing Regex Patterns")
 
-        patterns = regex_manager.load_regex_patterns()
-
         if patterns:
             # Search functionality
             search_term = st.text_input("🔍 Search patterns", placeholder="Enter key name to search...")
@@ -182,9 +427,9 @@ def main():
                     with col2:
                         if st.button(f"🗑️ Delete", key=f"delete_{key}"):
                             if st.session_state.get(f"confirm_delete_{key}"):
-                                patterns = regex_manager.load_regex_patterns()
-                                del patterns[key]
-                                if regex_manager.save_regex_patterns(patterns):
+                                updated = regex_manager.load_regex_patterns()
+                                del updated[key]
+                                if regex_manager.save_regex_patterns(updated):
                                     st.success(f"Pattern '{key}' deleted!")
                                     st.rerun()
                             else:
@@ -197,8 +442,6 @@ def main():
     with tab3:
         st.header("Test Regex Patterns")
 
-        patterns = regex_manager.load_regex_patterns()
-
         if patterns:
             # Pattern selection
             selected_pattern = st.selectbox(
@@ -254,9 +497,100 @@ def main():
                             st.text(f"Match: {test_result}")
                     else:
                         st.error(f"❌ {test_result}")
+
+                st.subheader("Bulk Test")
+                uploaded = st.file_uploader(
+                    "Sample Log File",
+                    help="Every line is matched against the selected pattern; gzip/bz2/xz/zstd files are decompressed",
+                    key="bulk_test_file"
+                )
+                if uploaded is not None:
+                    is_valid, validation_msg = regex_manager.validate_regex(patterns[selected_pattern])
+                    if not is_valid:
+                        st.error(f"❌ {validation_msg}")
+                    else:
+                        safety = check_pattern_safety(patterns[selected_pattern])
+                        if safety.verdict == 'block':
+                            show_safety_report(safety)
+                        else:
+                            file_hash = uploaded_file_hash(uploaded)
+                            test = start_bulk_test(file_hash, patterns[selected_pattern], uploaded.getvalue())
+                            if test.done and test.stopped:
+                                if st.button("Run Again", key="bulk_test_rerun"):
+                                    start_bulk_test.clear()
+                                    st.rerun()
+                            elif not test.done and st.button("Stop", key="bulk_test_stop"):
+                                test.cancel()
+                            progress_bar = st.empty()
+                            summary = st.empty()
+                            while not test.done:
+                                show_bulk_test(test, progress_bar, summary)
+                                time.sleep(BULK_REFRESH_INTERVAL)
+                            show_bulk_test(test, progress_bar, summary)
         else:
             st.info("No patterns available for testing. Please add some patterns first.")
 
+    # Tab 4: Browse Parsed Results
+    with tab4:
+        st.header("Browse Parsed Results")
+
+        output_folder = st.text_input("Output Folder", value="oplogs")
+        outputs = list_outputs(output_folder) if os.path.isdir(output_folder) else []
+
+        if outputs:
+            selected_output = st.selectbox("Output File", options=outputs, format_func=os.path.basename)
+            reader = get_output_reader(selected_output, output_file_state(selected_output))
+
+            col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
+            with col1:
+                log_types = st.multiselect("Log Types", options=sorted(set(reader.log_types) | set(patterns)))
+            with col2:
+                ip = st.text_input("IP", placeholder="e.g., 192.168.1.1")
+            with col3:
+                status = st.text_input("Status", placeholder="e.g., 404")
+            with col4:
+                start = st.text_input("From", placeholder="2023-05-25 10:00", help="UTC unless an offset is given")
+            with col5:
+                end = st.text_input("To", placeholder="2023-05-25 11:00", help="UTC unless an offset is given")
+            page_size = st.selectbox("Rows per Page", options=RESULT_PAGE_SIZES, index=1)
+
+            try:
+                result_filter = ResultFilter(log_types, ip, status, start, end)
+            except ValueError as e:
+                st.error(f"❌ Invalid filter: {e}")
+                result_filter = None
+
+            if result_filter is not None:
+                # Back to the first page whenever the file or the filter changes
+                view = (selected_output, result_filter.key, page_size)
+                if st.session_state.get("results_view") != view:
+                    st.session_state["results_view"] = view
+                    st.session_state["results_page"] = 0
+                page = st.session_state["results_page"]
+
+                with st.spinner("Reading..."):
+                    frame, more = reader.page(result_filter, page, page_size)
+                if len(frame):
+                    st.dataframe(frame, hide_index=True, width="stretch")
+                else:
+                    st.info("No matching rows on this page.")
+
+                col1, col2, col3, col4 = st.columns([1, 1, 2, 2])
+                with col1:
+                    st.button("◀ Previous", disabled=page == 0,
+                              on_click=lambda: st.session_state.update(results_page=page - 1))
+                with col2:
+                    st.button("Next ▶", disabled=not more,
+                              on_click=lambda: st.session_state.update(results_page=page + 1))
+                with col3:
+                    st.caption(f"Page {page + 1} · rows {page * page_size + 1:,}–{page * page_size + len(frame):,}")
+                with col4:
+                    if st.button("🔢 Count Matches"):
+                        with st.spinner("Counting..."):
+                            st.caption(f"{reader.count(result_filter):,} matching rows")
+        else:
+            st.info(f"No parser outputs found in {output_folder}. Run log_parser.py first.")
+
     # Sidebar with information
     with st.sidebar:
         st.header("ℹ️ Information")
@@ -267,7 +601,8 @@ def main():
         ### How to Use:
         1. **Add Patterns**: Create new regex patterns with named groups
         2. **View Patterns**: Browse and manage existing patterns
-        3. **Test Patterns**: Verify your patterns work with sample data
+        3. **Test Patterns**: Verify your patterns work with sample lines or a whole uploaded log file
+        4. **Results**: Page through parsed outputs, filtered by type, IP, status and time
 
         ### Tips:
         - Use named groups like `(?P<field_name>pattern)`
@@ -277,7 +612,6 @@ def main():
         """)
 
         st.header("📊 Statistics")
-        patterns = regex_manager.load_regex_patterns()
         st.metric("Total Patterns", len(patterns))
 
         if patterns:
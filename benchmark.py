@@ -0,0 +1,335 @@
+import os
+import sys
+import queue
+import json
+import time
+import random
+import string
+import argparse
+import platform
+import resource
+import tempfile
+import contextlib
+import importlib.util
+import multiprocessing
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from log_parser import LogParser, READERS
+
+# Formats the synthetic generator can produce
+FORMATS = ('apache_access', 'nginx_access', 'syslog', 'firewall', 'custom_app')
+DEFAULT_RESULTS_FOLDER = "benchmark_results"
+# Seconds between checks that a benchmark child process is still alive
+CHILD_POLL_INTERVAL = 1.0
+
+HTTP_METHODS = ('GET', 'GET', 'GET', 'POST', 'PUT', 'DELETE')
+HTTP_STATUSES = (200, 200, 200, 201, 204, 301, 304, 400, 401, 403, 404, 500, 502, 503)
+URL_PATHS = ('/', '/index.html', '/api/login', '/api/data', '/api/user/{n}', '/dashboard', '/images/logo.png',
+             '/static/app.js', '/search?q={n}')
+USER_AGENTS = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36', 'curl/7.68.0',
+               'Python-requests/2.28.1', 'PostmanRuntime/7.29.2', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)')
+REFERERS = ('-', 'https://example.com/login', 'http://example.com', 'https://admin.example.com')
+HOSTNAMES = ('web-server', 'db-01', 'gateway', 'webserver')
+PROCESSES = ('sshd', 'httpd', 'firewall', 'systemd', 'cron', 'kernel')
+SYSLOG_MESSAGES = ('Failed login attempt for user admin', 'GET request to /secure-area denied',
+                   'Connection blocked from suspicious IP', 'Accepted publickey for deploy')
+FIREWALL_ACTIONS = ('ALLOW', 'DENY', 'DROP')
+APP_LEVELS = ('INFO', 'INFO', 'INFO', 'WARN', 'ERROR', 'DEBUG')
+APP_MESSAGES = ('User authentication successful', 'Rate limit exceeded for API calls',
+                'Database connection failed', 'Cache refreshed in {n} ms')
+
+
+class SyntheticLogGenerator:
+    """Produces realistic lines for every built-in format plus junk lines
+
+    mix maps format names to relative weights; junk_ratio is the share of lines
+    that match no format at all. Timestamps advance by one second every few
+    lines so that, as in real logs, many consecutive lines share a timestamp.
+    """
+
+    def __init__(self, mix=None, junk_ratio=0.0, seed=0, start_time=datetime(2023, 5, 25, 10, 0, 0)):
+        mix = mix or {log_format: 1 for log_format in FORMATS}
+        unknown = set(mix) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown log format(s): {', '.join(sorted(unknown))}")
+        self.formats = list(mix)
+        self.weights = [mix[log_format] for log_format in self.formats]
+        self.junk_ratio = junk_ratio
+        self.random = random.Random(seed)
+        self.time = start_time
+        self.makers = {log_format: getattr(self, f"_{log_format}") for log_format in FORMATS}
+
+    def _ip(self):
+        r = self.random
+        return f"{r.choice((10, 172, 192, 203))}.{r.randint(0, 255)}.{r.randint(0, 255)}.{r.randint(1, 254)}"
+
+    def _path(self):
+        return self.random.choice(URL_PATHS).format(n=self.random.randint(1, 9999))
+
+    def _apache_access(self):
+        r = self.random
+        return (f'{self._ip()} - - [{self.time:%d/%b/%Y:%H:%M:%S} +0000] "{r.choice(HTTP_METHODS)} {self._path()} '
+                f'HTTP/1.1" {r.choice(HTTP_STATUSES)} {r.randint(0, 65535)} "{r.choice(REFERERS)}" '
+                f'"{r.choice(USER_AGENTS)}"')
+
+    def _nginx_access(self):
+        r = self.random
+        return (f'{self._ip()} - - [{self.time:%d/%b/%Y:%H:%M:%S} +0000] "{r.choice(HTTP_METHODS)} {self._path()}" '
+                f'{r.choice(HTTP_STATUSES)} {r.randint(0, 65535)} "{r.choice(REFERERS)}" "{r.choice(USER_AGENTS)}"')
+
+    def _syslog(self):
+        r = self.random
+        return (f'{self.time:%b} {self.time.day:2d} {self.time:%H:%M:%S} {r.choice(HOSTNAMES)} '
+                f'{r.choice(PROCESSES)}[{r.randint(100, 65000)}]: {self._ip()} {r.choice(SYSLOG_MESSAGES)}')
+
+    def _firewall(self):
+        r = self.random
+        return (f'{self.time:%Y-%m-%d %H:%M:%S} firewall {r.choice(FIREWALL_ACTIONS)} {self._ip()} '
+                f'Blocked connection attempt on port {r.randint(1, 65535)}')
+
+    def _custom_app(self):
+        r = self.random
+        message = r.choice(APP_MESSAGES).format(n=r.randint(1, 500))
+        return (f'{self.time:%Y-%m-%dT%H:%M:%S}.{r.randint(0, 999):03d}Z [{r.choice(APP_LEVELS)}] '
+                f'{self._ip()} - {message}')
+
+    def _junk(self):
+        r = self.random
+        return ''.join(r.choice(string.printable[:94] + ' ') for _ in range(r.randint(10, 120)))
+
+    def lines(self, count):
+        """Yield count synthetic lines"""
+        r = self.random
+        for _ in range(count):
+            if r.random() < 0.2:
+                self.time += timedelta(seconds=1)
+            if self.junk_ratio and r.random() < self.junk_ratio:
+                yield self._junk()
+            else:
+                yield self.makers[r.choices(self.formats, self.weights)[0]]()
+
+    def write(self, output_path, count):
+        """Write count lines to a file and return its size in bytes"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for line in self.lines(count):
+                f.write(line)
+                f.write('\n')
+        return os.path.getsize(output_path)
+
+
+def parse_mix(text):
+    """Parse 'apache_access=3,syslog=1' into a weight dict"""
+    if not text:
+        return None
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def time_reader(reader, log_file_path, repeat=3):
+    """Best-of-N lines/sec for reading, stripping and skipping empty lines"""
+    best = None
+    line_count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        line_count = 0
+        for line in READERS[reader](log_file_path):
+            if line.strip():
+                line_count += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return line_count, best
+
+
+def time_parse(reader, log_file_path, regex_file, repeat=3):
+    """Best-of-N lines/sec for reading and fully parsing a file"""
+    parser = LogParser(regex_file=regex_file, output_folder=tempfile.gettempdir(), reader=reader)
+    parser.registry.refresh()
+    best = None
+    record_count = 0
+    # Keep the per-line "no pattern" messages out of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            record_count = sum(1 for _ in parser.parse_lines(READERS[reader](log_file_path)))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    return record_count, best
+
+
+def bench_readers(log_file_path, regex_file="regex.json", repeat=3):
+    """Compare the text-mode and memory-mapped readers on one file"""
+    size_mb = os.path.getsize(log_file_path) / (1024 * 1024)
+    print(f"{log_file_path}: {size_mb:.1f} MB")
+    print(f"{'reader':<8} {'stage':<6} {'lines':>10} {'seconds':>9} {'lines/sec':>12} {'MB/sec':>8}")
+    for stage, timer in (("read", time_reader), ("parse", None)):
+        for reader in READERS:
+            if timer is None:
+                lines, elapsed = time_parse(reader, log_file_path, regex_file, repeat)
+            else:
+                lines, elapsed = timer(reader, log_file_path, repeat)
+            print(f"{reader:<8} {stage:<6} {lines:>10} {elapsed:>9.3f} "
+                  f"{lines / elapsed:>12,.0f} {size_mb / elapsed:>8.1f}")
+
+
+def load_enhanced_parser_class():
+    """Import EnhancedLogParser from code/parse.py ('code' clashes with the stdlib module)"""
+    module_path = Path(__file__).resolve().parent / "code" / "parse.py"
+    spec = importlib.util.spec_from_file_location("enhanced_parse", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.EnhancedLogParser
+
+
+def _run_log_parser(log_folder, output_folder, regex_file):
+    parser = LogParser(log_folder=log_folder, regex_file=regex_file, output_folder=output_folder, profile=True)
+    parser.process_all_logs()
+    return {stage: elapsed_ns / 1e9 for stage, elapsed_ns in parser.stats.stage_ns.items()}
+
+
+def _run_enhanced_parser(log_folder, output_folder, regex_file):
+    parser = load_enhanced_parser_class()(regex_file, profile=True)
+    parser.process_logs(log_folder, output_folder)
+    return {stage: elapsed_ns / 1e9 for stage, elapsed_ns in parser.stats.stage_ns.items()}
+
+
+RUNNERS = {
+    'LogParser': _run_log_parser,
+    'EnhancedLogParser': _run_enhanced_parser,
+}
+
+
+def _benchmark_child(name, log_folder, output_folder, regex_file, results):
+    """Runs one parser end to end in a fresh process so peak RSS is its own"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        start = time.perf_counter()
+        stages = RUNNERS[name](log_folder, output_folder, regex_file)
+        elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+    results.put({'seconds': elapsed, 'stages': stages, 'peak_rss_mb': peak_rss_mb})
+
+
+def _wait_for_result(child, results):
+    """The child's result, or RuntimeError if it exits without one (an exception, the OOM killer...)"""
+    while True:
+        try:
+            return results.get(timeout=CHILD_POLL_INTERVAL)
+        except queue.Empty:
+            if child.exitcode is None:
+                continue
+        # It may have exited right after putting its result
+        try:
+            return results.get(timeout=CHILD_POLL_INTERVAL)
+        except queue.Empty:
+            reason = f"killed by signal {-child.exitcode}" if child.exitcode < 0 else f"exit code {child.exitcode}"
+            raise RuntimeError(f"benchmark process ended without a result ({reason})") from None
+
+
+def run_benchmark(name, log_folder, regex_file, line_count, byte_count):
+    """Run one parser over log_folder in a child process and summarize the result"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as output_folder:
+        child = context.Process(target=_benchmark_child, args=(name, log_folder, output_folder, regex_file, results))
+        child.start()
+        result = _wait_for_result(child, results)
+        child.join()
+
+    seconds = result['seconds']
+    stages = dict(result['stages'])
+    # Loop and instrumentation overhead
+    stages['other'] = max(0.0, seconds - sum(stages.values()))
+    return {
+        'lines': line_count,
+        'bytes': byte_count,
+        'seconds': round(seconds, 4),
+        'lines_per_sec': round(line_count / seconds, 1),
+        'mb_per_sec': round(byte_count / (1024 * 1024) / seconds, 3),
+        'peak_rss_mb': round(result['peak_rss_mb'], 1),
+        'stages': {stage: round(value, 4) for stage, value in stages.items()},
+    }
+
+
+def bench_parsers(line_count, mix=None, junk_ratio=0.0, seed=0, regex_file="regex.json",
+                  enhanced_regex_file="regex_patterns.json", parsers=tuple(RUNNERS), output=None):
+    """Generate a synthetic log, run each parser end to end and save the results as JSON"""
+    regex_files = {'LogParser': regex_file, 'EnhancedLogParser': enhanced_regex_file}
+    report = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'lines': line_count, 'mix': mix or {log_format: 1 for log_format in FORMATS},
+                   'junk_ratio': junk_ratio, 'seed': seed},
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as log_folder:
+        log_path = os.path.join(log_folder, "synthetic.log")
+        byte_count = SyntheticLogGenerator(mix, junk_ratio, seed).write(log_path, line_count)
+        print(f"Generated {line_count} lines ({byte_count / (1024 * 1024):.1f} MB)")
+
+        for name in parsers:
+            try:
+                result = run_benchmark(name, log_folder, os.path.abspath(regex_files[name]), line_count, byte_count)
+            except RuntimeError as e:
+                print(f"{name:<18} failed: {e}")
+                report['results'][name] = {'error': str(e)}
+                continue
+            report['results'][name] = result
+            stages = ', '.join(f"{stage} {value:.2f}s" for stage, value in result['stages'].items())
+            print(f"{name:<18} {result['lines_per_sec']:>12,.0f} lines/sec {result['mb_per_sec']:>8.2f} MB/sec "
+                  f"{result['peak_rss_mb']:>8.1f} MB peak RSS  ({stages})")
+
+    if output is None:
+        Path(DEFAULT_RESULTS_FOLDER).mkdir(parents=True, exist_ok=True)
+        output = os.path.join(DEFAULT_RESULTS_FOLDER, f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output}")
+    return report
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Log parser benchmarks")
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    readers = subparsers.add_parser("readers", help="Compare line readers on an existing log file")
+    readers.add_argument("log_file")
+    readers.add_argument("--regex-file", default="regex.json")
+    readers.add_argument("--repeat", type=int, default=3)
+
+    generate = subparsers.add_parser("generate", help="Write a synthetic log file")
+    generate.add_argument("output")
+    generate.add_argument("--lines", type=int, default=100000)
+    generate.add_argument("--mix", help="Format weights, e.g. apache_access=3,syslog=1 (default: all equal)")
+    generate.add_argument("--junk", type=float, default=0.0, help="Share of lines matching no format")
+    generate.add_argument("--seed", type=int, default=0)
+
+    run = subparsers.add_parser("run", help="Run LogParser and EnhancedLogParser end to end on synthetic data")
+    run.add_argument("--lines", type=int, default=200000)
+    run.add_argument("--mix", help="Format weights, e.g. apache_access=3,syslog=1 (default: all equal)")
+    run.add_argument("--junk", type=float, default=0.0, help="Share of lines matching no format")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--regex-file", default="regex.json")
+    run.add_argument("--enhanced-regex-file", default="regex_patterns.json")
+    run.add_argument("--parsers", nargs="+", choices=list(RUNNERS), default=list(RUNNERS))
+    run.add_argument("--output", help=f"JSON results file (default: {DEFAULT_RESULTS_FOLDER}/benchmark-<time>.json)")
+
+    args = arg_parser.parse_args(argv)
+    if args.command == "readers":
+        bench_readers(args.log_file, args.regex_file, args.repeat)
+    elif args.command == "generate":
+        byte_count = SyntheticLogGenerator(parse_mix(args.mix), args.junk, args.seed).write(args.output, args.lines)
+        print(f"Wrote {args.lines} lines ({byte_count / (1024 * 1024):.1f} MB) to {args.output}")
+    elif args.command == "run":
+        bench_parsers(args.lines, parse_mix(args.mix), args.junk, args.seed, args.regex_file,
+                      args.enhanced_regex_file, args.parsers, args.output)
+
+
+if __name__ == "__main__":
+    main()
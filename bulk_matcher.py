@@ -0,0 +1,69 @@
+import io
+import re
+import copy
+import time
+from collections import Counter
+
+from log_parser import compression_of, open_decompressed, split_lines
+
+# Seconds between the progress reports a bulk match sends while it runs
+REPORT_INTERVAL = 0.25
+
+
+class BulkMatchProgress:
+    """Counters of a bulk match, sent from the matching process to the app
+
+    The matching process writes the number of the line it is matching and
+    when that match started into shared values, so the app can see a runaway
+    match and terminate the process while the match still holds its GIL.
+    """
+
+    def __init__(self, group_names, total_bytes):
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.lines = 0
+        self.matched = 0
+        self.filled = Counter({name: 0 for name in group_names})
+        self.misses = []
+
+
+def match_upload(data, pattern, sample_misses, reports, current_line, match_started):
+    """Match every line of an upload against pattern, putting progress and the outcome on reports
+
+    Lines are stripped and matched from the start, as the parser does; a
+    compressed upload is decompressed here too. reports gets ('progress',
+    BulkMatchProgress) every REPORT_INTERVAL seconds, then ('done', ...) or
+    ('error', message).
+    """
+    try:
+        compiled = re.compile(pattern)
+        progress = BulkMatchProgress(compiled.groupindex, len(data))
+        compression = compression_of(data[:6])
+        next_report = time.monotonic() + REPORT_INTERVAL
+        with io.BytesIO(data) as raw:
+            stream = raw if compression is None else open_decompressed(raw, compression)
+            with stream:
+                for raw_line in stream:
+                    # Progress through the upload itself, compressed or not
+                    progress.bytes_read = raw.tell()
+                    for line in split_lines(raw_line.decode('utf-8', errors='ignore')):
+                        line = line.strip()
+                        if not line:
+                            continue
+                        current_line.value = progress.lines + 1
+                        match_started.value = time.monotonic()
+                        match = compiled.match(line)
+                        match_started.value = 0.0
+                        progress.lines += 1
+                        if match:
+                            progress.matched += 1
+                            progress.filled.update(name for name, value in match.groupdict().items() if value)
+                        elif len(progress.misses) < sample_misses:
+                            progress.misses.append(line)
+                    if time.monotonic() >= next_report:
+                        # The queue pickles on a thread of its own, while the counters keep changing
+                        reports.put(('progress', copy.deepcopy(progress)))
+                        next_report = time.monotonic() + REPORT_INTERVAL
+        reports.put(('done', progress))
+    except Exception as e:
+        reports.put(('error', str(e)))
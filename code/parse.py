@@ -2,16 +2,376 @@ import re
 import json
 import csv
 import os
-from datetime import datetime
+import time
+import calendar
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import logging
+import sys
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Shared with log_parser.py in the repository root, one level up
+REPOSITORY_ROOT = str(Path(__file__).resolve().parent.parent)
+if REPOSITORY_ROOT not in sys.path:
+    sys.path.insert(0, REPOSITORY_ROOT)
+from log_parser import ParseStats  # noqa: E402
+
+
+class CombinedPatternMatcher:
+    """Detects the log type and captures its fields with a single regex scan.
+
+    All registered patterns are merged into one alternation, in registration order,
+    with each pattern wrapped in its own outer group and its named groups renamed so
+    they stay unique. Patterns that can't be merged safely (numbered backreferences,
+    global inline flags) are matched on their own at their position in the order.
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        self.compiled: Dict[str, re.Pattern] = {}
+        # Each segment is either a merged alternation or a standalone pattern
+        self.segments: List[Tuple[re.Pattern, Dict[str, Tuple[str, List[Tuple[str, int]]]]]] = []
+
+        pending: List[Tuple[str, str]] = []
+        for log_type, pattern in patterns.items():
+            if not pattern:
+                continue
+            try:
+                self.compiled[log_type] = re.compile(pattern)
+            except re.error:
+                continue
+            rewritten = self._rewrite_groups(pattern, len(pending))
+            if rewritten is None:
+                self._add_segment(pending)
+                pending = []
+                self._add_standalone(log_type)
+            else:
+                pending.append((log_type, rewritten))
+        self._add_segment(pending)
+
+    @staticmethod
+    def _rewrite_groups(pattern: str, index: int) -> Optional[str]:
+        """Prefix named groups and backreferences with the alternative index.
+
+        Returns None if the pattern can't be embedded in an alternation.
+        """
+        prefix = f"_a{index}_"
+        out = []
+        i = 0
+        in_class = False
+        while i < len(pattern):
+            char = pattern[i]
+            if char == '\\':
+                if not in_class and i + 1 < len(pattern) and pattern[i + 1].isdigit():
+                    # Numbered backreferences would point at the wrong group
+                    return None
+                out.append(pattern[i:i + 2])
+                i += 2
+                continue
+            if in_class:
+                if char == ']':
+                    in_class = False
+                out.append(char)
+                i += 1
+                continue
+            if char == '[':
+                in_class = True
+                out.append(char)
+                i += 1
+                # A leading ']' (or '^]') is a literal inside the class
+                if pattern.startswith('^', i):
+                    out.append('^')
+                    i += 1
+                if pattern.startswith(']', i):
+                    out.append(']')
+                    i += 1
+                continue
+            if pattern.startswith('(?P<', i) or pattern.startswith('(?P=', i):
+                out.append(pattern[i:i + 4] + prefix)
+                i += 4
+                continue
+            if pattern.startswith('(?', i) and i + 2 < len(pattern) and pattern[i + 2].isalpha():
+                # Global inline flags like (?i) are only allowed at the very start
+                end = pattern.find(')', i)
+                if end != -1 and ':' not in pattern[i:end]:
+                    return None
+            out.append(char)
+            i += 1
+        return ''.join(out)
+
+    def _add_segment(self, pending: List[Tuple[str, str]]):
+        if not pending:
+            return
+        alternation = '|'.join(f"(?P<_a{i}>{rewritten})" for i, (_, rewritten) in enumerate(pending))
+        try:
+            combined = re.compile(alternation)
+        except re.error:
+            for log_type, _ in pending:
+                self._add_standalone(log_type)
+            return
+
+        alternatives = {}
+        for i, (log_type, _) in enumerate(pending):
+            prefix = f"_a{i}_"
+            fields = [
+                (name[len(prefix):], index)
+                for name, index in combined.groupindex.items()
+                if name.startswith(prefix)
+            ]
+            alternatives[f"_a{i}"] = (log_type, fields)
+        self.segments.append((combined, alternatives))
+
+    def _add_standalone(self, log_type: str):
+        self.segments.append((self.compiled[log_type], {None: (log_type, None)}))
+
+    def match(self, line: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Return (log_type, groupdict) of the first pattern matching the line"""
+        for regex, alternatives in self.segments:
+            match = regex.match(line)
+            if not match:
+                continue
+            if None in alternatives:
+                log_type, _ = alternatives[None]
+                return log_type, match.groupdict()
+            # The outer wrapper group is always the last one to close
+            log_type, fields = alternatives[match.lastgroup]
+            return log_type, {name: match.group(index) for name, index in fields}
+        return None, None
+
+
+class AdaptiveMatcher:
+    """Tries the patterns of recently matched log types before the full alternation.
+
+    Log files are mostly one format, so the previous line's type is tried first, then
+    the most frequently matched types, up to max_guesses candidates; the combined scan
+    over every alternative is skipped when one of them matches. A guess only stands
+    when no pattern registered before it matches the line too, so results are the
+    same as CombinedPatternMatcher's. Exposes the same match()/compiled interface.
+    """
+
+    def __init__(self, matcher: CombinedPatternMatcher, max_guesses: int = 2):
+        self.matcher = matcher
+        self.compiled = matcher.compiled
+        self.max_guesses = max_guesses
+        self.last_type: Optional[str] = None
+        self.lookups = 0
+        self.first_guess_hits = 0
+        self.guess_hits = 0
+        # log_type -> number of lines matched, used to order the candidates
+        self.hits: Dict[str, int] = {}
+        self._ranked: List[str] = []
+        # log_type -> matcher over the patterns registered before it, built on first use
+        self._earlier: Dict[str, Optional[CombinedPatternMatcher]] = {}
+
+    def reset(self):
+        """Forget the last matched type, e.g. when starting another file"""
+        self.last_type = None
+
+    def candidates(self) -> List[str]:
+        """Log types to try, most recently matched first, then by hit frequency"""
+        ranked = [self.last_type] if self.last_type is not None else []
+        for log_type in self._ranked:
+            if len(ranked) >= self.max_guesses:
+                break
+            if log_type != self.last_type:
+                ranked.append(log_type)
+        return ranked
+
+    def _earlier_matcher(self, log_type: str) -> Optional[CombinedPatternMatcher]:
+        if log_type not in self._earlier:
+            earlier = {}
+            for other, regex in self.compiled.items():
+                if other == log_type:
+                    break
+                earlier[other] = regex.pattern
+            self._earlier[log_type] = CombinedPatternMatcher(earlier) if earlier else None
+        return self._earlier[log_type]
+
+    def match(self, line: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Return (log_type, groupdict) of the first pattern matching the line, likely types first"""
+        self.lookups += 1
+        for position, log_type in enumerate(self.candidates()):
+            match = self.compiled[log_type].match(line)
+            if not match:
+                continue
+            earlier = self._earlier_matcher(log_type)
+            if earlier is not None:
+                earlier_type, groups = earlier.match(line)
+                if earlier_type is not None:
+                    # An earlier registered pattern takes precedence, as in the combined scan
+                    self._hit(earlier_type)
+                    return earlier_type, groups
+            if position == 0:
+                self.first_guess_hits += 1
+            self.guess_hits += 1
+            self._hit(log_type)
+            return log_type, match.groupdict()
+        log_type, groups = self.matcher.match(line)
+        if log_type is not None:
+            self._hit(log_type)
+        return log_type, groups
+
+    def _hit(self, log_type: str):
+        self.last_type = log_type
+        count = self.hits.get(log_type, 0) + 1
+        self.hits[log_type] = count
+        # Keep the ranking sorted by frequency; types rarely change places
+        if log_type not in self._ranked:
+            self._ranked.append(log_type)
+        position = self._ranked.index(log_type)
+        while position > 0 and self.hits[self._ranked[position - 1]] < count:
+            self._ranked[position - 1], self._ranked[position] = self._ranked[position], self._ranked[position - 1]
+            position -= 1
+
+    def report(self) -> str:
+        return (f"Adaptive matching: {self.lookups} lookups, first guess hit "
+                f"{self.first_guess_hits / max(1, self.lookups):.1%}, any guess hit "
+                f"{self.guess_hits / max(1, self.lookups):.1%}")
+
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+
+
+def _digits(text: str, min_len: int, max_len: int) -> int:
+    """Parse a fixed-width-ish numeric field the way strptime's %d/%H/... would accept it"""
+    if not (min_len <= len(text) <= max_len and text.isdigit() and text.isascii()):
+        raise ValueError(text)
+    return int(text)
+
+
+def _parse_syslog(raw: str) -> datetime:
+    # %b %d %H:%M:%S, e.g. "Jan 22 16:14:23" or "Aug  5 10:15:30"
+    if raw[:1].isspace() or raw[-1:].isspace():
+        raise ValueError(raw)
+    month, day, clock = raw.split()
+    hour, minute, second = clock.split(':')
+    return datetime(1900, MONTHS[month.lower()], _digits(day, 1, 2),
+                    _digits(hour, 1, 2), _digits(minute, 1, 2), _digits(second, 1, 2))
+
+
+def _parse_clf(raw: str) -> datetime:
+    # %d/%b/%Y:%H:%M:%S %z, e.g. "25/May/2023:10:15:32 +0000"
+    stamp, offset = raw.split(' ')
+    day, month, rest = stamp.split('/')
+    year, hour, minute, second = rest.split(':')
+    if len(offset) != 5 or offset[0] not in '+-':
+        raise ValueError(offset)
+    delta = timedelta(hours=_digits(offset[1:3], 2, 2), minutes=_digits(offset[3:], 2, 2))
+    tz = timezone(-delta if offset[0] == '-' else delta)
+    return datetime(_digits(year, 4, 4), MONTHS[month.lower()], _digits(day, 1, 2),
+                    _digits(hour, 1, 2), _digits(minute, 1, 2), _digits(second, 1, 2), tzinfo=tz)
+
+
+def _parse_sql(raw: str) -> datetime:
+    # %Y-%m-%d %H:%M:%S, e.g. "2023-01-01 10:30:45"
+    date, clock = raw.split(' ')
+    year, month, day = date.split('-')
+    hour, minute, second = clock.split(':')
+    return datetime(_digits(year, 4, 4), _digits(month, 1, 2), _digits(day, 1, 2),
+                    _digits(hour, 1, 2), _digits(minute, 1, 2), _digits(second, 1, 2))
+
+
+def _parse_iso_millis(raw: str) -> datetime:
+    # %Y-%m-%dT%H:%M:%S.%fZ, e.g. "2023-12-01T14:30:15.123Z"
+    if not raw.endswith('Z'):
+        raise ValueError(raw)
+    date, clock = raw[:-1].split('T')
+    year, month, day = date.split('-')
+    hour, minute, rest = clock.split(':')
+    second, fraction = rest.split('.')
+    microsecond = _digits(fraction, 1, 6) * 10 ** (6 - len(fraction))
+    return datetime(_digits(year, 4, 4), _digits(month, 1, 2), _digits(day, 1, 2),
+                    _digits(hour, 1, 2), _digits(minute, 1, 2), _digits(second, 1, 2), microsecond)
+
+
+class TimestampNormalizer:
+    """Converts captured timestamps to one output layout without calling strptime per line.
+
+    Formats used by the built-in patterns have hand-written fixed-layout parsers;
+    anything else (or any input those parsers reject) goes through strptime, so
+    results and errors are the same as before. Results are memoized per
+    (raw value, format), which pays off because consecutive lines mostly share
+    their timestamp down to the second.
+    """
+
+    FAST_PARSERS = {
+        '%b %d %H:%M:%S': _parse_syslog,
+        '%d/%b/%Y:%H:%M:%S %z': _parse_clf,
+        '%Y-%m-%d %H:%M:%S': _parse_sql,
+        '%Y-%m-%dT%H:%M:%S.%fZ': _parse_iso_millis,
+    }
+    # Output layouts besides any strftime format
+    ISO = 'iso'
+    EPOCH = 'epoch'
+    DEFAULT_OUTPUT = '%Y-%m-%d %H:%M:%S'
+
+    def __init__(self, output_format: str = DEFAULT_OUTPUT, cache_size: int = 65536):
+        self.output_format = output_format
+        self._convert_cached = lru_cache(maxsize=cache_size)(self._convert)
+
+    def _parse(self, raw: str, timestamp_format: str) -> datetime:
+        fast_parser = self.FAST_PARSERS.get(timestamp_format)
+        if fast_parser is not None:
+            try:
+                return fast_parser(raw)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                # Let strptime decide, so odd inputs behave exactly as before
+                pass
+        return datetime.strptime(raw, timestamp_format)
+
+    def _format(self, timestamp: datetime) -> str:
+        if self.output_format == self.ISO:
+            return timestamp.isoformat()
+        if self.output_format == self.EPOCH:
+            # Naive timestamps are taken to be UTC
+            if timestamp.tzinfo is None:
+                return str(calendar.timegm(timestamp.timetuple()))
+            return str(int(timestamp.timestamp()))
+        if self.output_format == self.DEFAULT_OUTPUT and timestamp.year >= 1000:
+            # Same text as strftime, without its overhead
+            return (f"{timestamp.year}-{timestamp.month:02d}-{timestamp.day:02d} "
+                    f"{timestamp.hour:02d}:{timestamp.minute:02d}:{timestamp.second:02d}")
+        return timestamp.strftime(self.output_format)
+
+    def _convert(self, raw: str, timestamp_format: str) -> Tuple[Optional[str], Optional[str]]:
+        """(normalized timestamp, None), or (None, error message) if it doesn't fit the format"""
+        try:
+            return self._format(self._parse(raw, timestamp_format)), None
+        except ValueError as e:
+            # Cached too, so a bad timestamp repeated on many lines is only parsed once. Only the
+            # message is kept: a cached exception re-raised per line would pile up tracebacks.
+            return None, str(e)
+
+    def normalize(self, raw: str, timestamp_format: str) -> str:
+        """Return the normalized timestamp, raising ValueError if it doesn't fit the format"""
+        result, error = self._convert_cached(raw, timestamp_format)
+        if error is not None:
+            raise ValueError(error)
+        return result
+
 
 class EnhancedLogParser:
-    def __init__(self, regex_file: str = "regex_patterns.json"):
-        """Initialize LogParser with regex patterns from JSON file"""
+    def __init__(self, regex_file: str = "regex_patterns.json", profile: bool = False,
+                 stats_file: Optional[str] = None, timestamp_output: str = TimestampNormalizer.DEFAULT_OUTPUT,
+                 adaptive: bool = False):
+        """Initialize LogParser with regex patterns from JSON file
+
+        timestamp_output is a strftime layout, or 'iso' / 'epoch'. With adaptive set,
+        the recently and most often matched log types' patterns are tried before the
+        combined alternation.
+        """
         self.regex_patterns = self._load_regex_patterns(regex_file)
+        self.matcher = CombinedPatternMatcher(
+            {log_type: config['pattern'] for log_type, config in self.regex_patterns.items()}
+        )
+        if adaptive:
+            self.matcher = AdaptiveMatcher(self.matcher)
         self.logger = self._setup_logger()
+        self.timestamps = TimestampNormalizer(timestamp_output)
+        # Opt-in instrumentation; without it the parse loop isn't timed at all. The combined scan
+        # is counted as detection and building the entry (timestamp normalization) as parsing
+        self.stats: Optional[ParseStats] = ParseStats() if profile or stats_file else None
+        self.stats_file = stats_file
 
     def _load_regex_patterns(self, regex_file: str) -> Dict:
         """Load regex patterns from JSON file"""
@@ -33,11 +393,15 @@ class EnhancedLogParser:
 
     def detect_log_type(self, line: str) -> Optional[str]:
         """Automatically detect log type based on line content"""
-        for log_type, config in self.regex_patterns.items():
-            pattern = config['pattern']
-            if pattern and re.match(pattern, line):
-                return log_type
-        return None
+        log_type, _ = self.matcher.match(line)
+        return log_type
+
+    def match_line(self, line: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Detect the log type and parse the line in a single regex scan"""
+        log_type, parsed_data = self.matcher.match(line)
+        if log_type is None:
+            return None, None
+        return log_type, self._build_entry(parsed_data, log_type, line)
 
     def parse_log_line(self, line: str, log_type: str) -> Optional[Dict]:
         """Parse a single log line using the appropriate regex pattern"""
@@ -45,25 +409,27 @@ class EnhancedLogParser:
             self.logger.error(f"Unknown log type: {log_type}")
             return None
 
-        config = self.regex_patterns[log_type]
-        pattern = config['pattern']
-        timestamp_format = config['timestamp_format']
-        
+        pattern = self.regex_patterns[log_type]['pattern']
+
         if not pattern:
             self.logger.error(f"No pattern found for log type: {log_type}")
             return None
 
-        match = re.match(pattern, line)
+        compiled = self.matcher.compiled.get(log_type) or re.compile(pattern)
+        match = compiled.match(line)
         if not match:
             self.logger.warning(f"Line does not match pattern for {log_type}: {line}")
             return None
 
+        return self._build_entry(match.groupdict(), log_type, line)
+
+    def _build_entry(self, parsed_data: Dict, log_type: str, line: str) -> Optional[Dict]:
+        """Normalize the captured groups of a matched line into an entry"""
+        timestamp_format = self.regex_patterns[log_type]['timestamp_format']
         try:
-            parsed_data = match.groupdict()
             if 'timestamp' in parsed_data and timestamp_format:
                 try:
-                    timestamp = datetime.strptime(parsed_data['timestamp'], timestamp_format)
-                    parsed_data['timestamp'] = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+                    parsed_data['timestamp'] = self.timestamps.normalize(parsed_data['timestamp'], timestamp_format)
                 except ValueError as e:
                     self.logger.warning(f"Could not parse timestamp: {e}")
             
@@ -77,6 +443,73 @@ class EnhancedLogParser:
             self.logger.error(f"Error parsing line: {line}. Error: {str(e)}")
             return None
 
+    @staticmethod
+    def _unparsed_entry(line: str, line_num: int) -> Dict:
+        """Store unparseable lines with basic info"""
+        return {
+            'timestamp': '',
+            'hostname': '',
+            'process': '',
+            'pid': '',
+            'level': '',
+            'message': line,
+            'line_num': line_num
+        }
+
+    def iter_entries(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Yield an entry for every non-empty line"""
+        if self.stats is not None:
+            yield from self._iter_entries_profiled(lines)
+            return
+
+        for line_num, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            # Auto-detect log type and parse in one pass
+            log_type, parsed_line = self.match_line(line)
+            if log_type:
+                if parsed_line:
+                    # Add line number for reference
+                    parsed_line['line_num'] = line_num
+                    yield parsed_line
+            else:
+                yield self._unparsed_entry(line, line_num)
+
+    def _iter_entries_profiled(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """iter_entries() with every stage timed and every line counted"""
+        stats = self.stats
+        clock = time.perf_counter_ns
+        iterator = iter(lines)
+        line_num = 0
+        while True:
+            started = clock()
+            line = next(iterator, None)
+            stats.add_stage('read', clock() - started)
+            if line is None:
+                break
+            line_num += 1
+            stats.lines_read += 1
+            line = line.strip()
+            if not line:
+                stats.empty_lines += 1
+                continue
+
+            started = clock()
+            log_type, parsed_data = self.matcher.match(line)
+            matched = clock()
+            if log_type is None:
+                stats.add_line('unknown', 'unknown', matched - started, 0)
+                yield self._unparsed_entry(line, line_num)
+                continue
+
+            parsed_line = self._build_entry(parsed_data, log_type, line)
+            stats.add_line(log_type, 'matched' if parsed_line else 'fallback', matched - started, clock() - matched)
+            if parsed_line:
+                parsed_line['line_num'] = line_num
+                yield parsed_line
+
     def process_logs(self, logs_dir: str, output_dir: str):
         """Process all logs in the directory and save results as CSV"""
         # Create output directory if it doesn't exist
@@ -85,45 +518,34 @@ class EnhancedLogParser:
         # Process each log file
         for log_file in Path(logs_dir).glob('*.log'):
             self.logger.info(f"Processing {log_file}")
-            parsed_entries = []
-            
+            if isinstance(self.matcher, AdaptiveMatcher):
+                self.matcher.reset()
+
             try:
                 with open(log_file, 'r', encoding='utf-8') as f:
-                    for line_num, line in enumerate(f, 1):
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        # Auto-detect log type
-                        log_type = self.detect_log_type(line)
-                        if log_type:
-                            parsed_line = self.parse_log_line(line, log_type)
-                            if parsed_line:
-                                # Add line number for reference
-                                parsed_line['line_num'] = line_num
-                                parsed_entries.append(parsed_line)
-                        else:
-                            # Store unparseable lines with basic info
-                            parsed_entries.append({
-                                'timestamp': '',
-                                'hostname': '',
-                                'process': '',
-                                'pid': '',
-                                'level': '',
-                                'message': line,
-                                'line_num': line_num
-                            })
+                    parsed_entries = list(self.iter_entries(f))
 
                 if parsed_entries:
                     # Create output CSV file
                     output_file = Path(output_dir) / f"{log_file.stem}_parsed.csv"
+                    started = time.perf_counter_ns()
                     self._save_to_csv(parsed_entries, output_file)
+                    if self.stats is not None:
+                        self.stats.add_stage('write', time.perf_counter_ns() - started)
                     self.logger.info(f"Saved parsed results to {output_file}")
                     self.logger.info(f"Processed {len(parsed_entries)} lines")
 
             except Exception as e:
                 self.logger.error(f"Error processing {log_file}: {str(e)}")
 
+        if isinstance(self.matcher, AdaptiveMatcher):
+            self.logger.info(self.matcher.report())
+        if self.stats is not None:
+            self.logger.info(f"Parse statistics:\n{self.stats.report()}")
+            if self.stats_file:
+                self.stats.save_json(self.stats_file)
+                self.logger.info(f"Saved parse statistics to {self.stats_file}")
+
     def _save_to_csv(self, entries: List[Dict], output_file: Path):
         """Save parsed entries to CSV file"""
         if not entries:
@@ -1,45 +1,921 @@
-
+import io
 import os
 import re
-import json
+import bz2
 import csv
 import glob
+import gzip
+import json
+import lzma
+import mmap
+import time
+import queue
+import signal
+import argparse
+import hashlib
+import itertools
+import threading
+import zlib
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-class LogParser:
-    def __init__(self, log_folder="log", regex_file="regex.json", output_folder="oplogs"):
-        self.log_folder = log_folder
-        self.regex_file = regex_file
-        self.output_folder = output_folder
+from record_filter import RecordFilter
+from writers import COMPRESSIONS, WRITERS, RollingWriter, get_writer, output_extension
 
-        # Create output folder if it doesn't exist
-        Path(self.output_folder).mkdir(parents=True, exist_ok=True)
+# Columns that always lead the output, in this order
+REQUIRED_FIELDS = ['line_number', 'log_type', 'ip', 'timestamp', 'message']
+# Rows buffered by the streaming writers before each write
+DEFAULT_BATCH_SIZE = 10000
+# Bytes decoded at a time by the memory-mapped reader
+MMAP_BLOCK_SIZE = 64 * 1024
+# Files larger than this are split into several chunks in parallel mode
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+# File name patterns picked up in the log folder, including rotated copies like access.log.1.gz
+LOG_GLOBS = ("*.log", "*.log.*")
+# Leading bytes identifying compressed inputs, whatever their file name
+COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz', '.zst')
+# Decompressed bytes handed over per block, and blocks decompressed ahead of the parser
+DECOMPRESS_BLOCK_SIZE = 1024 * 1024
+PREFETCH_BLOCKS = 4
+# Line prefixes used by the syslog and firewall detection heuristics
+SYSLOG_PREFIX = re.compile(r'^\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}')
+FIREWALL_PREFIX = re.compile(r'^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}')
+# Per-file resume points of the incremental mode, kept in the output folder
+CHECKPOINT_FILE = ".checkpoints.json"
+# Per-file fingerprints of the cache mode, kept in the output folder
+CACHE_MANIFEST_FILE = ".cache_manifest.json"
+# Leading bytes hashed to recognise a file that was truncated and regrew past its offset
+HEAD_FINGERPRINT_BYTES = 4096
+# Seconds a single line may spend in pattern matching before it is quarantined, when the
+# budget is switched on (--match-timeout without a value); off by default, since it takes
+# over the process's SIGALRM handler
+DEFAULT_MATCH_TIMEOUT = 1.0
+# Watchdog timer ticks per match budget; a runaway line is stopped within 1 + 1/ticks budgets
+WATCHDOG_TICKS = 4
+# Lines that ran past the match budget, with the pattern at fault, kept in the output folder
+QUARANTINE_FILE = ".quarantine.jsonl"
 
-    def load_regex_patterns(self):
-        """Load regex patterns from JSON file"""
+# Patterns written to a fresh regex file when none exists yet
+DEFAULT_PATTERNS = {
+    "apache_access": r'(?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) - - \[(?P<timestamp>[\w:/]+\s[+\-]\d{4})\] "(?P<method>\S+) (?P<path>\S+)\s*(?P<protocol>\S*)" (?P<status>\d{3}) (?P<size>\d+) "(?P<message>.*?)"',
+    "nginx_access": r'(?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) - - \[(?P<timestamp>[^\]]+)\] "(?P<method>\w+) (?P<path>[^"]*)" (?P<status>\d+) (?P<size>\d+) "(?P<referer>[^"]*)" "(?P<message>[^"]*)"',
+    "syslog": r'(?P<timestamp>\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}) (?P<hostname>\S+) (?P<source>\S+): (?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})? ?(?P<message>.*)',
+    "firewall": r'(?P<timestamp>\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}) (?P<source>\S+) (?P<action>\w+) (?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) (?P<message>.*)'
+}
+
+
+class PatternRegistry:
+    """Compiled regex patterns loaded once from the regex JSON file"""
+
+    # Groups every pattern is expected to capture
+    REQUIRED_GROUPS = ('ip', 'timestamp', 'message')
+    # Fields the parser sets itself; a group with one of these names gets overwritten
+    RESERVED_GROUPS = ('line_number', 'log_type', 'raw_line')
+
+    def __init__(self, regex_file="regex.json", keep_groups=None):
+        self.regex_file = regex_file
+        # Named groups to capture; the others are compiled as non-capturing (None keeps them all)
+        self.keep_groups = keep_groups
+        self.patterns = {}
+        self.compiled = {}
+        self._mtime = None
+
+    def _read_file(self):
+        """Read raw patterns from the JSON file, creating it with defaults if missing"""
         try:
             with open(self.regex_file, 'r') as f:
                 return json.load(f)
         except FileNotFoundError:
             print(f"Regex file {self.regex_file} not found. Creating empty file.")
             # Create empty regex file if it doesn't exist
-            empty_patterns = {
-                "apache_access": r'(?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) - - \[(?P<timestamp>[\w:/]+\s[+\-]\d{4})\] "(?P<method>\S+) (?P<path>\S+)\s*(?P<protocol>\S*)" (?P<status>\d{3}) (?P<size>\d+) "(?P<message>.*?)"',
-                "nginx_access": r'(?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) - - \[(?P<timestamp>[^\]]+)\] "(?P<method>\w+) (?P<path>[^"]*)" (?P<status>\d+) (?P<size>\d+) "(?P<referer>[^"]*)" "(?P<message>[^"]*)"',
-                "syslog": r'(?P<timestamp>\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}) (?P<hostname>\S+) (?P<source>\S+): (?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})? ?(?P<message>.*)',
-                "firewall": r'(?P<timestamp>\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}) (?P<source>\S+) (?P<action>\w+) (?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) (?P<message>.*)'
-            }
             with open(self.regex_file, 'w') as f:
-                json.dump(empty_patterns, f, indent=4)
-            return empty_patterns
+                json.dump(DEFAULT_PATTERNS, f, indent=4)
+            return dict(DEFAULT_PATTERNS)
         except json.JSONDecodeError:
             print(f"Error decoding {self.regex_file}. Please check the JSON format.")
             return {}
 
+    def _file_mtime(self):
+        try:
+            return os.stat(self.regex_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def compile(self, name, pattern):
+        """Compile a single pattern and check its named groups, returning None if unusable"""
+        try:
+            compiled = re.compile(pattern)
+        except (re.error, TypeError) as e:
+            print(f"Invalid regex pattern for {name}: {e}")
+            return None
+
+        groups = set(compiled.groupindex)
+        missing = [g for g in self.REQUIRED_GROUPS if g not in groups]
+        if missing:
+            print(f"Pattern {name} has no named group(s): {', '.join(missing)}")
+        reserved = [g for g in self.RESERVED_GROUPS if g in groups]
+        if reserved:
+            print(f"Pattern {name} uses reserved group name(s): {', '.join(reserved)}")
+        if self.keep_groups is not None:
+            try:
+                compiled = re.compile(project_pattern(pattern, self.keep_groups))
+            except re.error as e:
+                # The pattern itself compiles, so keep it with all its groups
+                print(f"Pattern {name} keeps all its groups, dropping unused ones failed: {e}")
+        return compiled
+
+    def load(self):
+        """Load and compile every pattern from the regex file"""
+        self._mtime = self._file_mtime()
+        self.patterns = self._read_file()
+        self.compiled = {}
+        for name, pattern in self.patterns.items():
+            compiled = self.compile(name, pattern)
+            if compiled is not None:
+                self.compiled[name] = compiled
+        # The file may have just been created with the defaults
+        if self._mtime is None:
+            self._mtime = self._file_mtime()
+        return self.compiled
+
+    def refresh(self):
+        """Reload the patterns only if the regex file changed since the last load"""
+        if self._mtime is None or self._file_mtime() != self._mtime:
+            self.load()
+        return self.compiled
+
+    def get(self, log_type):
+        """Return the compiled matcher for a log type, or None"""
+        return self.compiled.get(log_type)
+
+    def pattern_hash(self, log_type):
+        """Fingerprint of a log type's raw pattern; types without one hash alike"""
+        return hashlib.sha1(json.dumps(self.patterns.get(log_type)).encode('utf-8')).hexdigest()
+
+    def group_names(self, log_type):
+        """Return the named groups of a log type's pattern in pattern order"""
+        compiled = self.compiled.get(log_type)
+        if compiled is None:
+            return []
+        return sorted(compiled.groupindex, key=compiled.groupindex.get)
+
+
+def project_pattern(pattern, keep):
+    """Turn the named groups of a pattern that aren't in keep into non-capturing groups
+
+    Groups a backreference or conditional refers to by name stay as they are.
+    A pattern with numbered backreferences or conditionals is returned
+    unchanged: every group made non-capturing renumbers the ones after it.
+    """
+    referenced = set(re.findall(r'\(\?(?:P=|\()(\w+)\)', pattern))
+    parts = []
+    position = 0
+    in_class = False
+    while position < len(pattern):
+        char = pattern[position]
+        if char == '\\':
+            escaped = pattern[position + 1:position + 2]
+            if not in_class and escaped.isdigit() and escaped != '0':
+                # A numbered backreference (\0 is an octal escape)
+                return pattern
+            parts.append(pattern[position:position + 2])
+            position += 2
+            continue
+        if in_class:
+            if char == ']':
+                in_class = False
+        elif char == '[':
+            in_class = True
+            # A ']' right after '[' or '[^' is a literal, not the end of the class
+            end = position + 1
+            if pattern.startswith('^', end):
+                end += 1
+            if pattern.startswith(']', end):
+                end += 1
+            parts.append(pattern[position:end])
+            position = end
+            continue
+        elif pattern.startswith('(?(', position) and pattern[position + 3:position + 4].isdigit():
+            return pattern
+        elif pattern.startswith('(?P<', position):
+            end = pattern.find('>', position)
+            name = pattern[position + 4:end]
+            if end != -1 and name not in keep and name not in referenced:
+                parts.append('(?:')
+                position = end + 1
+                continue
+        parts.append(char)
+        position += 1
+    return ''.join(parts)
+
+
+def write_json_atomic(path, data):
+    """Write JSON through a temporary file so readers never see a partial file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def order_fieldnames(fieldnames):
+    """Order output columns: required fields first, the rest alphabetically"""
+    fieldnames = set(fieldnames)
+
+    # Ensure required fields come first
+    ordered_fieldnames = []
+    for field in REQUIRED_FIELDS:
+        if field in fieldnames:
+            ordered_fieldnames.append(field)
+            fieldnames.remove(field)
+
+    # Add remaining fields
+    ordered_fieldnames.extend(sorted(fieldnames))
+    return ordered_fieldnames
+
+
+class ParseStats:
+    """Per-stage timers and per-log-type counters collected by an instrumented parse"""
+
+    STAGES = ('read', 'detect', 'parse', 'write')
+    OUTCOMES = ('matched', 'fallback', 'unknown', 'quarantined', 'filtered')
+
+    def __init__(self):
+        self.lines_read = 0
+        self.empty_lines = 0
+        self.stage_ns = dict.fromkeys(self.STAGES, 0)
+        # log_type -> outcome counts and detect/parse nanoseconds
+        self.log_types = {}
+
+    def _log_type(self, log_type):
+        counters = self.log_types.get(log_type)
+        if counters is None:
+            counters = self.log_types[log_type] = dict.fromkeys(self.OUTCOMES + ('detect_ns', 'parse_ns'), 0)
+        return counters
+
+    def add_stage(self, stage, elapsed_ns):
+        self.stage_ns[stage] += elapsed_ns
+
+    def add_line(self, log_type, outcome, detect_ns, parse_ns):
+        """Record one non-empty line: how it was handled and what detection and parsing cost"""
+        counters = self._log_type(log_type)
+        counters[outcome] += 1
+        counters['detect_ns'] += detect_ns
+        counters['parse_ns'] += parse_ns
+        self.stage_ns['detect'] += detect_ns
+        self.stage_ns['parse'] += parse_ns
+
+    def merge(self, other):
+        """Fold in the stats of another parser, e.g. a worker process"""
+        self.lines_read += other.lines_read
+        self.empty_lines += other.empty_lines
+        for stage, elapsed_ns in other.stage_ns.items():
+            self.stage_ns[stage] += elapsed_ns
+        for log_type, other_counters in other.log_types.items():
+            counters = self._log_type(log_type)
+            for key, value in other_counters.items():
+                counters[key] += value
+
+    def to_dict(self):
+        return {
+            'lines_read': self.lines_read,
+            'empty_lines': self.empty_lines,
+            'stage_ns': dict(self.stage_ns),
+            'log_types': {log_type: dict(counters) for log_type, counters in self.log_types.items()},
+        }
+
+    def save_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+
+    def report(self):
+        """Human-readable summary table"""
+        parsed = max(1, self.lines_read - self.empty_lines)
+        rows = [f"Lines read: {self.lines_read} ({self.empty_lines} empty)",
+                f"{'stage':<10} {'seconds':>10} {'ns/line':>10}"]
+        for stage, elapsed_ns in self.stage_ns.items():
+            rows.append(f"{stage:<10} {elapsed_ns / 1e9:>10.3f} {elapsed_ns / parsed:>10.0f}")
+        rows.append(f"{'log_type':<16} {'matched':>9} {'fallback':>9} {'unknown':>9} {'quarantined':>11} "
+                    f"{'filtered':>9} {'detect ns':>10} {'parse ns':>10}")
+        for log_type, counters in sorted(self.log_types.items()):
+            lines = max(1, sum(counters[outcome] for outcome in self.OUTCOMES))
+            rows.append(f"{log_type:<16} {counters['matched']:>9} {counters['fallback']:>9} "
+                        f"{counters['unknown']:>9} {counters['quarantined']:>11} {counters['filtered']:>9} "
+                        f"{counters['detect_ns'] / lines:>10.0f} {counters['parse_ns'] / lines:>10.0f}")
+        return "\n".join(rows)
+
+
+class MatchTimeout(Exception):
+    """Raised inside a line's pattern matching once it ran past the match budget
+
+    log_type names the pattern that was matching, or is None when the time
+    ran out outside of any pattern.
+    """
+
+    def __init__(self, log_type=None):
+        super().__init__(log_type)
+        self.log_type = log_type
+
+
+class MatchWatchdog:
+    """Interrupts pattern matching that runs longer than a per-line budget
+
+    Python's regex engine checks for signals while it backtracks, so an
+    interval timer (SIGALRM) can break into a runaway match in place, without
+    handing every line to a separate process. The parse loop sets current to
+    the line it is working on and back to None when done; the timer ticks
+    WATCHDOG_TICKS times per budget and raises MatchTimeout once the same line
+    has been current for the whole budget. Signals only reach the main thread,
+    so elsewhere (or without setitimer) the watchdog stays unarmed.
+    """
+
+    def __init__(self, timeout=DEFAULT_MATCH_TIMEOUT):
+        self.timeout = timeout
+        self.current = None
+        self.armed = False
+        self._seen = None
+        self._seen_at = 0.0
+        self._previous_handler = None
+
+    def arm(self):
+        if self.armed:
+            return True
+        if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+            print("Match time budget unavailable here (needs SIGALRM in the main thread), lines are not timed")
+            return False
+        self._previous_handler = signal.signal(signal.SIGALRM, self._tick)
+        interval = self.timeout / WATCHDOG_TICKS
+        signal.setitimer(signal.ITIMER_REAL, interval, interval)
+        self.armed = True
+        return True
+
+    def disarm(self):
+        if not self.armed:
+            return
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, self._previous_handler or signal.SIG_DFL)
+        self.armed = False
+        self.current = None
+
+    def __enter__(self):
+        self.arm()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disarm()
+
+    def _tick(self, signum, frame):
+        current = self.current
+        now = time.monotonic()
+        if current is None or current != self._seen:
+            self._seen, self._seen_at = current, now
+            return
+        if now - self._seen_at >= self.timeout:
+            # Cleared first, so a tick landing after the handler caught this can't raise again
+            self.current = self._seen = None
+            raise MatchTimeout()
+
+
+class Quarantine:
+    """Lines that ran past the match budget, appended to a JSON lines file with the pattern at fault
+
+    Without a path (as in worker processes) the entries are kept in memory
+    for the parent to take over.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        # Input the lines currently parsed come from
+        self.source = None
+        # log_type -> quarantined lines
+        self.counts = {}
+        # input -> log types of its quarantined lines
+        self.sources = {}
+        self.entries = []
+
+    def add(self, line_number, log_type, line, source=None):
+        entry = {'file': source if source is not None else self.source, 'line_number': line_number,
+                 'pattern': log_type, 'line': line}
+        self.counts[log_type] = self.counts.get(log_type, 0) + 1
+        self.sources.setdefault(entry['file'], set()).add(log_type)
+        if self.path is None:
+            self.entries.append(entry)
+            return
+        print(f"Quarantined line {line_number} of {entry['file']}: "
+              f"{log_type or 'detection'} ran past the match budget")
+        # Rare enough to open the file per line, which keeps it complete whatever happens next
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def log_types(self, source):
+        """Log types whose patterns ran past the budget on lines of source (None for detection)"""
+        return self.sources.get(source, set())
+
+    def discard(self, sources):
+        """Drop the file's entries for inputs about to be parsed again, so they aren't listed twice"""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        sources = set(sources)
+        kept = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    if json.loads(line).get('file') in sources:
+                        continue
+                except (json.JSONDecodeError, AttributeError):
+                    pass
+                kept.append(line)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(kept)
+        os.replace(tmp_path, self.path)
+
+    def take_entries(self):
+        entries, self.entries = self.entries, []
+        return entries
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def report(self, timeout):
+        per_pattern = ", ".join(f"{log_type or 'detection'}: {count}"
+                                for log_type, count in sorted(self.counts.items(), key=lambda item: str(item[0])))
+        where = f" to {self.path}" if self.path else ""
+        return f"Quarantined {self.total} lines that ran past the {timeout:g}s match budget ({per_pattern}){where}"
+
+
+class AdaptiveDetector:
+    """Guesses a line's log type from what recently matched, verified by that type's pattern
+
+    Real files are mostly one format, so the type that matched the previous line
+    is tried first, then the most frequently matched types, up to max_guesses
+    candidates. A guess only counts when its compiled pattern matches the line
+    and the keyword heuristics of detect_log_type() give the same type (their
+    checks overlap, so a pattern match alone could relabel a line); the match
+    is then reused as the parse result. When every guess misses, the caller
+    falls back to the regular detection, so results never differ from a run
+    without the detector.
+    """
+
+    def __init__(self, registry, max_guesses=2):
+        self.registry = registry
+        self.max_guesses = max_guesses
+        self.last_type = None
+        self.detections = 0
+        self.first_guess_hits = 0
+        self.guess_hits = 0
+        # log_type -> number of lines matched, used to order the candidates
+        self.hits = {}
+        self._ranked = []
+
+    def reset(self):
+        """Forget the last matched type, e.g. when starting another file"""
+        self.last_type = None
+
+    def candidates(self):
+        """Log types to try, most recently matched first, then by hit frequency"""
+        if self.last_type is None:
+            return self._ranked[:self.max_guesses]
+        ranked = [self.last_type]
+        for log_type in self._ranked:
+            if len(ranked) >= self.max_guesses:
+                break
+            if log_type != self.last_type:
+                ranked.append(log_type)
+        return ranked
+
+    def guess(self, line, detect):
+        """Return (log_type, match) for the first candidate whose pattern matches, else (None, None)
+
+        detect is the regular detection; a candidate is only taken for a line it
+        would also have given that type, so guessing never changes a result.
+        """
+        self.detections += 1
+        detected = None
+        for position, log_type in enumerate(self.candidates()):
+            pattern = self.registry.get(log_type)
+            try:
+                match = pattern.match(line) if pattern is not None else None
+            except MatchTimeout:
+                raise MatchTimeout(log_type) from None
+            if not match:
+                continue
+            if detected is None:
+                detected = detect(line)
+            if detected == log_type:
+                if position == 0:
+                    self.first_guess_hits += 1
+                self.guess_hits += 1
+                self._hit(log_type)
+                return log_type, match
+        return None, None
+
+    def record(self, log_type, outcome):
+        """Learn from a line the regular detection handled"""
+        if outcome == 'matched':
+            self._hit(log_type)
+
+    def _hit(self, log_type):
+        self.last_type = log_type
+        count = self.hits.get(log_type, 0) + 1
+        self.hits[log_type] = count
+        # Keep the ranking sorted by frequency; types rarely change places
+        if log_type not in self._ranked:
+            self._ranked.append(log_type)
+        position = self._ranked.index(log_type)
+        while position > 0 and self.hits[self._ranked[position - 1]] < count:
+            self._ranked[position - 1], self._ranked[position] = self._ranked[position], self._ranked[position - 1]
+            position -= 1
+
+    def merge(self, other):
+        """Fold in the counters of another detector, e.g. from a worker process"""
+        self.detections += other['detections']
+        self.first_guess_hits += other['first_guess_hits']
+        self.guess_hits += other['guess_hits']
+        for log_type, count in other['hits'].items():
+            self.hits[log_type] = self.hits.get(log_type, 0) + count
+
+    def counters(self):
+        return {
+            'detections': self.detections,
+            'first_guess_hits': self.first_guess_hits,
+            'guess_hits': self.guess_hits,
+            'hits': dict(self.hits),
+        }
+
+    def report(self):
+        detections = max(1, self.detections)
+        return (f"Adaptive detection: {self.detections} detections, first guess hit "
+                f"{self.first_guess_hits / detections:.1%}, any guess hit {self.guess_hits / detections:.1%}")
+
+
+def split_lines(text):
+    """Split decoded text into lines at LF, CRLF and a lone CR, as text-mode files do
+
+    Text ending with a newline ends with an empty string.
+    """
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text.split('\n')
+
+
+def iter_text_lines(log_file_path):
+    """Read lines through a text-mode file object"""
+    with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        yield from f
+
+
+def iter_mmap_lines(log_file_path, start=0, end=None, block_size=MMAP_BLOCK_SIZE):
+    """Read lines from a memory-mapped file between two byte offsets
+
+    The mapping is consumed in newline-aligned blocks; each block is decoded once
+    and split into lines in one call, so every line is decoded exactly once and
+    without the per-line buffering of a text-mode file object. Lines end where
+    they would in text mode, carriage returns included.
+    """
+    with open(log_file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        end = file_size if end is None else min(end, file_size)
+        # mmap refuses empty files
+        if start >= end:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = start
+            while pos < end:
+                block_end = min(pos + block_size, end)
+                if block_end < end:
+                    # Cut the block after its last complete line
+                    newline = mm.rfind(b'\n', pos, block_end)
+                    if newline == -1:
+                        newline = mm.find(b'\n', block_end, end)
+                    block_end = end if newline == -1 else newline + 1
+                lines = split_lines(mm[pos:block_end].decode('utf-8', errors='ignore'))
+                if lines[-1] == '':
+                    # The block ended with a newline, not with another line
+                    lines.pop()
+                yield from lines
+                pos = block_end
+
+
+# Line readers selectable with --reader
+READERS = {
+    'text': iter_text_lines,
+    'mmap': iter_mmap_lines,
+}
+
+
+def detect_compression(log_file_path):
+    """Name of the compression a file uses, judged by its magic bytes, or None"""
+    with open(log_file_path, 'rb') as f:
+        head = f.read(6)
+    return compression_of(head)
+
+
+def compression_of(head):
+    """Name of the compression whose magic bytes the data starts with, or None"""
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def iter_gzip_blocks(log_file_path, block_size=DECOMPRESS_BLOCK_SIZE):
+    """Yield the decompressed bytes of every member of a gzip file
+
+    zlib is fed large blocks directly, which is much cheaper than reading
+    through gzip.GzipFile and its small, Python-level reads.
+    """
+    with open(log_file_path, 'rb') as f:
+        decompressor = zlib.decompressobj(wbits=31)
+        started = False
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            while data:
+                started = True
+                block = decompressor.decompress(data)
+                if block:
+                    yield block
+                if not decompressor.eof:
+                    break
+                # The next member starts right after this one; trailing zeros are padding
+                data = decompressor.unused_data
+                if not data.strip(b'\x00'):
+                    started = False
+                    break
+                decompressor = zlib.decompressobj(wbits=31)
+                started = False
+        if started and not decompressor.eof:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+
+
+def open_decompressed(log_file_path, compression):
+    """Open a compressed file, given by path or as a binary file object, as a stream of its decompressed bytes
+
+    A file object is left open when the stream is closed.
+    """
+    if compression == 'gzip':
+        return gzip.open(log_file_path, 'rb')
+    if compression == 'bz2':
+        return bz2.open(log_file_path, 'rb')
+    if compression == 'xz':
+        return lzma.open(log_file_path, 'rb')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard is required to read .zst logs: pip install zstandard") from None
+        is_path = isinstance(log_file_path, (str, os.PathLike))
+        source = open(log_file_path, 'rb') if is_path else log_file_path
+        # Rotated logs may hold several concatenated frames
+        return zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True, closefd=is_path)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def iter_decompressed_blocks(log_file_path, compression, block_size=DECOMPRESS_BLOCK_SIZE):
+    """Yield a compressed file's contents as blocks of decompressed bytes"""
+    if compression == 'gzip':
+        yield from iter_gzip_blocks(log_file_path, block_size)
+        return
+    with open_decompressed(log_file_path, compression) as stream:
+        yield from iter(lambda: stream.read(block_size), b'')
+
+
+class PrefetchReader(io.RawIOBase):
+    """Raw binary stream over blocks produced ahead of time on a background thread
+
+    zlib, bz2 and lzma release the GIL while they inflate, so decompressing the
+    next blocks overlaps with parsing the current one. At most depth blocks
+    are held in memory.
+    """
+
+    def __init__(self, blocks, depth=PREFETCH_BLOCKS):
+        super().__init__()
+        self._source = blocks
+        self._blocks = queue.Queue(maxsize=depth)
+        self._stopping = threading.Event()
+        self._pending = memoryview(b'')
+        self._eof = False
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        # Give up once the reader is closed instead of blocking on a full queue forever
+        while not self._stopping.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self):
+        try:
+            for block in self._source:
+                if not self._put(block):
+                    return
+            self._put(b'')
+        except Exception as e:
+            # Re-raised in the reading thread
+            self._put(e)
+        finally:
+            self._source.close()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._pending:
+            if self._eof:
+                return 0
+            block = self._blocks.get()
+            if isinstance(block, Exception):
+                self._eof = True
+                raise block
+            if not block:
+                self._eof = True
+                return 0
+            self._pending = memoryview(block)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stopping.set()
+            self._thread.join()
+        super().close()
+
+
+def iter_compressed_lines(log_file_path, compression=None):
+    """Read lines from a gzip/bz2/xz/zstd file, decompressing ahead on a background thread"""
+    compression = compression or detect_compression(log_file_path)
+    raw = PrefetchReader(iter_decompressed_blocks(log_file_path, compression))
+    with io.TextIOWrapper(io.BufferedReader(raw, DECOMPRESS_BLOCK_SIZE), encoding='utf-8', errors='ignore') as f:
+        yield from f
+
+
+def read_log_lines(log_file_path, reader='text'):
+    """Lines of a log file with the chosen reader, or decompressed on the fly if it is compressed"""
+    compression = detect_compression(log_file_path)
+    if compression is not None:
+        return iter_compressed_lines(log_file_path, compression)
+    return READERS[reader](log_file_path)
+
+
+def log_file_stem(log_file_path):
+    """Output name of a log file: access.log -> access, access.log.2.gz -> access.2"""
+    name = Path(log_file_path).name
+    for suffix in COMPRESSED_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    stem, log_suffix, rotation = name.rpartition('.log')
+    if not log_suffix:
+        return Path(name).stem
+    return stem + rotation
+
+
+def split_into_chunks(log_file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Split a file into (start, end) byte ranges that each end on a newline
+
+    Compressed files can't be entered mid-stream; they become a single
+    (0, None) chunk that is read whole.
+    """
+    if detect_compression(log_file_path) is not None:
+        return [(0, None)]
+    file_size = os.path.getsize(log_file_path)
+    chunks = []
+    start = 0
+    with open(log_file_path, 'rb') as f:
+        while start < file_size:
+            end = start + chunk_size
+            if end >= file_size:
+                end = file_size
+            else:
+                # Extend the chunk to the end of the line it stops in
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            chunks.append((start, end))
+            start = end
+    # An empty file still gets one (empty) chunk so it shows up in the output
+    return chunks or [(0, 0)]
+
+
+# Parser instance owned by each worker process of the parallel mode
+_worker_parser = None
+
+
+def _init_worker(parser_class, config):
+    global _worker_parser
+    _worker_parser = parser_class(**config)
+    # Each worker times its own lines for as long as it lives and hands quarantined ones to the parent
+    if _worker_parser.watchdog is not None:
+        _worker_parser.watchdog.arm()
+    _worker_parser.quarantine.path = None
+
+
+def _parse_chunk(task):
+    log_file_path, start, end = task
+    records, line_count = _worker_parser.parse_chunk(log_file_path, start, end)
+    # Hand this chunk's stats to the parent and start afresh for the next one
+    stats = _worker_parser.stats
+    if stats is not None:
+        _worker_parser.stats = ParseStats()
+    detector = _worker_parser.detector
+    detections = None
+    if detector is not None:
+        detections = detector.counters()
+        _worker_parser.detector = AdaptiveDetector(_worker_parser.registry, detector.max_guesses)
+    record_filter = _worker_parser.record_filter
+    filtered = None
+    if record_filter is not None:
+        filtered = record_filter.counters()
+        record_filter.prefiltered = record_filter.rejected = 0
+    return records, line_count, stats, detections, _worker_parser.quarantine.take_entries(), filtered
+
+
+class LogParser:
+    def __init__(self, log_folder="log", regex_file="regex.json", output_folder="oplogs",
+                 streaming=False, batch_size=DEFAULT_BATCH_SIZE, workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 incremental=False, output_format="csv", reader="text", profile=False, stats_file=None,
+                 adaptive=False, max_guesses=2, output_compression=None, compression_level=None,
+                 rollover_rows=None, rollover_bytes=None, cache=False, match_timeout=None,
+                 quarantine_file=None, fields=None, filter_expression=None):
+        self.log_folder = log_folder
+        self.regex_file = regex_file
+        self.output_folder = output_folder
+        self.streaming = streaming
+        self.batch_size = batch_size
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.incremental = incremental
+        self.output_format = output_format
+        self.reader = reader
+        # Instrumentation is opt-in; with stats left at None the parse loop isn't timed at all
+        self.stats = ParseStats() if profile or stats_file else None
+        self.stats_file = stats_file
+        self.writer_class = get_writer(output_format)
+        if incremental and not self.writer_class.supports_append:
+            raise ValueError(f"Incremental mode needs an appendable output format, not {output_format}")
+        if output_compression is not None and not self.writer_class.compressible:
+            raise ValueError(f"{output_format} output is compressed internally; --output-compression is for csv/jsonl")
+        self.output_compression = output_compression
+        self.compression_level = compression_level
+        self.rollover_rows = rollover_rows
+        self.rollover_bytes = rollover_bytes
+        if incremental and self.rolls_over:
+            raise ValueError("Incremental mode appends to one output file per log and can't roll over")
+        if incremental and cache:
+            raise ValueError("Incremental mode keeps its own checkpoints; use either it or the cache")
+        self.cache = cache
+        # Projection: the only fields records carry and outputs have (None keeps everything)
+        self.fields = list(fields) if fields else None
+        self._keep = frozenset(self.fields) if self.fields else None
+        if self.fields is not None and self.writer_class.splits_log_types and 'log_type' not in self._keep:
+            raise ValueError(f"{output_format} output keeps a table per log type and needs log_type in the fields")
+        # Only lines the expression accepts become records; compiled once, raises ValueError if invalid
+        self.record_filter = RecordFilter(filter_expression) if filter_expression else None
+        keep_groups = self._keep
+        if keep_groups is not None and self.record_filter is not None:
+            # The filter reads its fields from the match even where the output leaves them out
+            keep_groups = keep_groups | self.record_filter.fields
+        self.registry = PatternRegistry(regex_file, keep_groups)
+        # Opt-in detection shortcut: try recently matched types' patterns first
+        self.detector = AdaptiveDetector(self.registry, max_guesses) if adaptive else None
+        # Per-line match budget; None or 0 leaves matching unbounded
+        self.match_timeout = match_timeout
+        # Opt-in as well: the watchdog installs a process-wide SIGALRM handler while parsing
+        self.watchdog = MatchWatchdog(match_timeout) if match_timeout else None
+        self.quarantine = Quarantine(quarantine_file)
+
+        # Create output folder if it doesn't exist
+        Path(self.output_folder).mkdir(parents=True, exist_ok=True)
+        if quarantine_file is None:
+            self.quarantine.path = os.path.join(self.output_folder, QUARANTINE_FILE)
+
+    @property
+    def rolls_over(self):
+        return bool(self.rollover_rows or self.rollover_bytes)
+
+    def load_regex_patterns(self):
+        """Load regex patterns from JSON file"""
+        self.registry.refresh()
+        return dict(self.registry.patterns)
+
     def detect_log_type(self, line):
         """Detect log source and type based on line content"""
-        line_lower = line.lower()
-
         # Apache access log detection
         if ' - - [' in line and '"GET ' in line or '"POST ' in line:
             return "apache_access"
@@ -49,89 +925,389 @@ class LogParser:
             return "nginx_access"
 
         # Syslog detection (month day time hostname)
-        elif re.match(r'^\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}', line):
+        elif SYSLOG_PREFIX.match(line):
             return "syslog"
 
         # Firewall log detection (YYYY-MM-DD HH:MM:SS format)
-        elif re.match(r'^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}', line):
+        elif FIREWALL_PREFIX.match(line):
             return "firewall"
 
         # Default fallback
         return "unknown"
 
     def parse_log_line(self, line, regex_pattern):
-        """Parse a single log line using the provided regex pattern"""
+        """Parse a single log line using the provided regex pattern (string or compiled)"""
+        return self._parse_stripped_line(line.strip(), regex_pattern)
+
+    def _parse_stripped_line(self, line, regex_pattern):
         try:
-            match = re.match(regex_pattern, line.strip())
+            if isinstance(regex_pattern, str):
+                regex_pattern = re.compile(regex_pattern)
+            match = regex_pattern.match(line)
             if match:
-                groups = match.groupdict()
-                # Extract required fields, set defaults if not found
-                result = {
-                    'ip': groups.get('ip', 'N/A'),
-                    'timestamp': groups.get('timestamp', 'N/A'), 
-                    'message': groups.get('message', line.strip())
-                }
-                # Add any additional fields that were captured
-                for key, value in groups.items():
-                    if key not in result:
-                        result[key] = value
-                return result
+                return self._record_from_match(match, line)
+        except MatchTimeout:
+            raise
         except Exception as e:
             print(f"Error parsing line with regex: {e}")
 
         return None
 
-    def parse_log_file(self, log_file_path):
-        """Parse a single log file"""
-        regex_patterns = self.load_regex_patterns()
-        parsed_logs = []
+    def _record_from_match(self, match, line):
+        groups = match.groupdict()
+        if self._keep is not None:
+            return self._projected_record(groups, line)
+        # Extract required fields, set defaults if not found
+        result = {
+            'ip': groups.get('ip', 'N/A'),
+            'timestamp': groups.get('timestamp', 'N/A'), 
+            'message': groups.get('message', line)
+        }
+        # Add any additional fields that were captured
+        for key, value in groups.items():
+            if key not in result:
+                result[key] = value
+        return result
+
+    def _projected_record(self, groups, line):
+        """_record_from_match() for a projection; groups only holds kept fields, bar backreferenced ones"""
+        keep = self._keep
+        result = {key: value for key, value in groups.items() if key in keep}
+        for field, default in (('ip', 'N/A'), ('timestamp', 'N/A'), ('message', line)):
+            if field in keep and field not in groups:
+                result[field] = default
+        return result
+
+    def _add_line_fields(self, record, line_num, log_type, line):
+        """Set the fields the parser adds itself, as far as the projection keeps them"""
+        keep = self._keep
+        if 'line_number' in keep:
+            record['line_number'] = line_num
+        if 'log_type' in keep:
+            record['log_type'] = log_type
+        if 'raw_line' in keep:
+            record['raw_line'] = line
+
+    def _emits(self, field):
+        return self._keep is None or field in self._keep
+
+    def parse_line(self, line, line_num):
+        """Turn one non-empty, already stripped log line into a record dict, or None if the filter drops it"""
+        if self.record_filter is not None and not self.record_filter.prefilter(line):
+            return None
+        if self.detector is not None:
+            guessed = self._parse_guessed(line, line_num)
+            if guessed is not None:
+                return guessed[1]
+
+        # Detect log type
+        log_type = self.detect_log_type(line)
+        record, outcome = self._build_record(line, line_num, log_type)
+        if self.detector is not None:
+            self.detector.record(log_type, outcome)
+        return record
+
+    def _parse_guessed(self, line, line_num):
+        """Try the adaptive detector's candidates; returns (log_type, record) or None
+
+        record is None when the guess matched but the filter drops the line.
+        """
+        log_type, match = self.detector.guess(line, self.detect_log_type)
+        if match is None:
+            return None
+        if self.record_filter is not None and not self.record_filter.accepts(log_type, match.re, match, line, line_num):
+            return log_type, None
+        record = self._record_from_match(match, line)
+        if self._keep is None:
+            record['line_number'] = line_num
+            record['log_type'] = log_type
+            record['raw_line'] = line
+        else:
+            self._add_line_fields(record, line_num, log_type, line)
+        return log_type, record
+
+    def _build_record(self, line, line_num, log_type):
+        """Parse a line of a known log type; returns the record and 'matched', 'fallback' or 'unknown'
+
+        With a filter, lines it drops come back as (None, 'filtered').
+        """
+        # Get corresponding regex pattern
+        regex_pattern = self.registry.get(log_type)
+        record_filter = self.record_filter
+        if record_filter is not None and not record_filter.allows_type(log_type):
+            # Nothing of this type can pass, so it isn't matched at all
+            return None, 'filtered'
+
+        if regex_pattern:
+            try:
+                if record_filter is None:
+                    parsed_data = self._parse_stripped_line(line, regex_pattern)
+                else:
+                    # The expression runs on the match itself, before a record dict is built
+                    match = regex_pattern.match(line)
+                    if not record_filter.accepts(log_type, regex_pattern, match, line, line_num):
+                        return None, 'filtered'
+                    parsed_data = self._record_from_match(match, line) if match else None
+            except MatchTimeout:
+                raise MatchTimeout(log_type) from None
+            if parsed_data:
+                if self._keep is None:
+                    parsed_data['line_number'] = line_num
+                    parsed_data['log_type'] = log_type
+                    parsed_data['raw_line'] = line
+                else:
+                    self._add_line_fields(parsed_data, line_num, log_type, line)
+                return parsed_data, 'matched'
+            # If parsing failed, create a basic entry
+            outcome = 'fallback'
+        else:
+            if record_filter is not None and not record_filter.accepts(log_type, None, None, line, line_num):
+                return None, 'filtered'
+            print(f"No regex pattern found for log type: {log_type}")
+            # Create basic entry for unknown log types
+            outcome = 'unknown'
+        record = {
+            'line_number': line_num,
+            'log_type': log_type,
+            'ip': 'N/A',
+            'timestamp': 'N/A',
+            'message': line,
+            'raw_line': line
+        }
+        if self._keep is not None:
+            record = {key: value for key, value in record.items() if key in self._keep}
+        return record, outcome
+
+    def parse_lines(self, lines, start_line=1):
+        """Yield a record for every non-empty line, numbering lines from start_line"""
+        if self.stats is not None:
+            yield from self._parse_lines_profiled(lines, start_line)
+            return
+        watchdog = self.watchdog
+        if watchdog is not None and watchdog.armed:
+            yield from self._parse_lines_guarded(lines, start_line)
+            return
+
+        parse_line = self.parse_line
+        for line_num, line in enumerate(lines, start_line):
+            # Each line is stripped exactly once; everything downstream reuses it
+            line = line.strip()
+            if line:  # Skip empty lines
+                record = parse_line(line, line_num)
+                if record is not None:
+                    yield record
+
+    def _parse_lines_guarded(self, lines, start_line):
+        """parse_lines() with every line under the watchdog; lines past the budget are quarantined"""
+        watchdog = self.watchdog
+        parse_line = self.parse_line
+        for line_num, line in enumerate(lines, start_line):
+            line = line.strip()
+            if not line:
+                continue
+            watchdog.current = line_num
+            try:
+                record = parse_line(line, line_num)
+            except MatchTimeout as timeout:
+                self.quarantine.add(line_num, timeout.log_type, line)
+                continue
+            finally:
+                # Whatever parse_line raised, a later tick must not take the next code for this line
+                watchdog.current = None
+            if record is not None:
+                yield record
+
+    def _parse_lines_profiled(self, lines, start_line):
+        """parse_lines() with every stage timed and every line counted"""
+        stats = self.stats
+        watchdog = self.watchdog if self.watchdog is not None and self.watchdog.armed else None
+        clock = time.perf_counter_ns
+        iterator = iter(lines)
+        line_num = start_line - 1
+        while True:
+            started = clock()
+            line = next(iterator, None)
+            stats.add_stage('read', clock() - started)
+            if line is None:
+                break
+            line_num += 1
+            stats.lines_read += 1
+            line = line.strip()
+            if not line:
+                stats.empty_lines += 1
+                continue
+            if self.record_filter is not None and not self.record_filter.prefilter(line):
+                continue
+
+            started = clock()
+            if watchdog is not None:
+                watchdog.current = line_num
+            guessed = None
+            try:
+                if self.detector is not None:
+                    guessed = self._parse_guessed(line, line_num)
+                if guessed is None:
+                    log_type = self.detect_log_type(line)
+                    detected = clock()
+                    record, outcome = self._build_record(line, line_num, log_type)
+            except MatchTimeout as timeout:
+                self.quarantine.add(line_num, timeout.log_type, line)
+                stats.add_line(timeout.log_type or 'unknown', 'quarantined', 0, clock() - started)
+                continue
+            finally:
+                if watchdog is not None:
+                    watchdog.current = None
+            if guessed is not None:
+                # Detection and parsing were the same regex scan
+                stats.add_line(guessed[0], 'matched' if guessed[1] is not None else 'filtered', clock() - started, 0)
+                if guessed[1] is not None:
+                    yield guessed[1]
+                continue
+            if self.detector is not None:
+                self.detector.record(log_type, outcome)
+            stats.add_line(log_type, outcome, detected - started, clock() - detected)
+            if record is not None:
+                yield record
+
+    def iter_log_file(self, log_file_path):
+        """Parse a single log file lazily, yielding one record at a time"""
+        # Only re-reads the regex file when it changed since the previous file
+        self.registry.refresh()
 
         print(f"Processing {log_file_path}")
+        if self.detector is not None:
+            self.detector.reset()
+        self.quarantine.source = log_file_path
 
         try:
-            with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line_num, line in enumerate(f, 1):
-                    if line.strip():  # Skip empty lines
-                        # Detect log type
-                        log_type = self.detect_log_type(line)
-
-                        # Get corresponding regex pattern
-                        regex_pattern = regex_patterns.get(log_type)
-
-                        if regex_pattern:
-                            parsed_data = self.parse_log_line(line, regex_pattern)
-                            if parsed_data:
-                                parsed_data['line_number'] = line_num
-                                parsed_data['log_type'] = log_type
-                                parsed_data['raw_line'] = line.strip()
-                                parsed_logs.append(parsed_data)
-                            else:
-                                # If parsing failed, create a basic entry
-                                parsed_logs.append({
-                                    'line_number': line_num,
-                                    'log_type': log_type,
-                                    'ip': 'N/A',
-                                    'timestamp': 'N/A',
-                                    'message': line.strip(),
-                                    'raw_line': line.strip()
-                                })
-                        else:
-                            print(f"No regex pattern found for log type: {log_type}")
-                            # Create basic entry for unknown log types
-                            parsed_logs.append({
-                                'line_number': line_num,
-                                'log_type': log_type,
-                                'ip': 'N/A',
-                                'timestamp': 'N/A',
-                                'message': line.strip(),
-                                'raw_line': line.strip()
-                            })
-
+            yield from self.parse_lines(read_log_lines(log_file_path, self.reader))
         except Exception as e:
             print(f"Error reading file {log_file_path}: {e}")
-            return []
 
-        return parsed_logs
+    def parse_log_file(self, log_file_path):
+        """Parse a single log file"""
+        return list(self.iter_log_file(log_file_path))
+
+    def parse_chunk(self, log_file_path, start, end):
+        """Parse the lines in a byte range of a file
+
+        Returns the records, numbered from 1 within the chunk, and the number of
+        lines the chunk contained so the caller can shift them to file line numbers.
+        """
+        self.registry.refresh()
+        if self.detector is not None:
+            self.detector.reset()
+        self.quarantine.source = log_file_path
+        if end is None:
+            lines = list(read_log_lines(log_file_path, 'mmap'))
+        else:
+            lines = list(iter_mmap_lines(log_file_path, start, end))
+        return list(self.parse_lines(lines)), len(lines)
+
+    def iter_new_lines(self, log_file_path, progress):
+        """Yield complete lines written after progress['offset'], advancing progress as they are read
+
+        A trailing line without a newline is still being written and is left for the next run.
+        """
+        with open(log_file_path, 'rb') as f:
+            f.seek(progress['offset'])
+            for raw in iter(f.readline, b''):
+                if not raw.endswith(b'\n'):
+                    break
+                progress['offset'] += len(raw)
+                # Split on carriage returns too, numbering lines like the other readers
+                lines = split_lines(raw.decode('utf-8', errors='ignore'))[:-1]
+                progress['line_number'] += len(lines)
+                yield from lines
+
+    @staticmethod
+    def iter_compressed_file(log_file_path, progress):
+        """Yield every line of a compressed file, which is only ever parsed whole
+
+        progress ends at the compressed size once the file was read to the end.
+        """
+        for line in iter_compressed_lines(log_file_path):
+            progress['line_number'] += 1
+            yield line
+        progress['offset'] = os.path.getsize(log_file_path)
+
+    def _worker_config(self):
+        """Constructor arguments for the parsers living in worker processes"""
+        return {
+            'log_folder': self.log_folder,
+            'regex_file': self.regex_file,
+            'output_folder': self.output_folder,
+            'reader': self.reader,
+            'profile': self.stats is not None,
+            'adaptive': self.detector is not None,
+            'max_guesses': self.detector.max_guesses if self.detector is not None else 2,
+            'match_timeout': self.match_timeout,
+            'fields': self.fields,
+            'filter_expression': self.record_filter.expression if self.record_filter is not None else None,
+        }
+
+    def _iter_parallel_chunks(self, log_files):
+        """Parse files in worker processes, yielding (path, records) per chunk in file order"""
+        tasks = iter([
+            (log_file_path, start, end)
+            for log_file_path in log_files
+            for start, end in split_into_chunks(log_file_path, self.chunk_size)
+        ])
+        line_offsets = {}
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(type(self), self._worker_config())) as executor:
+            # Keep a bounded window of chunks in flight and consume them in submission order
+            pending = deque(
+                (task, executor.submit(_parse_chunk, task))
+                for task in itertools.islice(tasks, self.workers * 2)
+            )
+            while pending:
+                task, future = pending.popleft()
+                next_task = next(tasks, None)
+                if next_task is not None:
+                    pending.append((next_task, executor.submit(_parse_chunk, next_task)))
+
+                log_file_path = task[0]
+                try:
+                    records, line_count, chunk_stats, chunk_detections, quarantined, filtered = future.result()
+                except Exception as e:
+                    print(f"Error reading file {log_file_path}: {e}")
+                    records, line_count, chunk_stats, chunk_detections, filtered = [], 0, None, None, None
+                    quarantined = []
+                if chunk_stats is not None:
+                    self.stats.merge(chunk_stats)
+                if chunk_detections is not None:
+                    self.detector.merge(chunk_detections)
+                if filtered is not None:
+                    self.record_filter.merge(filtered)
+
+                # Shift chunk-local line numbers to file line numbers
+                offset = line_offsets.get(log_file_path, 0)
+                if offset and self._emits('line_number'):
+                    for record in records:
+                        record['line_number'] += offset
+                for entry in quarantined:
+                    self.quarantine.add(entry['line_number'] + offset, entry['pattern'], entry['line'], entry['file'])
+                line_offsets[log_file_path] = offset + line_count
+                yield log_file_path, records
+
+    def schema_fieldnames(self):
+        """CSV header covering every field any loaded pattern can produce"""
+        self.registry.refresh()
+        # Fallback entries carry the required fields and the raw line
+        fieldnames = set(REQUIRED_FIELDS) | {'raw_line'}
+        for log_type in self.registry.compiled:
+            fieldnames.update(self.registry.group_names(log_type))
+        return order_fieldnames(field for field in fieldnames if self._emits(field))
+
+    def log_type_fieldnames(self):
+        """Fields each loaded pattern's records can have, for writers that keep log types apart"""
+        self.registry.refresh()
+        base = set(REQUIRED_FIELDS) | {'raw_line'}
+        return {log_type: order_fieldnames(field for field in base | set(self.registry.group_names(log_type))
+                                           if self._emits(field))
+                for log_type in self.registry.compiled}
 
     def save_to_csv(self, parsed_logs, output_file):
         """Save parsed logs to CSV file"""
@@ -143,17 +1319,7 @@ class LogParser:
         fieldnames = set()
         for log in parsed_logs:
             fieldnames.update(log.keys())
-
-        # Ensure required fields come first
-        required_fields = ['line_number', 'log_type', 'ip', 'timestamp', 'message']
-        ordered_fieldnames = []
-        for field in required_fields:
-            if field in fieldnames:
-                ordered_fieldnames.append(field)
-                fieldnames.remove(field)
-
-        # Add remaining fields
-        ordered_fieldnames.extend(sorted(fieldnames))
+        ordered_fieldnames = order_fieldnames(fieldnames)
 
         try:
             with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
@@ -164,28 +1330,441 @@ class LogParser:
         except Exception as e:
             print(f"Error saving CSV file {output_file}: {e}")
 
+    def stream_to_output(self, records, output_file, fieldnames=None):
+        """Write records as they are produced, holding at most one batch in memory"""
+        if fieldnames is None:
+            fieldnames = self.schema_fieldnames()
+        writer = self._make_writer(output_file, fieldnames)
+        try:
+            with writer:
+                writer.write_many(records)
+        except Exception as e:
+            print(f"Error saving {self.output_format} file {output_file}: {e}")
+            return
+
+        if writer.rows_written:
+            if isinstance(writer, RollingWriter):
+                print(f"Saved {writer.rows_written} parsed log entries to {len(writer.parts)} parts of {output_file}")
+            else:
+                print(f"Saved {writer.rows_written} parsed log entries to {output_file}")
+        else:
+            print(f"No data to save for {output_file}")
+
+    def _make_writer(self, output_file, fieldnames, append=False):
+        """Create an output writer, timing its batch writes when profiling"""
+        options = {}
+        if self.output_compression is not None:
+            options = {'compression': self.output_compression, 'compression_level': self.compression_level}
+        if self.writer_class.splits_log_types:
+            options['table_fields'] = self.log_type_fieldnames()
+        if self.rolls_over:
+            writer = RollingWriter(self.writer_class, output_file, fieldnames, batch_size=self.batch_size,
+                                   max_rows=self.rollover_rows, max_bytes=self.rollover_bytes, **options)
+        else:
+            writer = self.writer_class(output_file, fieldnames, batch_size=self.batch_size, append=append, **options)
+        if self.stats is not None:
+            writer.write_batch = self._timed_write(writer.write_batch)
+        return writer
+
+    def _timed_write(self, write):
+        def timed(*args, **kwargs):
+            started = time.perf_counter_ns()
+            try:
+                return write(*args, **kwargs)
+            finally:
+                self.stats.add_stage('write', time.perf_counter_ns() - started)
+        return timed
+
     def process_all_logs(self):
-        """Process all .log files in the log folder"""
-        log_files = glob.glob(os.path.join(self.log_folder, "*.log"))
+        """Process all .log files in the log folder, including rotated and compressed ones"""
+        log_files = [path for pattern in LOG_GLOBS for path in glob.glob(os.path.join(self.log_folder, pattern))]
 
         if not log_files:
             print(f"No .log files found in {self.log_folder} folder")
             return
 
+        with self.watchdog or nullcontext():
+            self._process_files(log_files)
+
+        if self.quarantine.counts:
+            print(self.quarantine.report(self.match_timeout))
+        if self.record_filter is not None:
+            print(self.record_filter.report())
+        if self.detector is not None:
+            print(self.detector.report())
+        if self.stats is not None:
+            print(self.stats.report())
+            if self.stats_file:
+                self.stats.save_json(self.stats_file)
+                print(f"Saved parse statistics to {self.stats_file}")
+
+    def _process_files(self, log_files):
+        if self.incremental:
+            self._process_incremental(log_files)
+            return
+
+        manifest = None
+        if self.cache:
+            manifest = self.load_cache_manifest()
+            self.registry.refresh()
+            log_files = [path for path in log_files if not self._is_cached(path, manifest.get(path))]
+        self.quarantine.discard(log_files)
+
+        if self.workers > 1:
+            # Workers start reading every file as soon as the first chunks are submitted, so
+            # fingerprint them all up front; a file that grows meanwhile is re-parsed next time
+            snapshots = {}
+            if manifest is not None:
+                snapshots = {path: self._file_snapshot(path) for path in log_files}
+            chunks = self._iter_parallel_chunks(log_files)
+            for log_file_path, file_chunks in itertools.groupby(chunks, key=lambda chunk: chunk[0]):
+                print(f"Processing {log_file_path}")
+                records = (record for _, chunk_records in file_chunks for record in chunk_records)
+                self._write_log_output(log_file_path, records, manifest, snapshots.get(log_file_path))
+            return
+
         for log_file_path in log_files:
-            # Get filename without extension
-            filename = Path(log_file_path).stem
-            output_file = os.path.join(self.output_folder, f"{filename}.csv")
+            snapshot = self._file_snapshot(log_file_path) if manifest is not None else None
+            self._write_log_output(log_file_path, self.iter_log_file(log_file_path), manifest, snapshot)
+
+    def _file_snapshot(self, log_file_path):
+        """Size, mtime and content hash of a file, taken before it is parsed"""
+        stat = os.stat(log_file_path)
+        return {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'content': self.file_fingerprint(log_file_path),
+        }
+
+    def _write_log_output(self, log_file_path, records, manifest=None, snapshot=None):
+        """Write one log file's records, recording it in the cache manifest when caching
+
+        snapshot is the file's _file_snapshot() from before parsing started.
+        """
+        output_file = self._output_path(log_file_path)
+        if manifest is None:
+            self._write_output(records, output_file)
+            return
+
+        log_types = set()
+        if not self._depends_on_every_pattern():
+            records = self._collect_log_types(records, log_types)
+        self._write_output(records, output_file)
+        # A quarantined line's pattern decides whether it ends up quarantined or parsed next time
+        log_types |= self.quarantine.log_types(log_file_path) - {None}
+        manifest[log_file_path] = {
+            **snapshot,
+            'patterns': self._pattern_hashes(log_types),
+            'settings': self._cache_settings(),
+            'output': output_file,
+        }
+        self.save_cache_manifest(manifest)
+
+    @staticmethod
+    def _collect_log_types(records, log_types):
+        for record in records:
+            log_types.add(record['log_type'])
+            yield record
+
+    def _cache_manifest_path(self):
+        return os.path.join(self.output_folder, CACHE_MANIFEST_FILE)
+
+    def load_cache_manifest(self):
+        """Load the cache manifest, keyed by log file path"""
+        try:
+            with open(self._cache_manifest_path(), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print(f"Error decoding {self._cache_manifest_path()}. Re-parsing all files.")
+            return {}
+
+    def save_cache_manifest(self, manifest):
+        """Atomically write the cache manifest"""
+        write_json_atomic(self._cache_manifest_path(), manifest)
+
+    @staticmethod
+    def file_fingerprint(log_file_path):
+        """Hash of a file's full contents"""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(log_file_path, 'rb') as f:
+            for block in iter(lambda: f.read(DECOMPRESS_BLOCK_SIZE), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _depends_on_every_pattern(self):
+        """Whether a file's output can depend on patterns its records don't name as their log type
+
+        Adaptive detection tries every pattern, so any of them can change the
+        result; records projected without log_type don't tell which patterns
+        parsed them; and lines a filter drops leave no record at all, although
+        a changed pattern could let them through.
+        """
+        return self.detector is not None or not self._emits('log_type') or self.record_filter is not None
+
+    def _pattern_hashes(self, log_types):
+        """Hashes of the patterns a file's output depends on, by log type"""
+        self.registry.refresh()
+        if self._depends_on_every_pattern():
+            log_types = set(log_types) | set(self.registry.patterns)
+        return {log_type: self.registry.pattern_hash(log_type) for log_type in sorted(log_types)}
+
+    def _cache_settings(self):
+        """Options that change what the output of an unchanged file looks like"""
+        settings = {
+            'output_format': self.output_format,
+            'output_compression': self.output_compression,
+            'compression_level': self.compression_level,
+            'rollover_rows': self.rollover_rows,
+            'rollover_bytes': self.rollover_bytes,
+            'streaming': self.streaming,
+            'adaptive': self.detector is not None,
+            'fields': self.fields,
+            'filter': self.record_filter.expression if self.record_filter is not None else None,
+        }
+        if self.streaming:
+            # The streamed header lists the groups of every pattern
+            settings['fieldnames'] = self.schema_fieldnames()
+        return settings
+
+    def _output_exists(self, output_file):
+        if not self.rolls_over:
+            return os.path.exists(output_file)
+        extension = output_extension(self.writer_class, self.output_compression)
+        return os.path.exists(f"{output_file[:-len(extension) - 1]}.part-0001.{extension}")
+
+    def _is_cached(self, log_file_path, entry):
+        """Whether a file's output is still what parsing it now would produce"""
+        if not entry or not self._output_exists(entry['output']) or entry['settings'] != self._cache_settings():
+            return False
+        stat = os.stat(log_file_path)
+        if stat.st_size != entry['size']:
+            return False
+        # Same size and mtime: trust the stored hash instead of re-reading the file
+        if stat.st_mtime_ns != entry['mtime_ns'] and self.file_fingerprint(log_file_path) != entry['content']:
+            return False
+        changed = [log_type for log_type, pattern_hash in entry['patterns'].items()
+                   if self.registry.pattern_hash(log_type) != pattern_hash]
+        if changed:
+            print(f"Re-parsing {log_file_path}: pattern(s) changed for {', '.join(changed)}")
+            return False
+        if self._depends_on_every_pattern() and set(self.registry.patterns) - set(entry['patterns']):
+            return False
+        print(f"Skipping {log_file_path}: unchanged since the last run")
+        return True
+
+    def _checkpoint_path(self):
+        return os.path.join(self.output_folder, CHECKPOINT_FILE)
+
+    def load_checkpoints(self):
+        """Load the incremental-mode checkpoints, keyed by log file path"""
+        try:
+            with open(self._checkpoint_path(), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print(f"Error decoding {self._checkpoint_path()}. Re-parsing all files.")
+            return {}
+
+    def save_checkpoints(self, checkpoints):
+        """Atomically write the incremental-mode checkpoints"""
+        write_json_atomic(self._checkpoint_path(), checkpoints)
+
+    @staticmethod
+    def _head_fingerprint(log_file_path, length):
+        with open(log_file_path, 'rb') as f:
+            return hashlib.sha1(f.read(length)).hexdigest()
+
+    def _can_resume(self, log_file_path, checkpoint, stat, fieldnames, output_file):
+        """Check that a checkpoint still describes the same, only appended-to file"""
+        if not checkpoint or not os.path.exists(output_file):
+            return False
+        # A new inode means the file was rotated, a smaller size that it was truncated
+        if checkpoint.get('inode') != stat.st_ino or stat.st_size < checkpoint.get('offset', 0):
+            return False
+        # Compressed files can't be resumed mid-stream, only skipped when unchanged
+        if checkpoint.get('compressed') and stat.st_size != checkpoint['offset']:
+            return False
+        # Appending rows under a different header would misalign the columns
+        if checkpoint.get('fieldnames') != fieldnames:
+            return False
+        head_length = min(checkpoint['offset'], HEAD_FINGERPRINT_BYTES)
+        return checkpoint.get('head') == self._head_fingerprint(log_file_path, head_length)
+
+    def _process_incremental(self, log_files):
+        """Parse only what was appended to each file since the last run"""
+        checkpoints = self.load_checkpoints()
+        fieldnames = self.schema_fieldnames()
+
+        for log_file_path in log_files:
+            if self.process_new_data(log_file_path, checkpoints, fieldnames):
+                self.save_checkpoints(checkpoints)
+
+    def process_new_data(self, log_file_path, checkpoints, fieldnames):
+        """Append what was added to one file since its checkpoint to its output
+
+        Rotated or truncated files are re-parsed from the start. Returns True
+        when checkpoints was updated and should be saved.
+        """
+        output_file = self._output_path(log_file_path)
+        stat = os.stat(log_file_path)
+        checkpoint = checkpoints.get(log_file_path)
+
+        if self._can_resume(log_file_path, checkpoint, stat, fieldnames, output_file):
+            if stat.st_size == checkpoint['offset']:
+                print(f"No new data in {log_file_path}")
+                return False
+            progress = {'offset': checkpoint['offset'], 'line_number': checkpoint['line_number']}
+            print(f"Resuming {log_file_path} at byte {progress['offset']}")
+            append = True
+        else:
+            if checkpoint:
+                print(f"{log_file_path} was rotated or truncated, re-parsing from the start")
+            progress = {'offset': 0, 'line_number': 0}
+            print(f"Processing {log_file_path}")
+            append = False
+            # Drop output from before the rotation even if the new file has no complete lines yet
+            if os.path.exists(output_file):
+                os.remove(output_file)
+
+        if self.detector is not None:
+            self.detector.reset()
+        self.quarantine.source = log_file_path
+        compressed = detect_compression(log_file_path) is not None
+        if compressed:
+            lines = self.iter_compressed_file(log_file_path, progress)
+        else:
+            lines = self.iter_new_lines(log_file_path, progress)
+        records = self.parse_lines(lines, progress['line_number'] + 1)
+        writer = self._make_writer(output_file, fieldnames, append=append)
+        try:
+            with writer:
+                writer.write_many(records)
+        except Exception as e:
+            print(f"Error processing {log_file_path}: {e}")
+            return False
+        print(f"Saved {writer.rows_written} new parsed log entries to {output_file}")
+
+        checkpoints[log_file_path] = {
+            'inode': stat.st_ino,
+            'size': stat.st_size,
+            'offset': progress['offset'],
+            'line_number': progress['line_number'],
+            'head': self._head_fingerprint(log_file_path, min(progress['offset'], HEAD_FINGERPRINT_BYTES)),
+            'fieldnames': fieldnames,
+            'compressed': compressed,
+        }
+        return True
+
+    def _output_path(self, log_file_path):
+        # Get filename without the .log and compression extensions
+        filename = log_file_stem(log_file_path)
+        extension = output_extension(self.writer_class, self.output_compression)
+        return os.path.join(self.output_folder, f"{filename}.{extension}")
+
+    def _write_output(self, records, output_file):
+        """Write one file's records with the configured output mode"""
+        if self.streaming:
+            # Parse and write incrementally
+            self.stream_to_output(records, output_file)
+        elif self.output_format == "csv" and self.output_compression is None and not self.rolls_over:
+            parsed_logs = list(records)
+            if self.stats is None:
+                self.save_to_csv(parsed_logs, output_file)
+            else:
+                self._timed_write(self.save_to_csv)(parsed_logs, output_file)
+        else:
+            parsed_logs = list(records)
+            if not parsed_logs:
+                print(f"No data to save for {output_file}")
+                return
+            # Same columns save_to_csv would pick for this file
+            fieldnames = order_fieldnames(set().union(*parsed_logs))
+            self.stream_to_output(parsed_logs, output_file, fieldnames)
+
 
-            # Parse the log file
-            parsed_logs = self.parse_log_file(log_file_path)
+def build_arg_parser():
+    """Command line options for the batch parser"""
+    arg_parser = argparse.ArgumentParser(description="Parse .log files into CSV using regex.json patterns")
+    arg_parser.add_argument("--log-folder", default="log", help="Folder containing .log files")
+    arg_parser.add_argument("--regex-file", default="regex.json", help="JSON file with regex patterns")
+    arg_parser.add_argument("--output-folder", default="oplogs", help="Folder for parsed output")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="Stream records to the output instead of building them in memory")
+    arg_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Rows buffered per write in streaming mode")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="Worker processes for parallel parsing (1 = serial)")
+    arg_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                            help="Bytes per chunk when splitting large files across workers")
+    arg_parser.add_argument("--incremental", action="store_true",
+                            help="Only parse lines appended since the last run and append them to the output")
+    arg_parser.add_argument("--output-format", choices=sorted(WRITERS), default="csv",
+                            help="Output file format (parquet/arrow need pyarrow; sqlite has a table per log type)")
+    arg_parser.add_argument("--output-compression", choices=sorted(COMPRESSIONS),
+                            help="Compress csv/jsonl output on the fly")
+    arg_parser.add_argument("--compression-level", type=int,
+                            help="gzip (1-9, default 6) or zstd (1-22, default 3) compression level")
+    arg_parser.add_argument("--rollover-rows", type=int,
+                            help="Split each output into <stem>.part-NNNN files of at most this many rows")
+    arg_parser.add_argument("--rollover-bytes", type=int,
+                            help="Start a new output part once the current one reaches this many bytes on disk")
+    arg_parser.add_argument("--cache", action="store_true",
+                            help="Skip files whose content and matching patterns are unchanged since the last run")
+    arg_parser.add_argument("--reader", choices=sorted(READERS), default="text",
+                            help="How log files are read: memory-mapped bytes or a text-mode file")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="Time each parse stage and count lines per log type, printed at the end")
+    arg_parser.add_argument("--stats-file", help="Also write the --profile statistics to this JSON file")
+    arg_parser.add_argument("--adaptive-detect", action="store_true",
+                            help="Try the most recently/frequently matched log types' patterns before detection")
+    arg_parser.add_argument("--max-guesses", type=int, default=2,
+                            help="Pattern candidates tried per line by --adaptive-detect")
+    arg_parser.add_argument("--match-timeout", type=float, nargs='?', const=DEFAULT_MATCH_TIMEOUT, default=0,
+                            help="Seconds a line may spend in pattern matching before it is quarantined "
+                                 f"({DEFAULT_MATCH_TIMEOUT:g} if no value is given; off by default)")
+    arg_parser.add_argument("--fields",
+                            help="Comma-separated fields to keep, e.g. ip,timestamp,status; "
+                                 "patterns only capture these and outputs only have these columns")
+    arg_parser.add_argument("--filter", dest="filter_expression",
+                            help="Only keep lines matching an expression, e.g. \"status>=500 and "
+                                 "log_type=='nginx_access'\"; lines are dropped before records are built")
+    arg_parser.add_argument("--quarantine-file",
+                            help=f"JSON lines file for quarantined lines "
+                                 f"(default: {QUARANTINE_FILE} in the output folder)")
+    return arg_parser
 
-            # Save to CSV
-            self.save_to_csv(parsed_logs, output_file)
 
-def main():
+def main(argv=None):
     """Main function to run the log parser"""
-    parser = LogParser()
+    args = build_arg_parser().parse_args(argv)
+    parser = LogParser(
+        log_folder=args.log_folder,
+        regex_file=args.regex_file,
+        output_folder=args.output_folder,
+        streaming=args.stream,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        incremental=args.incremental,
+        output_format=args.output_format,
+        reader=args.reader,
+        profile=args.profile,
+        stats_file=args.stats_file,
+        adaptive=args.adaptive_detect,
+        max_guesses=args.max_guesses,
+        output_compression=args.output_compression,
+        compression_level=args.compression_level,
+        rollover_rows=args.rollover_rows,
+        rollover_bytes=args.rollover_bytes,
+        cache=args.cache,
+        match_timeout=args.match_timeout,
+        quarantine_file=args.quarantine_file,
+        filter_expression=args.filter_expression,
+        fields=[field.strip() for field in args.fields.split(',') if field.strip()] if args.fields else None,
+    )
     parser.process_all_logs()
 
 if __name__ == "__main__":
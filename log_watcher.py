@@ -0,0 +1,250 @@
+import os
+import time
+import errno
+import ctypes
+import select
+import signal
+import struct
+import argparse
+import ctypes.util
+from fnmatch import fnmatch
+
+from log_parser import DEFAULT_MATCH_TIMEOUT, LOG_GLOBS, LogParser
+
+# inotify event bits, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+# struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# How long to keep collecting events after the first one before parsing
+DEFAULT_DEBOUNCE = 0.05
+# Directory scan interval when inotify isn't available
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+def is_log_file(name):
+    return any(fnmatch(name, pattern) for pattern in LOG_GLOBS)
+
+
+class InotifyWatcher:
+    """Reports changed file names in a directory through Linux inotify (via libc, no extra packages)"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        libc_name = ctypes.util.find_library('c')
+        if libc_name is None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available on this platform")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"Can't watch {folder}")
+
+    def _read_events(self, changed):
+        """Add the names from all queued events to changed; returns False once the folder itself went away"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return True
+            raise
+        pos = 0
+        while pos < len(data):
+            _, mask, _, name_length = INOTIFY_EVENT.unpack_from(data, pos)
+            pos += INOTIFY_EVENT.size
+            name = data[pos:pos + name_length].rstrip(b'\0').decode('utf-8', errors='surrogateescape')
+            pos += name_length
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                return False
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; have every log file looked at
+                changed.update(name for name in os.listdir(self.folder) if is_log_file(name))
+            elif name and is_log_file(name):
+                changed.add(name)
+        return True
+
+    def wait(self, timeout, debounce=DEFAULT_DEBOUNCE):
+        """Block up to timeout seconds for changes; returns the set of changed log file names"""
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        # Let a burst of writes settle so it is parsed in one go
+        deadline = time.monotonic() + debounce
+        while ready:
+            if not self._read_events(changed):
+                raise OSError(errno.ENOENT, f"{self.folder} was removed or moved")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+        return changed
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class PollingWatcher:
+    """Fallback watcher comparing directory listings every poll_interval seconds"""
+
+    def __init__(self, folder, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.folder = folder
+        self.poll_interval = poll_interval
+        self._seen = self._scan()
+
+    def _scan(self):
+        state = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file() and is_log_file(entry.name):
+                    stat = entry.stat()
+                    state[entry.name] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        return state
+
+    def wait(self, timeout, debounce=DEFAULT_DEBOUNCE):
+        """Sleep up to timeout seconds in poll steps; returns the set of changed log file names"""
+        deadline = time.monotonic() + timeout
+        while True:
+            time.sleep(max(0.0, min(self.poll_interval, deadline - time.monotonic())))
+            current = self._scan()
+            changed = {name for name, state in current.items() if self._seen.get(name) != state}
+            self._seen = current
+            if changed or time.monotonic() >= deadline:
+                return changed
+
+    def close(self):
+        pass
+
+
+class LogWatcher:
+    """Daemon that keeps the outputs of a log folder up to date as its files grow
+
+    Every change reported by the watcher is handled like an incremental run of
+    just the changed files: appended complete lines are parsed and appended to
+    the outputs, rotated or truncated files are re-parsed from the start, and a
+    rotated-away copy such as access.log.1 is picked up as a file of its own.
+    Checkpoints are saved after every change, so a restart resumes where the
+    daemon stopped. SIGINT/SIGTERM finish the current pass, catch up once more
+    and exit.
+    """
+
+    def __init__(self, parser, use_inotify=True, poll_interval=DEFAULT_POLL_INTERVAL, debounce=DEFAULT_DEBOUNCE,
+                 rescan_interval=60.0):
+        if not parser.incremental:
+            raise ValueError("LogWatcher needs a LogParser created with incremental=True")
+        self.parser = parser
+        self.use_inotify = use_inotify
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        # Safety net against missed events; also bounds how long the daemon sleeps between stop checks
+        self.rescan_interval = rescan_interval
+        self._stopping = False
+        self.checkpoints = {}
+
+    def _open_watcher(self):
+        folder = self.parser.log_folder
+        if self.use_inotify:
+            try:
+                watcher = InotifyWatcher(folder)
+                print(f"Watching {folder} with inotify")
+                return watcher
+            except OSError as e:
+                print(f"inotify unavailable ({e}), polling {folder} every {self.poll_interval}s")
+        return PollingWatcher(folder, self.poll_interval)
+
+    def stop(self, *_):
+        """Ask the daemon to exit after the current pass"""
+        self._stopping = True
+
+    def process(self, names):
+        """Parse new data in the given file names of the log folder"""
+        fieldnames = self.parser.schema_fieldnames()
+        for name in sorted(names):
+            log_file_path = os.path.join(self.parser.log_folder, name)
+            try:
+                updated = self.parser.process_new_data(log_file_path, self.checkpoints, fieldnames)
+            except FileNotFoundError:
+                # Deleted or rotated away before we got to it
+                continue
+            if updated:
+                self.parser.save_checkpoints(self.checkpoints)
+
+    def _all_log_files(self):
+        return {name for name in os.listdir(self.parser.log_folder) if is_log_file(name)}
+
+    def run(self):
+        """Catch up on the whole folder, then parse changes as they happen until stopped"""
+        previous_handlers = {sig: signal.signal(sig, self.stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+        self.checkpoints = self.parser.load_checkpoints()
+        watcher = self._open_watcher()
+        watchdog = self.parser.watchdog
+        if watchdog is not None:
+            watchdog.arm()
+        try:
+            self.process(self._all_log_files())
+            last_rescan = time.monotonic()
+            while not self._stopping:
+                timeout = max(0.0, min(1.0, self.rescan_interval - (time.monotonic() - last_rescan)))
+                changed = watcher.wait(timeout, self.debounce)
+                if time.monotonic() - last_rescan >= self.rescan_interval:
+                    changed |= self._all_log_files()
+                    last_rescan = time.monotonic()
+                if changed:
+                    self.process(changed)
+            # Whatever arrived while shutting down
+            self.process(self._all_log_files())
+        finally:
+            if watchdog is not None:
+                watchdog.disarm()
+            watcher.close()
+            self.parser.save_checkpoints(self.checkpoints)
+            for sig, handler in previous_handlers.items():
+                signal.signal(sig, handler)
+        if self.parser.quarantine.counts:
+            print(self.parser.quarantine.report(self.parser.match_timeout))
+        print("Log watcher stopped")
+
+
+def main(argv=None):
+    """Run the log folder watcher until SIGINT/SIGTERM"""
+    arg_parser = argparse.ArgumentParser(description="Keep parsed outputs up to date as .log files grow")
+    arg_parser.add_argument("--log-folder", default="log", help="Folder to watch")
+    arg_parser.add_argument("--regex-file", default="regex.json", help="JSON file with regex patterns")
+    arg_parser.add_argument("--output-folder", default="oplogs", help="Folder for parsed output")
+    arg_parser.add_argument("--output-format", default="csv", help="Appendable output format (csv, jsonl)")
+    arg_parser.add_argument("--poll", action="store_true", help="Poll the folder instead of using inotify")
+    arg_parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                            help="Seconds between folder scans when polling")
+    arg_parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                            help="Seconds to gather a burst of changes before parsing it")
+    arg_parser.add_argument("--match-timeout", type=float, nargs='?', const=DEFAULT_MATCH_TIMEOUT, default=0,
+                            help="Seconds a line may spend in pattern matching before it is quarantined "
+                                 f"({DEFAULT_MATCH_TIMEOUT:g} if no value is given; off by default)")
+    args = arg_parser.parse_args(argv)
+
+    parser = LogParser(log_folder=args.log_folder, regex_file=args.regex_file, output_folder=args.output_folder,
+                       incremental=True, output_format=args.output_format, match_timeout=args.match_timeout)
+    LogWatcher(parser, use_inotify=not args.poll, poll_interval=args.poll_interval, debounce=args.debounce).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+import io
+import os
+import csv
+import glob
+import gzip
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from writers import COMPRESSIONS, TIMESTAMP_FORMATS, WRITERS, import_pyarrow, quote_identifier
+
+# Rows per block of a CSV/JSONL output in the index; a page read touches whole blocks
+INDEX_BLOCK_ROWS = 10000
+DEFAULT_PAGE_SIZE = 100
+# Filters whose per-block match counts are remembered per output
+MAX_CACHED_FILTERS = 32
+# Columns a block summary is built from
+SUMMARY_FIELDS = ('log_type', 'status', 'timestamp')
+
+
+def to_utc(value):
+    """A datetime, pandas Timestamp or date string as a UTC Timestamp; None stays None"""
+    if value is None or value == '':
+        return None
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize('UTC')
+    return timestamp.tz_convert('UTC')
+
+
+def timestamp_column(values):
+    """A timestamp column as UTC datetimes, NaT where the text has no known layout
+
+    Reads the values as writers.parse_timestamp() does, but a whole column and
+    layout at a time.
+    """
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        return values
+    times = pd.Series(pd.NaT, index=values.index, dtype='datetime64[us, UTC]')
+    remaining = values.notna()
+    for timestamp_format in TIMESTAMP_FORMATS:
+        if not remaining.any():
+            break
+        parsed = pd.to_datetime(values[remaining], format=timestamp_format, errors='coerce', utc=True)
+        parsed = parsed[parsed.notna()]
+        times[parsed.index] = parsed
+        remaining[parsed.index] = False
+    return times
+
+
+class ResultFilter:
+    """Row filter for parsed output; criteria left as None don't filter"""
+
+    def __init__(self, log_types=None, ip=None, status=None, start=None, end=None):
+        self.log_types = frozenset(log_types) if log_types else None
+        self.ip = ip.strip() if ip and ip.strip() else None
+        self.status = None if status in (None, '') else int(status)
+        self.start = to_utc(start)
+        self.end = to_utc(end)
+
+    @property
+    def key(self):
+        return (self.log_types, self.ip, self.status, self.start, self.end)
+
+    @property
+    def active(self):
+        return any(value is not None for value in self.key)
+
+    def may_match(self, summary):
+        """Whether a block with this summary can hold matching rows"""
+        if self.log_types is not None and not (summary['log_types'] & self.log_types):
+            return False
+        if self.status is not None and self.status not in summary['statuses']:
+            return False
+        if self.start is not None and (summary['last'] is None or summary['last'] < self.start):
+            return False
+        if self.end is not None and (summary['first'] is None or summary['first'] > self.end):
+            return False
+        return True
+
+    def mask(self, frame):
+        """Boolean Series of the rows of frame that pass the filter"""
+        mask = pd.Series(True, index=frame.index)
+        if self.log_types is not None:
+            mask &= frame['log_type'].astype(object).isin(self.log_types)
+        if self.ip is not None:
+            mask &= frame['ip'] == self.ip if 'ip' in frame else False
+        if self.status is not None:
+            mask &= pd.to_numeric(frame['status'], errors='coerce') == self.status if 'status' in frame else False
+        if self.start is not None or self.end is not None:
+            times = timestamp_column(frame['timestamp'])
+            if self.start is not None:
+                mask &= times >= self.start
+            if self.end is not None:
+                mask &= times <= self.end
+        return mask.fillna(False).astype(bool)
+
+
+def summarize(frame):
+    """What a block holds, so filters can skip it without reading it again"""
+    times = timestamp_column(frame['timestamp']) if 'timestamp' in frame else pd.Series([], dtype=object)
+    statuses = set()
+    if 'status' in frame:
+        statuses = {int(status) for status in pd.to_numeric(frame['status'], errors='coerce').dropna().unique()}
+    first, last = times.min(), times.max()
+    return {
+        'rows': len(frame),
+        'log_types': frozenset(frame['log_type'].dropna().astype(str).unique()) if 'log_type' in frame else frozenset(),
+        'statuses': statuses,
+        'first': None if pd.isna(first) else first,
+        'last': None if pd.isna(last) else last,
+    }
+
+
+class BlockOutputReader:
+    """Pages through an output one block of rows at a time
+
+    Every block is summarized (row count, log types, statuses, time range)
+    the first time a read gets to it, so the index is only built as far as
+    the pages asked for so far reach. A page read skips blocks the filter
+    rules out and blocks whose match count for that filter is already known,
+    and only reads the blocks the page's rows come from.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.summaries = []
+        self.complete = False
+        self._scanner = self.scan()
+        self._match_counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def scan(self):
+        """Yield every block's summary fields as a DataFrame, in order, recording where blocks start"""
+        raise NotImplementedError
+
+    def read_block(self, number):
+        raise NotImplementedError
+
+    def _summary(self, number):
+        """Summary of block number, indexing up to it if needed; None past the last block"""
+        while len(self.summaries) <= number and not self.complete:
+            frame = next(self._scanner, None)
+            if frame is None:
+                self.complete = True
+            else:
+                self.summaries.append(summarize(frame))
+        return self.summaries[number] if number < len(self.summaries) else None
+
+    def index_all(self):
+        """Summarize every block; total_rows and log_types cover the whole output afterwards"""
+        with self._lock:
+            while self._summary(len(self.summaries)) is not None:
+                pass
+
+    @property
+    def total_rows(self):
+        """Rows in the blocks indexed so far"""
+        return sum(summary['rows'] for summary in self.summaries)
+
+    @property
+    def log_types(self):
+        """Log types in the blocks indexed so far"""
+        return sorted(set().union(*(summary['log_types'] for summary in self.summaries)))
+
+    def _counts(self, result_filter):
+        if not result_filter.active:
+            return {number: summary['rows'] for number, summary in enumerate(self.summaries)}
+        counts = self._match_counts.pop(result_filter.key, {})
+        self._match_counts[result_filter.key] = counts
+        while len(self._match_counts) > MAX_CACHED_FILTERS:
+            self._match_counts.popitem(last=False)
+        return counts
+
+    def _matching(self, number, result_filter, counts):
+        frame = self.read_block(number)
+        if result_filter.active:
+            frame = frame[result_filter.mask(frame)]
+        counts[number] = len(frame)
+        return frame
+
+    def _candidates(self, result_filter):
+        number = 0
+        while True:
+            summary = self._summary(number)
+            if summary is None:
+                return
+            if result_filter.may_match(summary):
+                yield number, summary
+            number += 1
+
+    def page(self, result_filter, page=0, page_size=DEFAULT_PAGE_SIZE):
+        """Rows page*page_size onwards that pass the filter; returns (DataFrame, whether more may follow)"""
+        with self._lock:
+            counts = self._counts(result_filter)
+            skip = page * page_size
+            frames = []
+            wanted = page_size
+            for number, summary in self._candidates(result_filter):
+                known = counts.get(number, summary['rows'] if not result_filter.active else None)
+                if known is not None and known <= skip:
+                    skip -= known
+                    continue
+                frame = self._matching(number, result_filter, counts)
+                if len(frame) <= skip:
+                    skip -= len(frame)
+                    continue
+                frames.append(frame.iloc[skip:skip + wanted])
+                taken = len(frames[-1])
+                wanted -= taken
+                if not wanted:
+                    more = skip + taken < len(frame) or self._summary(number + 1) is not None
+                    return pd.concat(frames, ignore_index=True), more
+                skip = 0
+            return (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()), False
+
+    def count(self, result_filter):
+        """Number of rows passing the filter; reads every block that may hold some, once per filter"""
+        with self._lock:
+            counts = self._counts(result_filter)
+            total = 0
+            for number, summary in self._candidates(result_filter):
+                if not result_filter.active:
+                    total += summary['rows']
+                    continue
+                if number not in counts:
+                    self._matching(number, result_filter, counts)
+                total += counts[number]
+            return total
+
+
+def open_binary(path, compression=None):
+    """Open an output for reading bytes, decompressing gzip/zstd outputs on the fly"""
+    if compression is None:
+        return open(path, 'rb')
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    import zstandard
+    return io.BufferedReader(zstandard.open(path, 'rb'))
+
+
+class TextOutputReader(BlockOutputReader):
+    """Base for CSV and JSON Lines outputs, indexed by the byte offset of every block
+
+    Plain files seek straight to a block. Compressed ones have to decompress
+    up to it, so paging deep into them gets slower.
+    """
+
+    def __init__(self, path, compression=None):
+        self.compression = compression
+        # (offset, length) of every block indexed so far, in uncompressed bytes
+        self.blocks = []
+        super().__init__(path)
+
+    def read_header(self, f):
+        pass
+
+    def parse(self, data, columns=None):
+        raise NotImplementedError
+
+    def scan(self):
+        with open_binary(self.path, self.compression) as f:
+            self.read_header(f)
+            offset = f.tell()
+            while True:
+                lines = []
+                for line in f:
+                    lines.append(line)
+                    if len(lines) >= INDEX_BLOCK_ROWS:
+                        break
+                if not lines:
+                    break
+                data = b''.join(lines)
+                self.blocks.append((offset, len(data)))
+                offset += len(data)
+                yield self.parse(data, SUMMARY_FIELDS)
+
+    def read_block(self, number):
+        offset, length = self.blocks[number]
+        with open_binary(self.path, self.compression) as f:
+            if self.compression is None:
+                f.seek(offset)
+            else:
+                # Compressed streams can only be read up to the block
+                while offset:
+                    offset -= len(f.read(min(offset, 1024 * 1024)))
+            return self.parse(f.read(length))
+
+
+class CSVOutputReader(TextOutputReader):
+
+    def read_header(self, f):
+        self.fieldnames = next(csv.reader([f.readline().decode('utf-8')]), [])
+
+    def parse(self, data, columns=None):
+        if columns is not None:
+            columns = [name for name in columns if name in self.fieldnames]
+        # Only empty fields are missing: 'N/A' and friends are real values here
+        return pd.read_csv(io.BytesIO(data), names=self.fieldnames, header=None, usecols=columns, dtype=str,
+                           keep_default_na=False, na_values=[''])
+
+
+class JSONLOutputReader(TextOutputReader):
+
+    def parse(self, data, columns=None):
+        frame = pd.read_json(io.BytesIO(data), lines=True, dtype=False)
+        if columns is not None:
+            frame = frame[[name for name in columns if name in frame]]
+        return frame
+
+
+class ParquetOutputReader(BlockOutputReader):
+    """Parquet outputs, one block per row group"""
+
+    def __init__(self, path):
+        import_pyarrow()
+        import pyarrow.parquet as pq
+        self.file = pq.ParquetFile(path)
+        super().__init__(path)
+
+    def scan(self):
+        columns = [name for name in SUMMARY_FIELDS if name in self.file.schema_arrow.names]
+        for number in range(self.file.num_row_groups):
+            yield self.file.read_row_group(number, columns=columns).to_pandas()
+
+    def read_block(self, number):
+        return self.file.read_row_group(number).to_pandas()
+
+
+class ArrowOutputReader(BlockOutputReader):
+    """Arrow IPC outputs, memory-mapped, one block per record batch"""
+
+    def __init__(self, path):
+        pa = import_pyarrow()
+        self.file = pa.ipc.open_file(pa.memory_map(path))
+        super().__init__(path)
+
+    def scan(self):
+        columns = [name for name in SUMMARY_FIELDS if name in self.file.schema.names]
+        for number in range(self.file.num_record_batches):
+            yield self.file.get_batch(number).select(columns).to_pandas()
+
+    def read_block(self, number):
+        return self.file.get_batch(number).to_pandas()
+
+
+class SQLiteOutputReader:
+    """SQLite outputs, filtered and paged by SQL over the indexed per-log-type tables
+
+    Rows come table by table, each in insertion order. The database's own
+    indexes do the work, so there is no block index to build.
+    """
+
+    complete = True
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.tables = {}
+        for table, in self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY rowid"):
+            info = self.connection.execute(f'PRAGMA table_info({quote_identifier(table)})')
+            self.tables[table] = [column[1] for column in info]
+        self.columns = []
+        for columns in self.tables.values():
+            self.columns.extend(name for name in columns if name not in self.columns)
+
+    def index_all(self):
+        pass
+
+    @property
+    def log_types(self):
+        return sorted(self.tables)
+
+    @property
+    def total_rows(self):
+        with self._lock:
+            return sum(self.connection.execute(f'SELECT count(*) FROM {quote_identifier(table)}').fetchone()[0]
+                       for table in self.tables)
+
+    def _query(self, result_filter, select):
+        """UNION ALL over the tables the filter can match; returns (sql, parameters)"""
+        selects = []
+        parameters = []
+        for table, columns in self.tables.items():
+            if result_filter.log_types is not None and table not in result_filter.log_types:
+                continue
+            if result_filter.status is not None and 'status' not in columns:
+                continue
+            conditions = []
+            if result_filter.ip is not None:
+                conditions.append('ip = ?')
+                parameters.append(result_filter.ip)
+            if result_filter.status is not None:
+                conditions.append('status = ?')
+                parameters.append(result_filter.status)
+            # Stored as ISO 8601 UTC text by SQLiteWriter, which compares chronologically
+            if result_filter.start is not None:
+                conditions.append('timestamp >= ?')
+                parameters.append(result_filter.start.isoformat(sep=' '))
+            if result_filter.end is not None:
+                conditions.append('timestamp <= ?')
+                parameters.append(result_filter.end.isoformat(sep=' '))
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+            selects.append(f'SELECT {select(columns)} FROM {quote_identifier(table)}{where}')
+        return ' UNION ALL '.join(selects), parameters
+
+    def page(self, result_filter, page=0, page_size=DEFAULT_PAGE_SIZE):
+        """Rows page*page_size onwards that pass the filter; returns (DataFrame, whether more follow)"""
+        def select(columns):
+            return ', '.join(quote_identifier(name) if name in columns else f'NULL AS {quote_identifier(name)}'
+                             for name in self.columns)
+        sql, parameters = self._query(result_filter, select)
+        if not sql:
+            return pd.DataFrame(columns=self.columns), False
+        with self._lock:
+            rows = self.connection.execute(f'{sql} LIMIT ? OFFSET ?',
+                                           parameters + [page_size + 1, page * page_size]).fetchall()
+        return pd.DataFrame(rows[:page_size], columns=self.columns), len(rows) > page_size
+
+    def count(self, result_filter):
+        sql, parameters = self._query(result_filter, lambda columns: '1')
+        if not sql:
+            return 0
+        with self._lock:
+            return self.connection.execute(f'SELECT count(*) FROM ({sql})', parameters).fetchone()[0]
+
+
+def output_kind(path):
+    """(output format, compression) of an output file judged by its name, or None if it isn't one"""
+    name = os.path.basename(path)
+    compression = None
+    for candidate, suffix in COMPRESSIONS.items():
+        if name.endswith('.' + suffix):
+            compression = candidate
+            name = name[:-len(suffix) - 1]
+            break
+    for output_format, writer_class in WRITERS.items():
+        if name.endswith('.' + writer_class.extension):
+            if compression is not None and not writer_class.compressible:
+                return None
+            return output_format, compression
+    return None
+
+
+def list_outputs(output_folder):
+    """Output files of every format in a folder, sorted by name"""
+    return sorted(path for path in glob.glob(os.path.join(output_folder, '*')) if output_kind(path) is not None)
+
+
+def open_output(path):
+    """Reader for an output file, chosen by its format"""
+    kind = output_kind(path)
+    if kind is None:
+        raise ValueError(f"Not a parser output: {path}")
+    output_format, compression = kind
+    if output_format == 'csv':
+        return CSVOutputReader(path, compression)
+    if output_format == 'jsonl':
+        return JSONLOutputReader(path, compression)
+    if output_format == 'parquet':
+        return ParquetOutputReader(path)
+    if output_format == 'arrow':
+        return ArrowOutputReader(path)
+    return SQLiteOutputReader(path)
@@ -0,0 +1,303 @@
+import ast
+import copy
+import math
+import operator
+
+# Values a record gets for ip/timestamp when its pattern didn't capture them
+DEFAULT_VALUE = 'N/A'
+# Fields the parser fills in itself rather than taking from the line's text
+NON_TEXT_FIELDS = ('log_type', 'line_number')
+
+COMPARISONS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn)
+# Comparisons that raise TypeError on None or mixed types; evaluated one at a time by _compare()
+GUARDED_COMPARISONS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+BOOLEAN_OPERATORS = (ast.And, ast.Or)
+
+
+def _number(value):
+    """A field's value for comparing with a number; NaN (which compares false) if it isn't one"""
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _compare(left, op, right):
+    """One ordering or membership test; false if either side is missing or they don't compare"""
+    if left is None or right is None:
+        return False
+    try:
+        return GUARDED_COMPARISONS[op](left, right)
+    except TypeError:
+        return False
+
+
+def _is_number(node):
+    if isinstance(node, ast.Constant):
+        return isinstance(node.value, (int, float)) and not isinstance(node.value, bool)
+    if isinstance(node, (ast.Tuple, ast.List)):
+        return bool(node.elts) and all(_is_number(element) for element in node.elts)
+    return False
+
+
+def _strings(node):
+    """The string constants of a constant or a tuple/list of them, else None"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return (node.value,)
+    if isinstance(node, (ast.Tuple, ast.List)) and node.elts:
+        values = tuple(element.value for element in node.elts
+                       if isinstance(element, ast.Constant) and isinstance(element.value, str))
+        if len(values) == len(node.elts):
+            return values
+    return None
+
+
+def _conjuncts(node):
+    """The parts of a top-level 'and' chain"""
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        return [part for value in node.values for part in _conjuncts(value)]
+    return [node]
+
+
+def _names(node):
+    return {child.id for child in ast.walk(node) if isinstance(child, ast.Name)}
+
+
+class _Resolver(ast.NodeTransformer):
+    """Rewrites field names into what a record would hold for them, without building the record
+
+    With a pattern, captured groups read straight from the match. Without one
+    (fallback and unknown lines) only the fields the parser fills in exist.
+    For records, every name is looked up in the dict.
+    """
+
+    def __init__(self, log_type=None, pattern=None, records=False):
+        self.log_type = log_type
+        self.groups = pattern.groupindex if pattern is not None else {}
+        self.records = records
+
+    def visit_Compare(self, node):
+        numeric = any(_is_number(operand) for operand in [node.left] + node.comparators)
+        node = self.generic_visit(node)
+        if numeric:
+            # Numbers never raise: anything that isn't one, missing fields included, is NaN
+            node.left = self._as_number(node.left)
+            node.comparators = [self._as_number(operand) for operand in node.comparators]
+            return node
+        if not any(type(op) in GUARDED_COMPARISONS for op in node.ops):
+            return node
+        # Split a chain into single tests so a missing field only fails its own comparison
+        operands = [node.left] + node.comparators
+        tests = []
+        for left, op, right in zip(operands, node.ops, operands[1:]):
+            if type(op) in GUARDED_COMPARISONS:
+                tests.append(ast.Call(func=ast.Name(id='_compare', ctx=ast.Load()),
+                                      args=[left, ast.Name(id=f'_{type(op).__name__}', ctx=ast.Load()), right],
+                                      keywords=[]))
+            else:
+                tests.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+        return tests[0] if len(tests) == 1 else ast.BoolOp(op=ast.And(), values=tests)
+
+    @classmethod
+    def _as_number(cls, node):
+        if isinstance(node, (ast.Tuple, ast.List)):
+            return type(node)(elts=[cls._as_number(element) for element in node.elts], ctx=ast.Load())
+        if isinstance(node, ast.Constant) and _is_number(node):
+            return node
+        return ast.Call(func=ast.Name(id='_number', ctx=ast.Load()), args=[node], keywords=[])
+
+    def visit_Name(self, node):
+        name = node.id
+        if self.records:
+            return ast.Call(func=ast.Attribute(value=ast.Name(id='record', ctx=ast.Load()), attr='get',
+                                               ctx=ast.Load()),
+                            args=[ast.Constant(name)], keywords=[])
+        if name in self.groups:
+            return ast.Subscript(value=ast.Name(id='match', ctx=ast.Load()),
+                                 slice=ast.Constant(self.groups[name]), ctx=ast.Load())
+        if name == 'log_type':
+            return ast.Constant(self.log_type)
+        if name == 'line_number':
+            return ast.Name(id='line_num', ctx=ast.Load())
+        if name in ('message', 'raw_line'):
+            return ast.Name(id='line', ctx=ast.Load())
+        if name in ('ip', 'timestamp'):
+            return ast.Constant(DEFAULT_VALUE)
+        return ast.Constant(None)
+
+
+class RecordFilter:
+    """A filter expression such as "status>=500 and log_type=='nginx_access'", compiled once
+
+    Expressions combine comparisons (==, !=, <, <=, >, >=, in, not in) of
+    field names and constants with and/or/not; 'text' in message tests for a
+    substring. A field compared with a number is read as a number, and one
+    that isn't (or is missing) compares false; so does an ordering or 'in'
+    test on a missing field, on its own without failing the rest of the
+    expression. Nothing else, no calls or attributes, is accepted.
+
+    The parser runs it in three steps, cheapest first: prefilter() checks the
+    raw line for text the expression requires, allows_type() rules out whole
+    log types right after detection, and accepts() evaluates the expression on
+    the regex match, before any record dict exists. Compiled predicates are
+    specialized per log type and pattern, so field lookups turn into match
+    group indexes and the log type into a constant.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        try:
+            self.tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid filter expression {expression!r}: {e.msg}") from None
+        self._check(self.tree.body)
+        self.fields = frozenset(_names(self.tree))
+        self.required, self.alternatives = self._required_text()
+        self._type_conditions = [self._compile(condition, 'record', _Resolver(records=True))
+                                 for condition in _conjuncts(self.tree.body) if _names(condition) == {'log_type'}]
+        self._allowed_types = {}
+        # (log_type, pattern) -> predicate on (match, line, line_num)
+        self._predicates = {}
+        self._record_predicate = None
+        self.prefiltered = 0
+        self.rejected = 0
+
+    def _check(self, node):
+        """Refuse anything but the whitelisted expression nodes"""
+        if isinstance(node, ast.BoolOp) and isinstance(node.op, BOOLEAN_OPERATORS):
+            for value in node.values:
+                self._check(value)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            self._check(node.operand)
+        elif isinstance(node, ast.Compare):
+            if not all(isinstance(op, COMPARISONS) for op in node.ops):
+                raise ValueError(f"Unsupported comparison in filter {self.expression!r}")
+            for operand in [node.left] + node.comparators:
+                self._check_operand(operand)
+        elif isinstance(node, ast.Name):
+            self._check_operand(node)
+        elif not (isinstance(node, ast.Constant) and isinstance(node.value, bool)):
+            raise ValueError(f"Unsupported filter syntax {ast.unparse(node)!r} in {self.expression!r}")
+
+    def _check_operand(self, node):
+        if isinstance(node, ast.Name):
+            if node.id.startswith('_'):
+                raise ValueError(f"Unknown field {node.id!r} in filter {self.expression!r}")
+            return
+        if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool, type(None))):
+            return
+        if isinstance(node, (ast.Tuple, ast.List)) and all(
+                isinstance(element, ast.Constant) and isinstance(element.value, (str, int, float))
+                for element in node.elts):
+            return
+        raise ValueError(f"Unsupported filter operand {ast.unparse(node)!r} in {self.expression!r}")
+
+    def _required_text(self):
+        """Substrings every line passing the filter contains: (all of these, [any of each tuple])
+
+        Only taken from top-level 'and' parts comparing a text field: a captured
+        value is a piece of the line, and so is message when it defaults to the
+        line. ip/timestamp default to 'N/A', which needn't be in the line.
+        """
+        required = []
+        alternatives = []
+        for condition in _conjuncts(self.tree.body):
+            if not isinstance(condition, ast.Compare) or len(condition.ops) != 1:
+                continue
+            op, left, right = condition.ops[0], condition.left, condition.comparators[0]
+            if isinstance(op, ast.Eq) and isinstance(right, ast.Name):
+                left, right = right, left
+            if isinstance(op, ast.Eq) and isinstance(left, ast.Name):
+                values, contains = _strings(right), False
+            elif isinstance(op, ast.In) and isinstance(left, ast.Name) and isinstance(right, (ast.Tuple, ast.List)):
+                values, contains = _strings(right), False
+            elif isinstance(op, ast.In) and isinstance(right, ast.Name) and isinstance(left, ast.Constant):
+                left, values, contains = right, _strings(left), True
+            else:
+                continue
+            if not values or left.id in NON_TEXT_FIELDS or '' in values:
+                continue
+            if left.id in ('ip', 'timestamp') and any(
+                    value in DEFAULT_VALUE if contains else value == DEFAULT_VALUE for value in values):
+                continue
+            if len(values) == 1:
+                required.append(values[0])
+            else:
+                alternatives.append(values)
+        return required, alternatives
+
+    def _compile(self, node, arguments, resolver):
+        # Specialize a copy, leaving the parsed expression as it is
+        body = resolver.visit(ast.Expression(body=copy.deepcopy(node))).body
+        source = f"lambda {arguments}: {ast.unparse(body)}"
+        namespace = {'__builtins__': {}, '_number': _number, '_compare': _compare}
+        # The comparison classes _compare() looks up, under names the expression itself can't use
+        namespace.update({f'_{op.__name__}': op for op in GUARDED_COMPARISONS})
+        return eval(compile(source, '<filter>', 'eval'), namespace)
+
+    def prefilter(self, line):
+        """False if the raw line lacks text the expression needs, so it can't pass"""
+        for text in self.required:
+            if text not in line:
+                self.prefiltered += 1
+                return False
+        for values in self.alternatives:
+            if not any(text in line for text in values):
+                self.prefiltered += 1
+                return False
+        return True
+
+    def allows_type(self, log_type, lines=1):
+        """False if the expression's conditions on log_type alone exclude this type
+
+        lines is how many lines of that type are asked about, counted as rejected if so.
+        """
+        allowed = self._allowed_types.get(log_type)
+        if allowed is None:
+            allowed = self._allowed_types[log_type] = all(
+                condition({'log_type': log_type}) for condition in self._type_conditions)
+        if not allowed:
+            self.rejected += lines
+        return allowed
+
+    def accepts(self, log_type, pattern, match, line, line_num):
+        """Evaluate the expression for a line parsed by pattern (None for fallback/unknown lines)"""
+        key = (log_type, pattern if match is not None else None)
+        predicate = self._predicates.get(key)
+        if predicate is None:
+            resolver = _Resolver(log_type, key[1])
+            predicate = self._predicates[key] = self._compile(self.tree.body, 'match, line, line_num', resolver)
+        accepted = predicate(match, line, line_num)
+        if not accepted:
+            self.rejected += 1
+        return accepted
+
+    def accepts_record(self, record):
+        """Evaluate the expression on a finished record dict"""
+        if self._record_predicate is None:
+            self._record_predicate = self._compile(self.tree.body, 'record', _Resolver(records=True))
+        accepted = self._record_predicate(record)
+        if not accepted:
+            self.rejected += 1
+        return accepted
+
+    def counters(self):
+        return {'prefiltered': self.prefiltered, 'rejected': self.rejected}
+
+    def merge(self, other):
+        """Fold in the counters of another filter, e.g. from a worker process"""
+        self.prefiltered += other['prefiltered']
+        self.rejected += other['rejected']
+
+    def report(self):
+        return (f"Filter {self.expression!r} dropped {self.prefiltered + self.rejected} lines: "
+                f"{self.prefiltered} by substring prefilter before the regex, {self.rejected} by the expression")
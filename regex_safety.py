@@ -0,0 +1,486 @@
+import re
+import sys
+import json
+import math
+import time
+import argparse
+from collections import namedtuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+# Repeats with a larger upper bound than this count as unbounded
+UNBOUNDED_REPEAT = 32
+# Characters the analysis reasons about: ASCII plus two stand-ins for non-ASCII text
+ALPHABET = frozenset(range(128)) | {0xe9, 0x3b1}
+ANY_CHAR = ALPHABET - {ord('\n')}
+# Input lengths the fuzzer works up through, in pump repetitions
+FUZZ_LENGTHS = (8, 10, 12, 14, 16, 18, 20, 22, 24, 28, 32, 48, 64, 96, 128, 256, 512, 1024, 2048, 4096)
+# A single match slower than this stops the fuzz (seconds)
+FUZZ_BUDGET = 0.1
+# Characters appended after the pumped text to make the overall match fail
+KILLERS = ('\x00', '!', ' ', '"', 'a', '0')
+# Measured worst case per line (microseconds) above which a pattern is warned about / blocked
+WARN_MICROSECONDS = 1000
+BLOCK_MICROSECONDS = 100000
+# Match time growing like a higher power of the line length than this, over two steps in a
+# row, is taken for exponential growth; hostile lines push the built-in patterns to about 2
+MAX_POLYNOMIAL_DEGREE = 6
+# Timings (seconds) below this are too noisy to estimate growth from
+GROWTH_NOISE_FLOOR = 0.0001
+
+REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+POSSESSIVE_REPEAT = getattr(sre_constants, 'POSSESSIVE_REPEAT', None)
+ATOMIC_GROUP = getattr(sre_constants, 'ATOMIC_GROUP', None)
+CATEGORY_PATTERNS = {
+    'CATEGORY_DIGIT': r'\d', 'CATEGORY_NOT_DIGIT': r'\D',
+    'CATEGORY_SPACE': r'\s', 'CATEGORY_NOT_SPACE': r'\S',
+    'CATEGORY_WORD': r'\w', 'CATEGORY_NOT_WORD': r'\W',
+}
+
+# severity is 'high' (exponential backtracking) or 'medium' (polynomial);
+# prefix and units are what the fuzzer builds attack strings from
+Finding = namedtuple('Finding', 'severity message prefix units')
+FuzzResult = namedtuple('FuzzResult', 'worst_microseconds length exceeded exponential')
+
+
+def _category_chars(category):
+    matcher = re.compile(CATEGORY_PATTERNS.get(category.name, r'[^\s\S]'))
+    return frozenset(code for code in ALPHABET if matcher.match(chr(code)))
+
+
+def _class_chars(items):
+    chars = set()
+    negate = False
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            chars.add(av)
+        elif op is sre_constants.RANGE:
+            chars.update(code for code in ALPHABET if av[0] <= code <= av[1])
+        elif op is sre_constants.CATEGORY:
+            chars |= _category_chars(av)
+    return frozenset(ALPHABET - chars if negate else chars)
+
+
+def _is_unbounded(op, av):
+    return op in REPEATS and (av[1] == sre_constants.MAXREPEAT or av[1] > UNBOUNDED_REPEAT)
+
+
+def _flatten(seq, owners=None, group=None):
+    """Inline the contents of plain groups, so a group's items sit in its parent's sequence
+
+    owners, if given, is filled with id(item arguments) -> the group number
+    the item came from.
+    """
+    items = []
+    for op, av in seq:
+        if op is sre_constants.SUBPATTERN:
+            items.extend(_flatten(av[-1], owners, av[0] or group))
+        else:
+            items.append((op, av))
+            if owners is not None and group:
+                owners[id(av)] = group
+    return items
+
+
+def _render(seq):
+    """Approximate regex source of a parsed sequence, for messages"""
+    parts = []
+    for op, av in seq:
+        if op is sre_constants.LITERAL:
+            parts.append(re.escape(chr(av)))
+        elif op is sre_constants.NOT_LITERAL:
+            parts.append(f"[^{re.escape(chr(av))}]")
+        elif op is sre_constants.ANY:
+            parts.append('.')
+        elif op is sre_constants.IN:
+            if len(av) == 1 and av[0][0] is sre_constants.CATEGORY:
+                parts.append(CATEGORY_PATTERNS.get(av[0][1].name, '[...]'))
+            else:
+                parts.append('[...]')
+        elif op in REPEATS or op is POSSESSIVE_REPEAT:
+            low, high, body = av
+            body_text = _render(body)
+            if len(body) != 1 or body[0][0] in REPEATS or body[0][0] is sre_constants.BRANCH:
+                body_text = f"(?:{body_text})"
+            if (low, high) == (0, sre_constants.MAXREPEAT):
+                quantifier = '*'
+            elif (low, high) == (1, sre_constants.MAXREPEAT):
+                quantifier = '+'
+            elif (low, high) == (0, 1):
+                quantifier = '?'
+            elif high == sre_constants.MAXREPEAT:
+                quantifier = f"{{{low},}}"
+            else:
+                quantifier = f"{{{low},{high}}}"
+            suffix = '?' if op is sre_constants.MIN_REPEAT else '+' if op is POSSESSIVE_REPEAT else ''
+            parts.append(body_text + quantifier + suffix)
+        elif op is sre_constants.SUBPATTERN:
+            parts.append(f"({_render(av[-1])})")
+        elif op is sre_constants.BRANCH:
+            parts.append('|'.join(_render(branch) for branch in av[1]))
+        else:
+            parts.append('...')
+    return ''.join(parts)
+
+
+def _chars(seq):
+    """Every character a sequence can consume anywhere"""
+    chars = set()
+    for op, av in seq:
+        if op is sre_constants.LITERAL:
+            chars.add(av)
+        elif op is sre_constants.NOT_LITERAL:
+            chars |= ALPHABET - {av}
+        elif op is sre_constants.ANY:
+            chars |= ANY_CHAR
+        elif op is sre_constants.IN:
+            chars |= _class_chars(av)
+        elif op in REPEATS or op is POSSESSIVE_REPEAT:
+            chars |= _chars(av[2])
+        elif op is sre_constants.SUBPATTERN:
+            chars |= _chars(av[-1])
+        elif op is ATOMIC_GROUP:
+            chars |= _chars(av)
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                chars |= _chars(branch)
+        elif op is sre_constants.GROUPREF_EXISTS:
+            chars |= _chars(av[1])
+            if av[2]:
+                chars |= _chars(av[2])
+        elif op is sre_constants.GROUPREF:
+            chars |= ANY_CHAR
+    return frozenset(chars)
+
+
+def _first(seq):
+    """(characters a sequence can start with, whether it can match the empty string)"""
+    first = set()
+    for op, av in seq:
+        if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            continue
+        if op in REPEATS or op is POSSESSIVE_REPEAT:
+            body_first, body_nullable = _first(av[2])
+            first |= body_first
+            if av[0] > 0 and not body_nullable:
+                return frozenset(first), False
+        elif op is sre_constants.SUBPATTERN or op is ATOMIC_GROUP:
+            group_first, group_nullable = _first(av[-1] if op is sre_constants.SUBPATTERN else av)
+            first |= group_first
+            if not group_nullable:
+                return frozenset(first), False
+        elif op is sre_constants.BRANCH:
+            nullable = False
+            for branch in av[1]:
+                branch_first, branch_nullable = _first(branch)
+                first |= branch_first
+                nullable = nullable or branch_nullable
+            if not nullable:
+                return frozenset(first), False
+        elif op is sre_constants.GROUPREF_EXISTS or op is sre_constants.GROUPREF:
+            first |= _chars([(op, av)])
+        else:
+            first |= _chars([(op, av)])
+            return frozenset(first), False
+    return frozenset(first), True
+
+
+def _sample(seq):
+    """A short string the sequence matches, good enough to reach a construct behind it"""
+    parts = []
+    for op, av in seq:
+        if op is sre_constants.LITERAL:
+            parts.append(chr(av))
+        elif op in (sre_constants.NOT_LITERAL, sre_constants.ANY, sre_constants.IN):
+            chars = _chars([(op, av)])
+            preferred = [code for code in chars if chr(code).isalnum() and code < 128]
+            parts.append(chr(min(preferred or chars or {ord('a')})))
+        elif op in REPEATS or op is POSSESSIVE_REPEAT:
+            parts.append(_sample(av[2]) * av[0])
+        elif op is sre_constants.SUBPATTERN:
+            parts.append(_sample(av[-1]))
+        elif op is ATOMIC_GROUP:
+            parts.append(_sample(av))
+        elif op is sre_constants.BRANCH:
+            parts.append(_sample(av[1][0]))
+        elif op is sre_constants.GROUPREF_EXISTS:
+            parts.append(_sample(av[1]))
+    return ''.join(parts)
+
+
+def _pick(chars):
+    """A printable character from chars if there is one"""
+    printable = [code for code in chars if 32 < code < 127]
+    return chr(min(printable or chars))
+
+
+class _Analyzer:
+    def __init__(self, pattern):
+        self.parsed = sre_parse.parse(pattern)
+        self.group_names = {number: name for name, number in re.compile(pattern).groupindex.items()}
+        self.findings = []
+        self._reported = set()
+        self._owners = {}
+
+    def _describe(self, op, av):
+        text = _render([(op, av)])
+        group = self._owners.get(id(av))
+        if group is None:
+            return text
+        return f"{text} (group {self.group_names.get(group, group)!r})"
+
+    def _add(self, key, severity, message, prefix, units):
+        if key not in self._reported:
+            self._reported.add(key)
+            self.findings.append(Finding(severity, message, prefix, tuple(dict.fromkeys(units))))
+
+    def run(self):
+        self._walk(list(self.parsed), None, '', top=True)
+        return self.findings
+
+    def _walk(self, seq, enclosing, prefix, top=False):
+        """Check one sequence; enclosing is the body of the unbounded repeat around it, if any"""
+        flat = _flatten(seq, self._owners)
+        self._check_adjacent(flat, prefix, top)
+        for index, (op, av) in enumerate(flat):
+            item_prefix = prefix + _sample(flat[:index])
+            if op in REPEATS:
+                body = av[2]
+                if _is_unbounded(op, av):
+                    if enclosing is not None:
+                        self._check_nested(flat, index, body, item_prefix)
+                    self._walk(body, body, item_prefix)
+                else:
+                    self._walk(body, enclosing, item_prefix)
+            elif op is sre_constants.BRANCH:
+                if enclosing is not None:
+                    self._check_branches(av[1], item_prefix, flat[:index] + flat[index + 1:])
+                for branch in av[1]:
+                    self._walk(branch, enclosing, item_prefix)
+            elif op is sre_constants.GROUPREF_EXISTS:
+                for branch in av[1:]:
+                    if branch:
+                        self._walk(branch, enclosing, item_prefix)
+            elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                self._walk(av[1], None, item_prefix)
+            elif op is POSSESSIVE_REPEAT:
+                # Possessive repeats and atomic groups never give back what they matched
+                self._walk(av[2], None, item_prefix)
+            elif op is ATOMIC_GROUP:
+                self._walk(av, None, item_prefix)
+
+    def _check_nested(self, flat, index, body, prefix):
+        """An unbounded repeat inside another one is ambiguous unless something it can't match must follow it"""
+        rest_first, rest_nullable = _first(flat[index + 1:])
+        inner_chars = _chars(body)
+        overlap = inner_chars & rest_first
+        if not rest_nullable and not overlap:
+            return
+        char = _pick(overlap or inner_chars)
+        self._add(('nested', id(body)), 'high',
+                  f"nested quantifier: {self._describe(*flat[index])} sits inside another unbounded repeat "
+                  "and can split the same text in exponentially many ways",
+                  prefix, [char, char + _sample(flat[index + 1:])])
+
+    def _check_branches(self, branches, prefix, around):
+        """Alternatives inside an unbounded repeat that can start with the same character
+
+        Two alternatives that can both match nothing are just as ambiguous when
+        the text around them (around) has to consume something: the parser
+        turns (a|a) into a(|), duplicate empty branches after a shared prefix.
+        """
+        firsts = [_first(branch) for branch in branches]
+        around_nullable = _first(around)[1]
+        for i in range(len(firsts)):
+            for j in range(i + 1, len(firsts)):
+                if firsts[i][1] and firsts[j][1] and not around_nullable:
+                    unit = _sample(around)
+                    self._add(('branch', id(branches)), 'high',
+                              f"duplicate or empty alternatives inside a repeat: either one can match each {unit!r}",
+                              prefix, [unit])
+                    return
+                overlap = firsts[i][0] & firsts[j][0]
+                if overlap:
+                    char = _pick(overlap)
+                    self._add(('branch', id(branches)), 'high',
+                              f"overlapping alternatives inside a repeat both match {char!r}",
+                              prefix, [char, _sample(branches[i]), _sample(branches[j])])
+                    return
+
+    def _check_adjacent(self, flat, prefix, top=False):
+        """Unbounded repeats in a row, only optional or mutually matchable text between them"""
+        for i, (op, av) in enumerate(flat):
+            if not _is_unbounded(op, av):
+                continue
+            left = _chars(av[2])
+            for j in range(i + 1, len(flat)):
+                other_op, other_av = flat[j]
+                if _is_unbounded(other_op, other_av) and left & _chars(other_av[2]):
+                    if top and _first(flat[j + 1:])[1]:
+                        # Nothing required after them: the match can't fail late and backtrack
+                        break
+                    char = _pick(left & _chars(other_av[2]))
+                    between = _sample(flat[i + 1:j])
+                    self._add(('adjacent', id(av), id(other_av)), 'medium',
+                              f"adjacent quantifiers {self._describe(op, av)} and {self._describe(other_op, other_av)} "
+                              f"can both match {char!r}: polynomial backtracking on lines that fail late",
+                              prefix + _sample(flat[:i]), [char, char + between])
+                    break
+                if not (_chars([flat[j]]) <= left or _first([flat[j]])[1]):
+                    break
+
+
+def analyze_pattern(pattern):
+    """Static check for constructs prone to catastrophic backtracking; returns a list of Findings"""
+    return _Analyzer(pattern).run()
+
+
+def _time_match(compiled, text):
+    started = time.perf_counter()
+    compiled.match(text)
+    return time.perf_counter() - started
+
+
+def fuzz_pattern(pattern, findings=None, budget=FUZZ_BUDGET, lengths=FUZZ_LENGTHS):
+    """Time the pattern on generated worst-case lines of growing length
+
+    Attack strings pump the characters the findings point at (or plain
+    common characters) behind a prefix that reaches them, followed by a
+    character that makes the match fail. Growth stops once a match takes
+    longer than budget, or once the next step, growing like the last one,
+    would take more than half of it. That margin keeps polynomial patterns,
+    whose growth rate holds steady, from reaching the budget on the longest
+    lines; exponential ones still blow through it within a step or two.
+    Growth is also compared with the line length: timings that rise faster
+    than length to the power MAX_POLYNOMIAL_DEGREE on two steps in a row mark
+    the pattern exponential.
+    """
+    compiled = re.compile(pattern)
+    if findings is None:
+        findings = analyze_pattern(pattern)
+    attacks = [(finding.prefix, unit) for finding in findings for unit in finding.units if unit]
+    attacks += [('', unit) for unit in ('a', ' ', '"', '0', '.', 'a ')]
+    worst, worst_length, exceeded, exponential = 0.0, 0, False, False
+    for prefix, unit in attacks:
+        for killer in KILLERS:
+            previous = None
+            previous_length = 0
+            steep_steps = 0
+            for count in lengths:
+                text = prefix + unit * count + killer
+                elapsed = _time_match(compiled, text)
+                if elapsed > worst:
+                    worst, worst_length = elapsed, len(text)
+                if previous and previous > GROWTH_NOISE_FLOOR:
+                    degree = math.log(elapsed / previous) / math.log(len(text) / previous_length)
+                    steep_steps = steep_steps + 1 if degree > MAX_POLYNOMIAL_DEGREE else 0
+                    exponential = exponential or steep_steps >= 2
+                if elapsed > budget:
+                    exceeded = True
+                    break
+                # Don't risk a next step that, growing like the last one, would come near the budget
+                if previous and elapsed > budget / 100 and elapsed * (elapsed / previous) > budget / 2:
+                    exceeded = True
+                    break
+                previous = max(elapsed, 1e-7)
+                previous_length = len(text)
+            if exceeded:
+                return FuzzResult(worst * 1e6, worst_length, True, exponential)
+    return FuzzResult(worst * 1e6, worst_length, False, exponential)
+
+
+class SafetyReport:
+    """Static findings plus fuzz timing for one pattern, and the resulting verdict
+
+    verdict is 'block' when a measured match took longer than
+    BLOCK_MICROSECONDS, or when either the analysis (a 'high' finding) or the
+    fuzz timings show exponential backtracking. It is 'warn' when there are
+    other findings, when the fuzz stopped because the next length was
+    projected to pass the budget, or when the worst case is above
+    WARN_MICROSECONDS. Otherwise it is 'ok'. A projection alone never blocks:
+    polynomial patterns such as the built-in apache_access grow steeply on
+    hostile lines but stay usable on real ones.
+    """
+
+    def __init__(self, pattern, findings, fuzz):
+        self.pattern = pattern
+        self.findings = findings
+        self.fuzz = fuzz
+
+    @property
+    def verdict(self):
+        if self.fuzz.worst_microseconds > BLOCK_MICROSECONDS or self.exponential:
+            return 'block'
+        if self.findings or self.fuzz.exceeded or self.fuzz.worst_microseconds > WARN_MICROSECONDS:
+            return 'warn'
+        return 'ok'
+
+    @property
+    def exponential(self):
+        return self.fuzz.exponential or any(finding.severity == 'high' for finding in self.findings)
+
+    def summary(self):
+        timing = f"worst case {self.fuzz.worst_microseconds:,.0f} µs/line on a {self.fuzz.length:,}-char line"
+        if self.fuzz.worst_microseconds > BLOCK_MICROSECONDS:
+            timing += ", past the time budget"
+        elif self.fuzz.exponential:
+            timing += " and growing exponentially with the line length"
+        elif self.fuzz.exceeded:
+            timing += " and growing toward the time budget on longer lines"
+        return timing
+
+    def to_dict(self):
+        return {
+            'verdict': self.verdict,
+            'worst_microseconds': round(self.fuzz.worst_microseconds, 1),
+            'length': self.fuzz.length,
+            'exceeded': self.fuzz.exceeded,
+            'exponential': self.fuzz.exponential,
+            'findings': [{'severity': finding.severity, 'message': finding.message} for finding in self.findings],
+        }
+
+
+def check_pattern(pattern):
+    """Analyze and fuzz a pattern; raises re.error if it doesn't compile"""
+    re.compile(pattern)
+    findings = analyze_pattern(pattern)
+    return SafetyReport(pattern, findings, fuzz_pattern(pattern, findings))
+
+
+def main(argv=None):
+    """Check every pattern in a regex file; exits with 1 if any should be blocked"""
+    arg_parser = argparse.ArgumentParser(description="Check regex patterns for catastrophic backtracking")
+    arg_parser.add_argument("--regex-file", default="regex.json", help="JSON file with regex patterns")
+    arg_parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = arg_parser.parse_args(argv)
+
+    with open(args.regex_file, 'r') as f:
+        patterns = json.load(f)
+    reports = {}
+    for name, pattern in patterns.items():
+        # regex_patterns.json style entries keep the pattern next to its timestamp format
+        if isinstance(pattern, dict):
+            pattern = pattern.get('pattern', '')
+        try:
+            reports[name] = check_pattern(pattern)
+        except re.error as e:
+            print(f"{name}: invalid pattern: {e}")
+
+    if args.json:
+        print(json.dumps({name: report.to_dict() for name, report in reports.items()}, indent=4))
+    else:
+        for name, report in reports.items():
+            print(f"{name}: {report.verdict.upper()} - {report.summary()}")
+            for finding in report.findings:
+                print(f"    [{finding.severity}] {finding.message}")
+    return 1 if any(report.verdict == 'block' for report in reports.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import os
+import time
+import signal
+import asyncio
+import argparse
+from collections import deque
+from contextlib import nullcontext
+
+from log_parser import DEFAULT_BATCH_SIZE, DEFAULT_MATCH_TIMEOUT, LogParser
+from writers import WRITERS, output_extension
+
+DEFAULT_PORT = 5514
+# Received lines held in memory before UDP input is dropped and TCP input paused
+DEFAULT_MAX_PENDING = 100000
+# Longest a received line waits before it is parsed and visible in the output
+DEFAULT_FLUSH_INTERVAL = 0.5
+# TCP reading resumes once the backlog drained below this share of max_pending
+RESUME_RATIO = 0.5
+
+
+def strip_priority(message):
+    """Drop the RFC 3164 <PRI> prefix, leaving 'Mmm dd hh:mm:ss host tag: text' for detection"""
+    if message.startswith('<'):
+        end = message.find('>', 1, 5)
+        if end > 1 and message[1:end].isdigit():
+            return message[end + 1:]
+    return message
+
+
+class SyslogReceiver:
+    """Collects syslog lines from the network and parses them in batches into one output
+
+    Lines are parsed through LogParser.parse_lines() (the same detection and
+    patterns as for files) and written with the streaming writers, appending
+    to the output when the format allows it. A batch is parsed once
+    batch_size lines are waiting or flush_interval seconds passed, and the
+    output is synced after every batch, which bounds the latency.
+
+    At most max_pending lines are queued: beyond that UDP datagrams are
+    dropped (and counted) while TCP connections stop being read until the
+    backlog halved, which pushes back on the senders.
+    """
+
+    def __init__(self, parser, output_name="network", max_pending=DEFAULT_MAX_PENDING,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.parser = parser
+        extension = output_extension(parser.writer_class, parser.output_compression)
+        self.output_file = os.path.join(parser.output_folder, f"{output_name}.{extension}")
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.pending = deque()
+        self.received = 0
+        self.dropped = 0
+        self.parsed = 0
+        self.line_number = 0
+        self._wakeup = asyncio.Event()
+        self._paused = set()
+        self._writer = None
+        parser.quarantine.source = output_name
+
+    def add_lines(self, lines):
+        """Queue received lines; returns False if the backlog is full"""
+        self.pending.extend(lines)
+        self.received += len(lines)
+        if len(self.pending) >= self.parser.batch_size:
+            self._wakeup.set()
+        return len(self.pending) < self.max_pending
+
+    def add_datagram(self, data):
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        text = data.decode('utf-8', errors='ignore')
+        self.add_lines([strip_priority(line) for line in text.splitlines() if line])
+
+    def pause(self, transport):
+        transport.pause_reading()
+        self._paused.add(transport)
+
+    def forget(self, transport):
+        self._paused.discard(transport)
+
+    def _resume_readers(self):
+        if self._paused and len(self.pending) <= self.max_pending * RESUME_RATIO:
+            for transport in self._paused:
+                if not transport.is_closing():
+                    transport.resume_reading()
+            self._paused.clear()
+
+    def _open_writer(self):
+        fieldnames = self.parser.schema_fieldnames()
+        append = self.parser.writer_class.supports_append and not self.parser.rolls_over
+        self._writer = self.parser._make_writer(self.output_file, fieldnames, append=append)
+
+    def process_pending(self):
+        """Parse and write everything queued so far"""
+        if not self.pending:
+            self._resume_readers()
+            return
+        if self._writer is None:
+            self._open_writer()
+        batch_size = self.parser.batch_size
+        while self.pending:
+            batch = [self.pending.popleft() for _ in range(min(batch_size, len(self.pending)))]
+            records = self.parser.parse_lines(batch, self.line_number + 1)
+            self._writer.write_many(records)
+            self.line_number += len(batch)
+            self.parsed += len(batch)
+        self._writer.sync()
+        self._resume_readers()
+
+    async def run(self, stopping):
+        """Parse batches until stopping is set, then drain the backlog and close the output"""
+        try:
+            while not stopping.is_set():
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                self.process_pending()
+            self.process_pending()
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+
+    def report(self):
+        return (f"Received {self.received} lines, parsed {self.parsed}, "
+                f"dropped {self.dropped} datagrams, quarantined {self.parser.quarantine.total}; "
+                f"output in {self.output_file}")
+
+
+class SyslogUDPProtocol(asyncio.DatagramProtocol):
+    """One syslog message (or several newline-separated ones) per datagram"""
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        self.receiver.add_datagram(data)
+
+
+class SyslogTCPProtocol(asyncio.Protocol):
+    """Syslog over TCP, framed by newlines or by RFC 6587 octet counts ('<len> <message>')"""
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+        self.transport = None
+        self.buffer = b''
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        if self.buffer:
+            self._emit([self.buffer])
+            self.buffer = b''
+        self.receiver.forget(self.transport)
+
+    def data_received(self, data):
+        self.buffer += data
+        frames = []
+        buffer = self.buffer
+        while buffer:
+            if buffer[:1].isdigit():
+                space = buffer.find(b' ', 0, 10)
+                if space > 0 and buffer[:space].isdigit():
+                    length = int(buffer[:space])
+                    end = space + 1 + length
+                    if len(buffer) < end:
+                        break
+                    frames.append(buffer[space + 1:end])
+                    buffer = buffer[end:]
+                    continue
+            newline = buffer.find(b'\n')
+            if newline == -1:
+                break
+            frames.append(buffer[:newline])
+            buffer = buffer[newline + 1:]
+        self.buffer = buffer
+        if frames and not self._emit(frames):
+            self.receiver.pause(self.transport)
+
+    def _emit(self, frames):
+        lines = []
+        for frame in frames:
+            line = frame.decode('utf-8', errors='ignore').rstrip('\r\n')
+            if line:
+                lines.append(strip_priority(line))
+        return self.receiver.add_lines(lines)
+
+
+async def serve(parser, host="0.0.0.0", udp_port=DEFAULT_PORT, tcp_port=DEFAULT_PORT, output_name="network",
+                max_pending=DEFAULT_MAX_PENDING, flush_interval=DEFAULT_FLUSH_INTERVAL, stopping=None):
+    """Listen on UDP and/or TCP until stopping is set (or SIGINT/SIGTERM); returns the receiver"""
+    loop = asyncio.get_running_loop()
+    stopping = stopping or asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    receiver = SyslogReceiver(parser, output_name, max_pending, flush_interval)
+    closers = []
+    if udp_port:
+        transport, _ = await loop.create_datagram_endpoint(lambda: SyslogUDPProtocol(receiver),
+                                                           local_addr=(host, udp_port))
+        closers.append(transport.close)
+        print(f"Listening for syslog on udp://{host}:{udp_port}")
+    if tcp_port:
+        server = await loop.create_server(lambda: SyslogTCPProtocol(receiver), host, tcp_port)
+        closers.append(server.close)
+        print(f"Listening for syslog on tcp://{host}:{tcp_port}")
+
+    started = time.monotonic()
+    try:
+        with parser.watchdog or nullcontext():
+            await receiver.run(stopping)
+    finally:
+        for close in closers:
+            close()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.remove_signal_handler(sig)
+            except (NotImplementedError, RuntimeError):
+                pass
+    elapsed = time.monotonic() - started
+    print(f"{receiver.report()} ({receiver.parsed / max(elapsed, 1e-9):.0f} lines/sec over {elapsed:.1f}s)")
+    if parser.quarantine.counts:
+        print(parser.quarantine.report(parser.match_timeout))
+    return receiver
+
+
+def main(argv=None):
+    """Run the syslog listener until SIGINT/SIGTERM"""
+    arg_parser = argparse.ArgumentParser(description="Receive syslog over UDP/TCP and parse it as it arrives")
+    arg_parser.add_argument("--host", default="0.0.0.0", help="Address to listen on")
+    arg_parser.add_argument("--udp-port", type=int, default=DEFAULT_PORT, help="UDP port (0 disables UDP)")
+    arg_parser.add_argument("--tcp-port", type=int, default=DEFAULT_PORT, help="TCP port (0 disables TCP)")
+    arg_parser.add_argument("--regex-file", default="regex.json", help="JSON file with regex patterns")
+    arg_parser.add_argument("--output-folder", default="oplogs", help="Folder for parsed output")
+    arg_parser.add_argument("--output-name", default="network", help="Output file name without extension")
+    arg_parser.add_argument("--output-format", choices=sorted(WRITERS), default="csv", help="Output file format")
+    arg_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                            help="Lines parsed and written per batch")
+    arg_parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                            help="Lines queued before UDP input is dropped and TCP input paused")
+    arg_parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL,
+                            help="Seconds a received line waits at most before it is parsed and written")
+    arg_parser.add_argument("--match-timeout", type=float, nargs='?', const=DEFAULT_MATCH_TIMEOUT, default=0,
+                            help="Seconds a line may spend in pattern matching before it is quarantined "
+                                 f"({DEFAULT_MATCH_TIMEOUT:g} if no value is given; off by default)")
+    args = arg_parser.parse_args(argv)
+
+    parser = LogParser(regex_file=args.regex_file, output_folder=args.output_folder, streaming=True,
+                       batch_size=args.batch_size, output_format=args.output_format,
+                       match_timeout=args.match_timeout)
+    asyncio.run(serve(parser, args.host, args.udp_port, args.tcp_port, args.output_name,
+                      args.max_pending, args.flush_interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import importlib.util
+import shutil
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+
+NGINX_LINES = [
+    '172.16.0.1 - - [01/Jan/2023:12:00:00 +0000] "GET /home HTTP/1.1" 200 1500 "-" "Mozilla/5.0"',
+    '172.16.0.2 - - [01/Jan/2023:12:00:01 +0000] "GET /api HTTP/1.1" 502 12 "-" "curl/8.0"',
+    '172.16.0.3 - - [01/Jan/2023:12:00:02 +0000] "GET /boom HTTP/1.1" 500 0 "-" "curl/8.0"',
+]
+SYSLOG_LINES = [
+    'Jan 22 16:14:23 web-server sshd[1203]: 192.168.1.195 Failed login attempt for user admin',
+    'Jan 22 16:15:45 web-server httpd[2456]: GET request to /secure-area denied',
+]
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """A log folder with mixed nginx/syslog lines, the repo's regex.json and an output folder"""
+    logs = tmp_path / 'logs'
+    logs.mkdir()
+    mixed = [line for pair in zip(NGINX_LINES, SYSLOG_LINES + ['not a log line']) for line in pair]
+    (logs / 'mixed.log').write_text('\n'.join(mixed) + '\n')
+    shutil.copy(REPO / 'regex.json', tmp_path / 'regex.json')
+    return tmp_path
+
+
+def parser_options(workspace, **kwargs):
+    options = {'log_folder': str(workspace / 'logs'), 'regex_file': str(workspace / 'regex.json'),
+               'output_folder': str(workspace / 'out')}
+    options.update(kwargs)
+    return options
+
+
+@pytest.fixture(scope='session')
+def enhanced_parse():
+    """code/parse.py, which can't be imported by name ('code' clashes with the stdlib module)"""
+    spec = importlib.util.spec_from_file_location('enhanced_parse', REPO / 'code' / 'parse.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,64 @@
+from log_parser import AdaptiveDetector, LogParser, PatternRegistry
+from tests.conftest import NGINX_LINES, REPO, SYSLOG_LINES, parser_options
+
+# Matched by the apache_access pattern, but the keyword heuristics only call
+# GET/POST requests apache_access
+DELETE_LINE = NGINX_LINES[0].replace('GET', 'DELETE')
+
+
+def detect(line):
+    return LogParser.detect_log_type(None, line)
+
+
+def detector(max_guesses=2):
+    registry = PatternRegistry(str(REPO / 'regex.json'))
+    registry.load()
+    return AdaptiveDetector(registry, max_guesses)
+
+
+def test_candidates_follow_the_last_and_most_frequent_types():
+    adaptive = detector()
+    assert adaptive.candidates() == []
+    for _ in range(3):
+        adaptive.record('apache_access', 'matched')
+    adaptive.record('syslog', 'matched')
+    adaptive.record('firewall', 'fallback')
+    assert adaptive.candidates() == ['syslog', 'apache_access']
+    adaptive.reset()
+    assert adaptive.candidates() == ['apache_access', 'syslog']
+
+
+def test_guess_reuses_the_match():
+    adaptive = detector()
+    assert adaptive.guess(SYSLOG_LINES[0], detect) == (None, None)
+    adaptive.record('syslog', 'matched')
+    log_type, match = adaptive.guess(SYSLOG_LINES[1], detect)
+    assert log_type == 'syslog' and match.group('hostname') == 'web-server'
+    assert adaptive.counters()['first_guess_hits'] == 1 and adaptive.detections == 2
+
+
+def test_adaptive_output_matches_the_regular_detection(workspace, capsys):
+    log = workspace / 'logs' / 'runs.log'
+    log.write_text('\n'.join(NGINX_LINES * 3 + SYSLOG_LINES * 3 + NGINX_LINES) + '\n')
+    LogParser(**parser_options(workspace)).process_all_logs()
+    expected = (workspace / 'out' / 'runs.csv').read_text()
+    LogParser(**parser_options(workspace, adaptive=True, workers=2, chunk_size=256)).process_all_logs()
+    assert (workspace / 'out' / 'runs.csv').read_text() == expected
+    assert 'Adaptive detection:' in capsys.readouterr().out
+
+
+def test_guess_is_refused_when_the_heuristics_disagree():
+    adaptive = detector()
+    adaptive.record('apache_access', 'matched')
+    assert adaptive.registry.get('apache_access').match(DELETE_LINE)
+    assert adaptive.guess(DELETE_LINE, detect) == (None, None)
+
+
+def test_adaptive_output_matches_where_patterns_overlap(workspace):
+    lines = NGINX_LINES[:2] + [DELETE_LINE] + NGINX_LINES[2:] + [DELETE_LINE.replace('DELETE', 'PUT')]
+    (workspace / 'logs' / 'overlap.log').write_text('\n'.join(lines) + '\n')
+    LogParser(**parser_options(workspace)).process_all_logs()
+    expected = (workspace / 'out' / 'overlap.csv').read_text()
+    LogParser(**parser_options(workspace, adaptive=True)).process_all_logs()
+    assert (workspace / 'out' / 'overlap.csv').read_text() == expected
+    assert 'nginx_access' in expected
@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('streamlit')
+import app  # noqa: E402
+
+
+def test_compiled_patterns_are_reused():
+    assert app.compile_pattern(r'(?P<word>\w+)') is app.compile_pattern(r'(?P<word>\w+)')
+
+
+def test_regex_file_is_read_again_only_once_edited(tmp_path):
+    regex_file = tmp_path / 'regex.json'
+    regex_file.write_text(json.dumps({'one': r'(?P<message>.*)'}))
+    manager = app.RegexManager(str(regex_file))
+    assert manager.load_regex_patterns() == {'one': r'(?P<message>.*)'}
+
+    # Same size and mtime: the cached patterns are kept without reading the file
+    stat = os.stat(regex_file)
+    regex_file.write_text(json.dumps({'two': r'(?P<message>.*)'}))
+    os.utime(regex_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert manager.load_regex_patterns() == {'one': r'(?P<message>.*)'}
+
+    os.utime(regex_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    patterns = manager.load_regex_patterns()
+    assert patterns == {'two': r'(?P<message>.*)'}
+    # Callers get their own copy to edit
+    patterns['three'] = r'(?P<ip>\S+)'
+    assert 'three' not in manager.load_regex_patterns()
+
+
+def test_validate_and_test_pattern():
+    manager = app.RegexManager()
+    assert manager.validate_regex('(unclosed')[0] is False
+    assert manager.test_regex_pattern(r'(?P<word>\w+)', 'hello') == (True, {'word': 'hello'})
+    assert manager.test_regex_pattern(r'\d+', 'abc') == (False, 'No match found')
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+import benchmark
+from tests.conftest import REPO
+
+
+def test_generator_is_reproducible_and_mixed(tmp_path):
+    lines = benchmark.SyntheticLogGenerator(benchmark.parse_mix('nginx_access=1,syslog=1'), seed=3).lines(200)
+    again = benchmark.SyntheticLogGenerator(benchmark.parse_mix('nginx_access=1,syslog=1'), seed=3).lines(200)
+    assert list(lines) == list(again)
+
+
+def test_unknown_format_is_refused():
+    with pytest.raises(ValueError):
+        benchmark.SyntheticLogGenerator({'nope': 1})
+
+
+def test_run_writes_results(tmp_path):
+    output = tmp_path / 'results.json'
+    benchmark.bench_parsers(500, regex_file=str(REPO / 'regex.json'), parsers=['LogParser'], output=str(output))
+    result = json.loads(output.read_text())['results']['LogParser']
+    assert result['lines'] == 500 and result['seconds'] > 0 and result['peak_rss_mb'] > 0
+
+
+def test_child_failing_without_a_result_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, 'CHILD_POLL_INTERVAL', 0.1)
+    with pytest.raises(RuntimeError, match='exit code 1'):
+        # The child can't find this parser and exits without putting a result
+        benchmark.run_benchmark('NoSuchParser', str(tmp_path), str(REPO / 'regex.json'), 1, 1)
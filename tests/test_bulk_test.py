@@ -0,0 +1,61 @@
+import bz2
+import gzip
+import time
+
+import pytest
+
+from tests.conftest import NGINX_LINES, SYSLOG_LINES
+
+pytest.importorskip('streamlit')
+import app  # noqa: E402
+
+PATTERN = r'(?P<ip>[\d.]+) - - \[(?P<timestamp>[^\]]+)\] "(?P<request>[^"]*)" (?P<status>\d{3})'
+TEXT = ('\n'.join(NGINX_LINES + SYSLOG_LINES) + '\r\n\n').encode()
+
+
+def finished(test, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not test.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert test.done
+    return test
+
+
+@pytest.mark.parametrize('compress', [None, gzip.compress, bz2.compress])
+def test_counts_lines_of_plain_and_compressed_uploads(compress):
+    data = compress(TEXT) if compress else TEXT
+    test = finished(app.BulkPatternTest(data, PATTERN))
+    assert test.error is None and test.stopped is None
+    assert (test.lines, test.matched) == (5, 3)
+    assert test.misses == SYSLOG_LINES
+    assert test.fill_rates()['status'] == 1.0
+    assert test.progress == 1.0
+    # The upload is let go once the test is over
+    assert test._data is None
+
+
+def test_carriage_returns_split_lines_like_the_parser():
+    test = finished(app.BulkPatternTest('\r'.join(NGINX_LINES).encode(), PATTERN))
+    assert (test.lines, test.matched) == (3, 3)
+
+
+def test_cancel_stops_the_test():
+    test = app.BulkPatternTest(TEXT * 200000, PATTERN)
+    test.cancel()
+    finished(test)
+    assert test.stopped == 'cancelled'
+    assert test.lines < 1000000
+
+
+def test_runaway_match_is_terminated_at_the_match_budget(monkeypatch):
+    monkeypatch.setattr(app, 'DEFAULT_MATCH_TIMEOUT', 0.2)
+    # Would backtrack for far longer than the test waits
+    data = b'\n'.join(NGINX_LINES[0].encode() for _ in range(3)) + b'\n' + b'a' * 40 + b'!\n'
+    test = finished(app.BulkPatternTest(data, r'(a+)+$'))
+    assert test.stopped.startswith('line 4 took')
+    assert test.error is None and test.lines <= 3
+
+
+def test_invalid_pattern_is_an_error():
+    test = finished(app.BulkPatternTest(TEXT, '(unclosed'))
+    assert test.error and test.done
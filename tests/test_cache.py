@@ -0,0 +1,76 @@
+import json
+
+from log_parser import LogParser
+from tests.conftest import parser_options
+
+# The syslog pattern with the process id read as a status, which lets syslog lines pass 'status >= 500'
+SYSLOG_WITH_STATUS = (r'(?P<timestamp>\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}) (?P<hostname>\S+) \w+\[(?P<status>\d+)\]: '
+                      r'(?P<message>.*)')
+
+
+def run(workspace, **kwargs):
+    LogParser(**parser_options(workspace, cache=True, **kwargs)).process_all_logs()
+    return (workspace / 'out' / 'mixed.csv').read_text()
+
+
+def edit_pattern(workspace, log_type, pattern):
+    regex_file = workspace / 'regex.json'
+    patterns = json.loads(regex_file.read_text())
+    patterns[log_type] = pattern
+    regex_file.write_text(json.dumps(patterns))
+
+
+def test_unchanged_file_is_skipped(workspace, capsys):
+    first = run(workspace)
+    assert run(workspace) == first
+    assert 'Skipping' in capsys.readouterr().out
+
+
+def test_pattern_edit_reparses(workspace, capsys):
+    run(workspace)
+    edit_pattern(workspace, 'syslog', SYSLOG_WITH_STATUS)
+    output = run(workspace)
+    assert 'pattern(s) changed for syslog' in capsys.readouterr().out
+    assert 'web-server' in output
+
+
+def test_pattern_edit_reparses_lines_the_filter_dropped(workspace, capsys):
+    first = run(workspace, filter_expression='status >= 500')
+    assert 'syslog' not in first
+    edit_pattern(workspace, 'syslog', SYSLOG_WITH_STATUS)
+    output = run(workspace, filter_expression='status >= 500')
+    assert 'Skipping' not in capsys.readouterr().out
+    assert 'syslog' in output
+
+
+def test_content_edit_reparses(workspace, capsys):
+    run(workspace)
+    log = workspace / 'logs' / 'mixed.log'
+    log.write_text(log.read_text().replace('/home', '/away'))
+    output = run(workspace)
+    assert 'Skipping' not in capsys.readouterr().out
+    assert '/away' in output and '/home' not in output
+
+
+def test_missing_output_reparses(workspace, capsys):
+    first = run(workspace)
+    (workspace / 'out' / 'mixed.csv').unlink()
+    assert run(workspace) == first
+    assert 'Skipping' not in capsys.readouterr().out
+
+
+def test_append_during_a_parallel_parse_reparses(workspace, monkeypatch):
+    log = workspace / 'logs' / 'mixed.log'
+    parse_chunks = LogParser._iter_parallel_chunks
+
+    def parse_then_append(self, log_files):
+        # The workers are done with the file before its output is written
+        chunks = list(parse_chunks(self, log_files))
+        with open(log, 'a') as f:
+            f.write('Jan 22 16:20:00 late-host sshd[99]: appended while parsing\n')
+        yield from chunks
+
+    monkeypatch.setattr(LogParser, '_iter_parallel_chunks', parse_then_append)
+    assert 'late-host' not in run(workspace, workers=2)
+    monkeypatch.undo()
+    assert 'late-host' in run(workspace, workers=2)
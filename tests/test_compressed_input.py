@@ -0,0 +1,49 @@
+import gzip
+import lzma
+
+import pytest
+
+from log_parser import LogParser, log_file_stem, read_log_lines
+from tests.conftest import parser_options
+
+
+@pytest.mark.parametrize('name, stem', [
+    ('access.log', 'access'),
+    ('access.log.1', 'access.1'),
+    ('access.log.2.gz', 'access.2'),
+    ('access.log.zst', 'access'),
+])
+def test_log_file_stem(name, stem):
+    assert log_file_stem(name) == stem
+
+
+def test_concatenated_gzip_members_are_all_read(tmp_path):
+    path = tmp_path / 'rotated.log.gz'
+    path.write_bytes(gzip.compress(b'first\n') + gzip.compress(b'second\n') + b'\x00' * 8)
+    assert list(read_log_lines(str(path))) == ['first\n', 'second\n']
+
+
+def test_truncated_gzip_is_an_error(tmp_path):
+    path = tmp_path / 'cut.log.gz'
+    path.write_bytes(gzip.compress(b'line\n' * 1000)[:-12])
+    with pytest.raises(EOFError):
+        list(read_log_lines(str(path)))
+
+
+def test_zstd_frames_are_all_read(tmp_path):
+    zstandard = pytest.importorskip('zstandard')
+    path = tmp_path / 'app.log.zst'
+    compressor = zstandard.ZstdCompressor()
+    path.write_bytes(compressor.compress(b'first\n') + compressor.compress(b'second\n'))
+    assert list(read_log_lines(str(path))) == ['first\n', 'second\n']
+
+
+def test_compressed_logs_parse_like_plain_ones(workspace):
+    LogParser(**parser_options(workspace)).process_all_logs()
+    expected = (workspace / 'out' / 'mixed.csv').read_text()
+    log = workspace / 'logs' / 'mixed.log'
+    # Judged by content, whatever the file is called
+    (workspace / 'logs' / 'mixed.log.1').write_bytes(lzma.compress(log.read_bytes()))
+    log.unlink()
+    LogParser(**parser_options(workspace, workers=2)).process_all_logs()
+    assert (workspace / 'out' / 'mixed.1.csv').read_text() == expected
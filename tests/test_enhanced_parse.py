@@ -0,0 +1,100 @@
+import re
+from datetime import datetime
+
+import pytest
+
+from tests.conftest import REPO
+
+
+@pytest.mark.parametrize('raw, timestamp_format', [
+    ('Jan 22 16:14:23', '%b %d %H:%M:%S'),
+    ('Aug  5 10:15:30', '%b %d %H:%M:%S'),
+    ('25/May/2023:10:15:32 +0000', '%d/%b/%Y:%H:%M:%S %z'),
+    ('2023-05-25 10:15:32', '%Y-%m-%d %H:%M:%S'),
+    ('2023-05-25T10:15:32.123Z', '%Y-%m-%dT%H:%M:%S.%fZ'),
+    ('2023-05-25 10:15', '%Y-%m-%d %H:%M'),
+])
+def test_fast_parsers_match_strptime(enhanced_parse, raw, timestamp_format):
+    normalizer = enhanced_parse.TimestampNormalizer()
+    expected = datetime.strptime(raw, timestamp_format).strftime(normalizer.DEFAULT_OUTPUT)
+    assert normalizer.normalize(raw, timestamp_format) == expected
+
+
+@pytest.mark.parametrize('output_format, expected', [
+    ('iso', '2023-05-25T10:15:32'),
+    ('epoch', '1685009732'),
+    ('%d.%m.%Y', '25.05.2023'),
+])
+def test_output_formats(enhanced_parse, output_format, expected):
+    normalizer = enhanced_parse.TimestampNormalizer(output_format)
+    assert normalizer.normalize('2023-05-25 10:15:32', '%Y-%m-%d %H:%M:%S') == expected
+
+
+def test_invalid_timestamps_raise_a_fresh_error_each_time(enhanced_parse):
+    normalizer = enhanced_parse.TimestampNormalizer()
+    errors = []
+    for _ in range(3):
+        with pytest.raises(ValueError, match='does not match format') as raised:
+            normalizer.normalize('not a time', '%Y-%m-%d %H:%M:%S')
+        errors.append(raised.value)
+    assert errors[0] is not errors[1]
+    # The cached failure doesn't carry tracebacks from earlier raises along
+    assert len(list(_frames(errors[2].__traceback__))) == len(list(_frames(errors[0].__traceback__)))
+
+
+def _frames(traceback):
+    while traceback is not None:
+        yield traceback
+        traceback = traceback.tb_next
+
+
+def test_combined_matcher_detects_and_captures(enhanced_parse):
+    matcher = enhanced_parse.CombinedPatternMatcher({
+        'numbered': r'(?P<word>\w+) (\w+) \2',
+        'kv': r'(?P<key>\w+)=(?P<value>\w+)',
+    })
+    assert matcher.match('a=b') == ('kv', {'key': 'a', 'value': 'b'})
+    assert matcher.match('x yy yy') == ('numbered', {'word': 'x'})
+    assert matcher.match('nothing') == (None, None)
+
+
+def test_combined_matcher_keeps_registration_order(enhanced_parse):
+    patterns = {
+        'repeated': r'(?P<word>\w+)-(?P=word)',
+        'flagged': r'(?i)(?P<level>error): (?P<message>.*)',
+        'any': r'(?P<message>.+)',
+    }
+    matcher = enhanced_parse.CombinedPatternMatcher(patterns)
+    assert matcher.match('ab-ab') == ('repeated', {'word': 'ab'})
+    assert matcher.match('ERROR: disk full') == ('flagged', {'level': 'ERROR', 'message': 'disk full'})
+    assert matcher.match('ab-cd') == ('any', {'message': 'ab-cd'})
+    # Whatever it merged, each line gets the type a pattern-by-pattern scan would give
+    for line in ('ab-ab', 'Error: x', 'plain'):
+        expected = next(log_type for log_type, pattern in patterns.items() if re.match(pattern, line))
+        assert matcher.match(line)[0] == expected
+
+
+def test_profiled_run_uses_the_shared_stats(enhanced_parse, workspace):
+    from log_parser import ParseStats
+
+    parser = enhanced_parse.EnhancedLogParser(str(REPO / 'regex_patterns.json'), profile=True)
+    parser.process_logs(str(workspace / 'logs'), str(workspace / 'out'))
+    assert isinstance(parser.stats, ParseStats)
+    assert parser.stats.lines_read == 6
+    counted = sum(counters[outcome] for counters in parser.stats.log_types.values() for outcome in ParseStats.OUTCOMES)
+    assert counted == 6
+    assert set(parser.stats.stage_ns) == set(ParseStats.STAGES)
+
+
+def test_adaptive_matcher_agrees_with_the_combined_scan(enhanced_parse):
+    # 'any' overlaps both and 'method' also matches the DELETE line, but each loses to the earlier 'get'
+    matcher = enhanced_parse.CombinedPatternMatcher({
+        'get': r'(?P<method>GET) (?P<path>\S+)',
+        'method': r'(?P<method>[A-Z]+) (?P<path>\S+)',
+        'any': r'(?P<text>.+)',
+    })
+    adaptive = enhanced_parse.AdaptiveMatcher(matcher, max_guesses=2)
+    lines = ['DELETE /a', 'DELETE /b', 'GET /c', 'hello', 'GET /d', 'PUT /e', 'hello', 'DELETE /f', 'GET /g']
+    assert [adaptive.match(line) for line in lines] == [matcher.match(line) for line in lines]
+    assert adaptive.guess_hits > 0
+    assert adaptive.candidates()[0] == 'get' and set(adaptive.hits) == {'get', 'method', 'any'}
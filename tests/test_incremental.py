@@ -0,0 +1,46 @@
+import csv
+import json
+
+from log_parser import CHECKPOINT_FILE, LogParser
+from tests.conftest import NGINX_LINES, SYSLOG_LINES, parser_options
+
+
+def run(workspace):
+    LogParser(**parser_options(workspace, incremental=True)).process_all_logs()
+    with open(workspace / 'out' / 'app.csv', newline='') as f:
+        return [(int(row['line_number']), row['message']) for row in csv.DictReader(f)]
+
+
+def test_appends_only_new_complete_lines(workspace, capsys):
+    log = workspace / 'logs' / 'app.log'
+    log.write_text(SYSLOG_LINES[0] + '\n')
+    assert [number for number, _ in run(workspace)] == [1]
+    # The line without its newline yet waits for the next run
+    with open(log, 'a') as f:
+        f.write(NGINX_LINES[0] + '\n' + SYSLOG_LINES[1])
+    assert [number for number, _ in run(workspace)] == [1, 2]
+    with open(log, 'a') as f:
+        f.write('\n')
+    rows = run(workspace)
+    assert [number for number, _ in rows] == [1, 2, 3]
+    assert rows[2][1] == 'GET request to /secure-area denied'
+    checkpoint = json.loads((workspace / 'out' / CHECKPOINT_FILE).read_text())[str(log)]
+    assert (checkpoint['offset'], checkpoint['line_number']) == (log.stat().st_size, 3)
+
+
+def test_truncated_file_is_parsed_again(workspace):
+    log = workspace / 'logs' / 'app.log'
+    log.write_text('\n'.join(SYSLOG_LINES) + '\n')
+    assert len(run(workspace)) == 2
+    log.write_text(NGINX_LINES[0] + '\n')
+    assert run(workspace) == [(1, 'Mozilla/5.0')]
+
+
+def test_rewritten_head_is_parsed_again(workspace):
+    log = workspace / 'logs' / 'app.log'
+    log.write_text(SYSLOG_LINES[0] + '\n')
+    run(workspace)
+    # Same size or larger, but not the same file any more
+    log.write_text(SYSLOG_LINES[0].replace('Jan', 'Feb') + '\n' + SYSLOG_LINES[1] + '\n')
+    assert [number for number, _ in run(workspace)] == [1, 2]
+    assert 'Feb 22' in (workspace / 'out' / 'app.csv').read_text()
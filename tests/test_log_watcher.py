@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from log_parser import LogParser
+from log_watcher import InotifyWatcher, LogWatcher, PollingWatcher
+from tests.conftest import NGINX_LINES, SYSLOG_LINES, parser_options
+
+
+def open_inotify(folder):
+    try:
+        return InotifyWatcher(folder)
+    except OSError as e:
+        pytest.skip(f"inotify unavailable: {e}")
+
+
+@pytest.mark.parametrize('open_watcher', [open_inotify, lambda folder: PollingWatcher(folder, 0.01)])
+def test_watchers_report_changed_log_files(tmp_path, open_watcher):
+    watcher = open_watcher(str(tmp_path))
+    try:
+        (tmp_path / 'app.log').write_text('line\n')
+        (tmp_path / 'notes.txt').write_text('ignored\n')
+        assert watcher.wait(2.0, debounce=0.01) == {'app.log'}
+        assert watcher.wait(0.05, debounce=0.01) == set()
+    finally:
+        watcher.close()
+
+
+def test_needs_an_incremental_parser(workspace):
+    with pytest.raises(ValueError):
+        LogWatcher(LogParser(**parser_options(workspace)))
+
+
+@pytest.mark.parametrize('use_inotify', [True, False])
+def test_run_keeps_the_output_up_to_date(workspace, use_inotify):
+    (workspace / 'logs' / 'mixed.log').unlink()
+    log = workspace / 'logs' / 'app.log'
+    log.write_text(SYSLOG_LINES[0] + '\n')
+    output = workspace / 'out' / 'app.csv'
+    parser = LogParser(**parser_options(workspace, incremental=True))
+    daemon = LogWatcher(parser, use_inotify=use_inotify, poll_interval=0.01, debounce=0.01, rescan_interval=5.0)
+
+    def append_then_stop():
+        deadline = time.monotonic() + 5
+        while not output.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        with open(log, 'a') as f:
+            f.write(NGINX_LINES[0] + '\n')
+        while output.read_text().count('\n') < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        daemon.stop()
+
+    writer = threading.Thread(target=append_then_stop)
+    writer.start()
+    # Signal handlers can only be installed from the main thread, so the daemon runs here
+    daemon.run()
+    writer.join()
+    lines = output.read_text().splitlines()
+    assert len(lines) == 3 and lines[2].startswith('2,')
@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+import output_reader
+from log_parser import LogParser
+from output_reader import ResultFilter, list_outputs, open_output, output_kind
+from tests.conftest import NGINX_LINES, SYSLOG_LINES, parser_options
+
+FORMATS = [
+    {'output_format': 'csv'},
+    {'output_format': 'csv', 'output_compression': 'gzip'},
+    {'output_format': 'jsonl'},
+    {'output_format': 'parquet'},
+    {'output_format': 'arrow'},
+    {'output_format': 'sqlite'},
+]
+# Filters and the positions in every cycle of five input lines (three nginx, two syslog) they keep
+FILTERS = [
+    ({}, {1, 2, 3, 4, 5}),
+    ({'status': '500'}, {3}),
+    ({'log_types': ['syslog']}, {4, 5}),
+    ({'ip': '172.16.0.2'}, {2}),
+    ({'start': '2023-01-01 12:00:01', 'end': '2023-01-01 12:00:02'}, {2, 3}),
+]
+
+
+@pytest.fixture
+def output(workspace, request, monkeypatch):
+    monkeypatch.setattr(output_reader, 'INDEX_BLOCK_ROWS', 4)
+    log = workspace / 'logs' / 'mixed.log'
+    log.write_text('\n'.join((NGINX_LINES + SYSLOG_LINES) * 5) + '\n')
+    LogParser(**parser_options(workspace, batch_size=4, **request.param)).process_all_logs()
+    [path] = list_outputs(str(workspace / 'out'))
+    return open_output(path)
+
+
+def all_pages(reader, result_filter, page_size):
+    frames, page, more = [], 0, True
+    while more:
+        frame, more = reader.page(result_filter, page, page_size)
+        frames.append(frame)
+        page += 1
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.mark.parametrize('output', FORMATS, indirect=True, ids=lambda options: '-'.join(options.values()))
+@pytest.mark.parametrize('criteria, positions', FILTERS)
+def test_pages_add_up_to_the_filtered_rows(output, criteria, positions):
+    result_filter = ResultFilter(**criteria)
+    expected = [number for number in range(1, 26) if (number - 1) % 5 + 1 in positions]
+    pages = {}
+    for page_size in (1, 3, 50):
+        pages[page_size] = list(all_pages(output, result_filter, page_size)['line_number'].astype(int))
+    # SQLite outputs come table by table, the others in line order
+    assert sorted(pages[50]) == expected
+    assert pages[1] == pages[3] == pages[50]
+    assert output.count(result_filter) == len(expected)
+
+
+def test_mask():
+    rows = pd.DataFrame({'log_type': ['syslog', 'nginx_access'], 'ip': ['N/A', '10.0.0.1'], 'status': [None, '500'],
+                         'timestamp': ['Jan 22 16:14:23', '01/Jan/2023:12:00:00 +0000']})
+    assert list(ResultFilter(status='500').mask(rows)) == [False, True]
+    assert list(ResultFilter(start='2023-01-01T11:00:00+00:00').mask(rows)) == [False, True]
+
+
+@pytest.mark.parametrize('name, kind', [
+    ('app.csv', ('csv', None)),
+    ('app.part-0001.jsonl.zst', ('jsonl', 'zstd')),
+    ('app.sqlite', ('sqlite', None)),
+    ('app.parquet.gz', None),
+    ('.checkpoints.json', None),
+])
+def test_output_kind(name, kind):
+    assert output_kind(name) == kind
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from log_parser import LogParser, ParseStats
+from tests.conftest import parser_options
+
+
+@pytest.mark.parametrize('options', [{}, {'workers': 2, 'chunk_size': 64}])
+def test_stats_file_counts_every_line(workspace, options):
+    stats_file = workspace / 'stats.json'
+    parser = LogParser(**parser_options(workspace, stats_file=str(stats_file), **options))
+    parser.process_all_logs()
+    stats = json.loads(stats_file.read_text())
+    assert stats['lines_read'] == 6 and stats['empty_lines'] == 0
+    outcomes = {log_type: {outcome: counters[outcome] for outcome in ParseStats.OUTCOMES if counters[outcome]}
+                for log_type, counters in stats['log_types'].items()}
+    assert outcomes == {'apache_access': {'matched': 3}, 'syslog': {'matched': 2}, 'unknown': {'unknown': 1}}
+    assert set(stats['stage_ns']) == set(ParseStats.STAGES)
+
+
+def test_profiled_output_matches_the_plain_one(workspace, capsys):
+    LogParser(**parser_options(workspace)).process_all_logs()
+    expected = (workspace / 'out' / 'mixed.csv').read_text()
+    LogParser(**parser_options(workspace, profile=True)).process_all_logs()
+    assert (workspace / 'out' / 'mixed.csv').read_text() == expected
+    assert 'Lines read: 6 (0 empty)' in capsys.readouterr().out
+
+
+def test_stats_are_off_by_default(workspace):
+    assert LogParser(**parser_options(workspace)).stats is None
+
+
+def test_merge_adds_up():
+    first, second = ParseStats(), ParseStats()
+    first.add_line('syslog', 'matched', 10, 20)
+    second.add_line('syslog', 'fallback', 1, 2)
+    second.add_line('nginx_access', 'matched', 0, 0)
+    second.lines_read = 7
+    first.merge(second)
+    assert first.lines_read == 7
+    assert first.log_types['syslog']['matched'] == 1 and first.log_types['syslog']['fallback'] == 1
+    assert first.stage_ns['detect'] == 11 and first.stage_ns['parse'] == 22
+    assert first.log_types['nginx_access']['matched'] == 1
@@ -0,0 +1,48 @@
+import re
+
+import pytest
+
+from log_parser import LogParser, PatternRegistry, project_pattern
+from tests.conftest import parser_options
+
+
+@pytest.mark.parametrize('pattern, keep, expected', [
+    (r'(?P<a>\w+) (?P<b>\w+)', {'a'}, r'(?P<a>\w+) (?:\w+)'),
+    # Character classes and escaped parentheses aren't groups
+    (r'(?P<a>[(?P<x>])\((?P<b>\d)', {'b'}, r'(?:[(?P<x>])\((?P<b>\d)'),
+    (r'(?P<a>[]x])(?P<b>.)', set(), r'(?:[]x])(?:.)'),
+    # Groups referred to by name keep capturing
+    (r'(?P<q>["\'])(?P<v>.*?)(?P=q)', {'v'}, r'(?P<q>["\'])(?P<v>.*?)(?P=q)'),
+    (r'(?P<o><)?(?P<v>\w+)(?(o)>)', set(), r'(?P<o><)?(?:\w+)(?(o)>)'),
+    # Numbered references would point at other groups once any group stops capturing
+    (r'(?P<a>\w+) (?P<b>\w+) \2', {'b'}, r'(?P<a>\w+) (?P<b>\w+) \2'),
+    (r'(?P<a><)?(?P<b>\w+)(?(1)>)', {'b'}, r'(?P<a><)?(?P<b>\w+)(?(1)>)'),
+    (r'(?P<a>\w)\0(?P<b>\w)', {'b'}, r'(?:\w)\0(?P<b>\w)'),
+])
+def test_project_pattern(pattern, keep, expected):
+    assert project_pattern(pattern, keep) == expected
+
+
+def test_projected_patterns_match_the_same_lines():
+    pattern = r'(?P<a>\w+) (?P<b>\w+) \2 (?P<c>\d+)'
+    line = 'x yy yy 42'
+    original = re.compile(pattern).match(line)
+    projected = re.compile(project_pattern(pattern, {'c'})).match(line)
+    assert projected is not None and projected['c'] == original['c']
+
+
+def test_registry_compiles_projected_patterns(tmp_path):
+    regex_file = tmp_path / 'regex.json'
+    regex_file.write_text('{"kv": "(?P<ip>\\\\S+) (?P<key>\\\\w+)=(?P<message>\\\\w+)"}')
+    registry = PatternRegistry(str(regex_file), keep_groups={'message'})
+    compiled = registry.load()['kv']
+    assert list(compiled.groupindex) == ['message']
+    assert compiled.match('1.2.3.4 k=v')['message'] == 'v'
+
+
+def test_fields_limit_records(workspace):
+    parser = LogParser(**parser_options(workspace, fields=['line_number', 'status']))
+    records = parser.parse_log_file(str(workspace / 'logs' / 'mixed.log'))
+    assert records[0] == {'line_number': 1, 'status': '200'}
+    # Syslog lines don't capture a status
+    assert records[1] == {'line_number': 2}
@@ -0,0 +1,79 @@
+import json
+import signal
+
+import pytest
+
+from log_parser import CACHE_MANIFEST_FILE, LogParser, QUARANTINE_FILE
+from tests.conftest import NGINX_LINES, parser_options
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, 'setitimer'), reason="the match watchdog needs SIGALRM")
+
+# Nested quantifiers that backtrack exponentially on a run of word characters with no match at the end
+HOSTILE_SYSLOG = r'(?P<timestamp>\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}) (?P<message>(\w+\s?)*)$'
+HOSTILE_LINE = 'Jan  1 00:00:00 ' + 'a' * 40 + '!'
+
+
+@pytest.fixture
+def hostile(workspace):
+    regex_file = workspace / 'regex.json'
+    patterns = json.loads(regex_file.read_text())
+    patterns['syslog'] = HOSTILE_SYSLOG
+    regex_file.write_text(json.dumps(patterns))
+    (workspace / 'logs' / 'mixed.log').write_text('\n'.join([NGINX_LINES[0], HOSTILE_LINE, NGINX_LINES[1]]) + '\n')
+    return workspace
+
+
+def quarantined(workspace):
+    with open(workspace / 'out' / QUARANTINE_FILE) as f:
+        return [json.loads(line) for line in f]
+
+
+def run(workspace, **kwargs):
+    parser = LogParser(**parser_options(workspace, match_timeout=0.05, **kwargs))
+    parser.process_all_logs()
+    return parser
+
+
+def test_runaway_line_is_quarantined(hostile):
+    parser = run(hostile)
+    assert parser.quarantine.counts == {'syslog': 1}
+    entries = quarantined(hostile)
+    assert [(entry['line_number'], entry['pattern'], entry['line']) for entry in entries] == [
+        (2, 'syslog', HOSTILE_LINE)]
+    output = (hostile / 'out' / 'mixed.csv').read_text()
+    assert '172.16.0.2' in output and 'aaaa' not in output
+
+
+def test_reparsing_replaces_the_file_entries(hostile):
+    run(hostile)
+    run(hostile)
+    assert len(quarantined(hostile)) == 1
+
+
+def test_workers_quarantine_with_file_line_numbers(hostile):
+    run(hostile, workers=2, chunk_size=64)
+    assert [entry['line_number'] for entry in quarantined(hostile)] == [2]
+
+
+def test_quarantined_pattern_is_a_cache_dependency(hostile):
+    run(hostile, cache=True)
+    manifest = json.loads((hostile / 'out' / CACHE_MANIFEST_FILE).read_text())
+    entry = next(iter(manifest.values()))
+    assert 'syslog' in entry['patterns']
+
+
+def test_watchdog_is_off_by_default(workspace):
+    assert LogParser(**parser_options(workspace)).watchdog is None
+
+
+def test_an_error_in_a_guarded_line_leaves_no_line_current(workspace, monkeypatch):
+    parser = LogParser(**parser_options(workspace, match_timeout=0.05))
+
+    def fail(line, line_num):
+        raise ValueError(line_num)
+
+    monkeypatch.setattr(parser, 'parse_line', fail)
+    with parser.watchdog:
+        with pytest.raises(ValueError):
+            list(parser.parse_lines(NGINX_LINES))
+        assert parser.watchdog.current is None
@@ -0,0 +1,68 @@
+import bz2
+import gzip
+
+import pytest
+
+from log_parser import LogParser, iter_mmap_lines, iter_text_lines, read_log_lines, split_into_chunks
+from tests.conftest import NGINX_LINES, SYSLOG_LINES, parser_options
+
+MIXED_NEWLINES = (NGINX_LINES[0] + '\r\n' + SYSLOG_LINES[0] + '\r' + NGINX_LINES[1] + '\n\n'
+                  + SYSLOG_LINES[1] + '\r\r' + NGINX_LINES[2] + '\r\n')
+
+
+def stripped(lines):
+    return [line.strip() for line in lines]
+
+
+@pytest.fixture
+def crlf_log(workspace):
+    path = workspace / 'logs' / 'mixed.log'
+    path.write_bytes(MIXED_NEWLINES.encode('utf-8'))
+    return path
+
+
+def test_mmap_splits_lines_like_text_mode(crlf_log):
+    expected = stripped(iter_text_lines(crlf_log))
+    assert len(expected) == 7
+    assert stripped(iter_mmap_lines(crlf_log)) == expected
+    # Small blocks cut the mapping at many places
+    assert stripped(iter_mmap_lines(crlf_log, block_size=16)) == expected
+
+
+def test_chunks_cover_the_file(crlf_log):
+    chunks = split_into_chunks(crlf_log, chunk_size=50)
+    assert chunks[0][0] == 0 and chunks[-1][1] == crlf_log.stat().st_size
+    assert all(end == start for (_, end), (start, _) in zip(chunks, chunks[1:]))
+    lines = [line for start, end in chunks for line in iter_mmap_lines(crlf_log, start, end)]
+    assert stripped(lines) == stripped(iter_text_lines(crlf_log))
+
+
+@pytest.mark.parametrize('compress, suffix', [(gzip.compress, '.gz'), (bz2.compress, '.bz2')])
+def test_compressed_files_read_like_plain_ones(crlf_log, compress, suffix):
+    compressed = crlf_log.with_name(crlf_log.name + suffix)
+    compressed.write_bytes(compress(crlf_log.read_bytes()))
+    assert stripped(read_log_lines(str(compressed))) == stripped(iter_text_lines(crlf_log))
+
+
+@pytest.mark.parametrize('reader', ['text', 'mmap'])
+def test_workers_number_lines_like_a_serial_parse(workspace, crlf_log, reader):
+    serial = LogParser(**parser_options(workspace, reader=reader)).parse_log_file(str(crlf_log))
+    parallel = LogParser(**parser_options(workspace, workers=2, chunk_size=64))
+    chunks = parallel._iter_parallel_chunks([str(crlf_log)])
+    records = [record for _, chunk_records in chunks for record in chunk_records]
+    assert [record['line_number'] for record in records] == [record['line_number'] for record in serial]
+    assert records == serial
+
+
+@pytest.mark.parametrize('content', [b'', b'\n\n', b'no newline at the end', b'caf\xc3\xa9\n\xff\xfebad bytes\nlast'])
+def test_mmap_edge_cases_read_like_text_mode(tmp_path, content):
+    path = tmp_path / 'edge.log'
+    path.write_bytes(content)
+    assert stripped(iter_mmap_lines(path, block_size=4)) == stripped(iter_text_lines(path))
+
+
+def test_mmap_reader_gives_the_same_output(workspace):
+    LogParser(**parser_options(workspace)).process_all_logs()
+    expected = (workspace / 'out' / 'mixed.csv').read_text()
+    LogParser(**parser_options(workspace, reader='mmap')).process_all_logs()
+    assert (workspace / 'out' / 'mixed.csv').read_text() == expected
@@ -0,0 +1,103 @@
+import re
+
+import pytest
+
+from log_parser import LogParser
+from record_filter import RecordFilter
+from tests.conftest import parser_options
+
+SYSLOG = re.compile(r'(?P<timestamp>\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}) (?P<host>\S+) (?P<ip>\d+\.\d+\.\d+\.\d+)? ?'
+                    r'(?P<message>.*)')
+SYSLOG_LINE = 'Jan 22 16:14:23 web-server Failed login attempt'
+SYSLOG_RECORD = {'log_type': 'syslog', 'timestamp': 'Jan 22 16:14:23', 'host': 'web-server', 'ip': None,
+                 'message': 'Failed login attempt'}
+
+
+def evaluate(expression, log_type='syslog', pattern=SYSLOG, line=SYSLOG_LINE, line_num=1):
+    record_filter = RecordFilter(expression)
+    match = pattern.match(line) if pattern is not None else None
+    return record_filter.accepts(log_type, pattern, match, line, line_num)
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ("log_type == 'syslog'", True),
+    ("log_type in ('nginx_access', 'apache_access')", False),
+    ("'login' in message", True),
+    ("'login' not in message", False),
+    ("line_number >= 1", True),
+    # status isn't captured by the pattern: numeric tests on it are false, and only those
+    ("status >= 500", False),
+    ("not status >= 500", True),
+    ("status >= 500 or log_type == 'syslog'", True),
+    ("status in (500, 502) or host == 'web-server'", True),
+    # ip is an optional group that didn't take part in the match
+    ("ip in ('10.0.0.1',) or 'login' in message", True),
+    ("ip > '1' or log_type == 'syslog'", True),
+    ("not ip < '9'", True),
+    ("'v' < host < 'x'", True),
+    ("'a' < host < 'b'", False),
+])
+def test_accepts(expression, expected):
+    assert evaluate(expression) is expected
+
+
+@pytest.mark.parametrize('expression', [
+    "status >= 500 or log_type == 'syslog'",
+    "not status >= 500",
+    "ip in ('10.0.0.1',) or 'login' in message",
+    "not ip < '9' and host != 'db'",
+    "status in (500, 502) or line_number == 1",
+])
+def test_records_agree_with_matches(expression):
+    record_filter = RecordFilter(expression)
+    expected = record_filter.accepts('syslog', SYSLOG, SYSLOG.match(SYSLOG_LINE), SYSLOG_LINE, 1)
+    assert record_filter.accepts_record(dict(SYSLOG_RECORD, line_number=1)) is expected
+
+
+def test_fallback_lines_use_defaults():
+    assert evaluate("ip == 'N/A' and message == 'garbage'", pattern=None, line='garbage')
+    assert not evaluate("status >= 500", pattern=None, line='garbage')
+
+
+@pytest.mark.parametrize('expression', [
+    "__import__('os')",
+    "message.upper() == 'X'",
+    "_number == 1",
+    "status + 1 > 2",
+    "status >=",
+])
+def test_rejects_unsupported_expressions(expression):
+    with pytest.raises(ValueError):
+        RecordFilter(expression)
+
+
+def test_required_text():
+    record_filter = RecordFilter("'timeout' in message and method in ('GET', 'HEAD') and status >= 500")
+    assert record_filter.required == ['timeout']
+    assert record_filter.alternatives == [('GET', 'HEAD')]
+    assert not record_filter.prefilter('GET / took forever')
+    assert record_filter.prefilter('GET / timeout')
+    # 'N/A' is what ip defaults to, so it needn't be in the line
+    assert RecordFilter("ip == 'N/A'").required == []
+
+
+def test_allows_type_counts_rejected_lines():
+    record_filter = RecordFilter("log_type == 'syslog' and status >= 500")
+    assert record_filter.allows_type('syslog')
+    assert not record_filter.allows_type('nginx_access', lines=3)
+    assert record_filter.counters() == {'prefiltered': 0, 'rejected': 3}
+
+
+@pytest.mark.parametrize('expression', [
+    "status >= 500 or log_type == 'syslog'",
+    "not status >= 500",
+    "not (status >= 500 or 'login' in message)",
+    "ip in ('192.168.1.195',) or status == 200",
+])
+def test_parsing_with_a_filter_keeps_the_records_it_accepts(workspace, expression):
+    log_file = str(workspace / 'logs' / 'mixed.log')
+    filtered = LogParser(**parser_options(workspace, filter_expression=expression)).parse_log_file(log_file)
+    every = LogParser(**parser_options(workspace)).parse_log_file(log_file)
+    record_filter = RecordFilter(expression)
+    assert filtered == [record for record in every if record_filter.accepts_record(record)]
+    assert filtered
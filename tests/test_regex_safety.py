@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from regex_safety import (BLOCK_MICROSECONDS, WARN_MICROSECONDS, Finding, FuzzResult, SafetyReport, analyze_pattern,
+                          check_pattern, fuzz_pattern, main)
+from tests.conftest import REPO
+
+HIGH = Finding('high', 'nested quantifier', '', ('a',))
+MEDIUM = Finding('medium', 'adjacent quantifiers', '', ('a',))
+
+
+def severities(pattern):
+    return sorted({finding.severity for finding in analyze_pattern(pattern)})
+
+
+@pytest.mark.parametrize('pattern, expected', [
+    (r'(\w+\s?)*$', ['high']),
+    (r'(a+)+b', ['high']),
+    (r'(\d+)+x', ['high']),
+    (r'(?:\d+|\w)*x', ['high']),
+    # The parser turns duplicate alternatives into a shared prefix and empty branches
+    (r'(a|a)*b', ['high']),
+    (r'(?:a|a)+!', ['high']),
+    (r'(a|ab?)*c', ['high']),
+    (r'(?:a?|b?)*c', []),
+    (r'(a|ab)*c', []),
+    (r'(?P<path>\S+)\s*(?P<protocol>\S*)"', ['medium']),
+    (r'(?:\d+,)+x', []),
+    (r'(?P<ip>\d{1,3}(?:\.\d{1,3}){3}) (?P<message>.*)', []),
+    # Possessive repeats don't give back what they matched
+    (r'(?:\w++\s?)*+$', []),
+])
+def test_analyze_pattern(pattern, expected):
+    assert severities(pattern) == expected
+
+
+@pytest.mark.parametrize('findings, fuzz, verdict', [
+    ([], FuzzResult(5, 100, False, False), 'ok'),
+    ([], FuzzResult(WARN_MICROSECONDS + 1, 100, False, False), 'warn'),
+    ([MEDIUM], FuzzResult(5, 100, False, False), 'warn'),
+    # Only projected to pass the budget on a longer line: a warning
+    ([MEDIUM], FuzzResult(BLOCK_MICROSECONDS / 2, 2000, True, False), 'warn'),
+    ([], FuzzResult(BLOCK_MICROSECONDS + 1, 2000, True, False), 'block'),
+    ([HIGH], FuzzResult(5, 100, False, False), 'block'),
+    # Growing faster than polynomially, though no single line passed the budget yet
+    ([], FuzzResult(BLOCK_MICROSECONDS / 4, 19, True, True), 'block'),
+])
+def test_verdict(findings, fuzz, verdict):
+    assert SafetyReport('', findings, fuzz).verdict == verdict
+
+
+def test_exponential_pattern_is_blocked():
+    report = check_pattern(r'(?P<timestamp>\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}) (?P<message>(\w+\s?)*)$')
+    assert report.verdict == 'block'
+    assert report.to_dict()['findings'][0]['severity'] == 'high'
+
+
+@pytest.mark.parametrize('pattern', [r'(a|a)*b', r'(?:a|a)+!'])
+def test_exponential_timings_are_blocked_without_a_finding(pattern):
+    assert fuzz_pattern(pattern, findings=[]).exponential
+    assert check_pattern(pattern).verdict == 'block'
+
+
+def test_shipped_patterns_can_be_saved(capsys):
+    assert main(['--regex-file', str(REPO / 'regex.json')]) == 0
+    patterns = json.loads((REPO / 'regex.json').read_text())
+    assert check_pattern(patterns['apache_access']).verdict == 'warn'
+    assert check_pattern(patterns['nginx_access']).verdict == 'ok'
@@ -0,0 +1,49 @@
+import json
+import os
+
+from log_parser import DEFAULT_PATTERNS, LogParser, PatternRegistry
+from tests.conftest import parser_options
+
+
+def write_patterns(path, patterns, mtime_ns=None):
+    path.write_text(json.dumps(patterns))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_missing_file_is_created_with_the_defaults(tmp_path):
+    regex_file = tmp_path / 'regex.json'
+    compiled = PatternRegistry(str(regex_file)).load()
+    assert set(compiled) == set(DEFAULT_PATTERNS)
+    assert json.loads(regex_file.read_text()) == DEFAULT_PATTERNS
+
+
+def test_invalid_patterns_are_left_out(tmp_path, capsys):
+    regex_file = tmp_path / 'regex.json'
+    write_patterns(regex_file, {'good': r'(?P<ip>\S+) (?P<timestamp>\S+) (?P<message>.*)', 'bad': '(unclosed'})
+    registry = PatternRegistry(str(regex_file))
+    assert set(registry.load()) == {'good'}
+    assert 'Invalid regex pattern for bad' in capsys.readouterr().out
+    assert registry.group_names('good') == ['ip', 'timestamp', 'message']
+    assert registry.get('bad') is None and registry.group_names('bad') == []
+
+
+def test_refresh_reloads_only_a_changed_file(tmp_path):
+    regex_file = tmp_path / 'regex.json'
+    write_patterns(regex_file, {'one': r'(?P<message>.*)'}, mtime_ns=10 ** 18)
+    registry = PatternRegistry(str(regex_file))
+    compiled = registry.refresh()
+    assert registry.refresh() is compiled
+    write_patterns(regex_file, {'two': r'(?P<message>.*)'}, mtime_ns=2 * 10 ** 18)
+    assert set(registry.refresh()) == {'two'}
+
+
+def test_parser_shares_one_registry_across_files(workspace):
+    (workspace / 'logs' / 'second.log').write_text((workspace / 'logs' / 'mixed.log').read_text())
+    parser = LogParser(**parser_options(workspace))
+    loads = []
+    load = parser.registry.load
+    parser.registry.load = lambda: loads.append(1) or load()
+    parser.process_all_logs()
+    assert len(loads) == 1
+    assert (workspace / 'out' / 'second.csv').read_text() == (workspace / 'out' / 'mixed.csv').read_text()
@@ -0,0 +1,50 @@
+import csv
+import gzip
+
+import pytest
+
+from log_parser import LogParser
+from tests.conftest import parser_options
+from writers import RollingWriter, get_writer
+
+FIELDNAMES = ['line_number', 'message']
+
+
+def rows(count):
+    return [{'line_number': number, 'message': f'line {number}'} for number in range(1, count + 1)]
+
+
+def read_csv(path, opener=open):
+    with opener(path, 'rt', newline='') as f:
+        return [int(row['line_number']) for row in csv.DictReader(f)]
+
+
+def test_parts_split_by_rows_and_stale_parts_go(tmp_path):
+    output = str(tmp_path / 'out.csv')
+    with RollingWriter(get_writer('csv'), output, FIELDNAMES, batch_size=2, max_rows=4) as writer:
+        writer.write_many(rows(10))
+    assert [read_csv(part) for part in writer.parts] == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]]
+    with RollingWriter(get_writer('csv'), output, FIELDNAMES, batch_size=2, max_rows=8) as writer:
+        writer.write_many(rows(10))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['out.part-0001.csv', 'out.part-0002.csv']
+
+
+def test_rolling_needs_a_limit(tmp_path):
+    with pytest.raises(ValueError):
+        RollingWriter(get_writer('csv'), str(tmp_path / 'out.csv'), FIELDNAMES)
+
+
+def test_parser_writes_compressed_parts(workspace):
+    LogParser(**parser_options(workspace, output_compression='gzip', rollover_rows=4,
+                               batch_size=2)).process_all_logs()
+    parts = sorted((workspace / 'out').glob('mixed.part-*.csv.gz'))
+    assert [read_csv(part, gzip.open) for part in parts] == [[1, 2, 3, 4], [5, 6]]
+
+
+@pytest.mark.parametrize('options', [
+    {'output_format': 'parquet', 'output_compression': 'gzip'},
+    {'incremental': True, 'rollover_rows': 10},
+])
+def test_invalid_combinations_are_refused(workspace, options):
+    with pytest.raises(ValueError):
+        LogParser(**parser_options(workspace, **options))
@@ -0,0 +1,31 @@
+import csv
+import types
+
+import pytest
+
+from log_parser import LogParser
+from tests.conftest import parser_options
+
+
+def read_rows(path):
+    """CSV rows without their empty fields: streamed headers also list groups no line captured"""
+    with open(path, newline='') as f:
+        return [{key: value for key, value in row.items() if value} for row in csv.DictReader(f)]
+
+
+def test_iter_log_file_is_lazy(workspace):
+    parser = LogParser(**parser_options(workspace))
+    records = parser.iter_log_file(str(workspace / 'logs' / 'mixed.log'))
+    assert isinstance(records, types.GeneratorType)
+    first = next(records)
+    assert (first['line_number'], first['status']) == (1, '200')
+    assert [record['line_number'] for record in records] == [2, 3, 4, 5, 6]
+
+
+@pytest.mark.parametrize('batch_size', [1, 4, 10000])
+def test_streamed_output_matches_the_list_output(workspace, batch_size):
+    LogParser(**parser_options(workspace)).process_all_logs()
+    streamed = workspace / 'streamed'
+    LogParser(**parser_options(workspace, streaming=True, batch_size=batch_size,
+                               output_folder=str(streamed))).process_all_logs()
+    assert read_rows(streamed / 'mixed.csv') == read_rows(workspace / 'out' / 'mixed.csv')
@@ -0,0 +1,91 @@
+import asyncio
+import csv
+import socket
+
+from log_parser import LogParser
+from syslog_server import SyslogTCPProtocol, serve, strip_priority
+from tests.conftest import SYSLOG_LINES, parser_options
+
+
+class FakeReceiver:
+    def __init__(self, accept=True):
+        self.lines = []
+        self.accept = accept
+        self.paused = []
+
+    def add_lines(self, lines):
+        self.lines.extend(lines)
+        return self.accept
+
+    def pause(self, transport):
+        self.paused.append(transport)
+
+    def forget(self, transport):
+        pass
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_strip_priority():
+    assert strip_priority('<34>' + SYSLOG_LINES[0]) == SYSLOG_LINES[0]
+    assert strip_priority('<not a priority> text') == '<not a priority> text'
+
+
+def test_tcp_framing_by_newline_and_octet_count():
+    receiver = FakeReceiver()
+    protocol = SyslogTCPProtocol(receiver)
+    protocol.connection_made(None)
+    protocol.data_received(b'<13>first\r\nsec')
+    protocol.data_received(b'ond\n11 <13>counted')
+    assert receiver.lines == ['first', 'second', 'counted']
+    # A counted frame waits for all of its bytes and may hold newlines
+    protocol.data_received(b'11 has\nnew')
+    assert len(receiver.lines) == 3
+    protocol.data_received(b'line')
+    assert receiver.lines == ['first', 'second', 'counted', 'has\nnewline']
+    protocol.data_received(b'unterminated')
+    protocol.connection_lost(None)
+    assert receiver.lines[-1] == 'unterminated'
+
+
+def test_full_backlog_pauses_the_connection():
+    receiver = FakeReceiver(accept=False)
+    protocol = SyslogTCPProtocol(receiver)
+    protocol.connection_made('transport')
+    protocol.data_received(b'line\n')
+    assert receiver.paused == ['transport']
+
+
+def test_serve_parses_udp_and_tcp_messages(workspace):
+    port = free_port()
+    parser = LogParser(**parser_options(workspace, batch_size=1))
+
+    async def send_then_stop(stopping):
+        await asyncio.sleep(0.1)
+        _, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f'<34>{SYSLOG_LINES[0]}\n'.encode())
+        await writer.drain()
+        writer.close()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+            udp.sendto(f'<34>{SYSLOG_LINES[1]}'.encode(), ('127.0.0.1', port))
+        await asyncio.sleep(0.3)
+        stopping.set()
+
+    async def main():
+        stopping = asyncio.Event()
+        sender = asyncio.create_task(send_then_stop(stopping))
+        receiver = await serve(parser, '127.0.0.1', port, port, flush_interval=0.05, stopping=stopping)
+        await sender
+        return receiver
+
+    receiver = asyncio.run(main())
+    assert receiver.received == 2 and receiver.dropped == 0
+    with open(receiver.output_file, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert sorted(row['message'] for row in rows) == ['Failed login attempt for user admin',
+                                                      'GET request to /secure-area denied']
+    assert {row['log_type'] for row in rows} == {'syslog'}
@@ -0,0 +1,134 @@
+import csv
+import json
+import sqlite3
+import sys
+
+import pytest
+
+from log_parser import LogParser
+from tests.conftest import parser_options
+from writers import get_writer, output_extension
+
+FIELDNAMES = ['line_number', 'log_type', 'ip', 'timestamp', 'message', 'status']
+# Every batch of two brings a log type the earlier ones didn't have
+RECORDS = [
+    {'line_number': 1, 'log_type': 'nginx_access', 'ip': '10.0.0.1', 'timestamp': '01/Jan/2023:12:00:00 +0000',
+     'message': 'curl', 'status': '200'},
+    {'line_number': 2, 'log_type': 'nginx_access', 'ip': '10.0.0.2', 'timestamp': '01/Jan/2023:12:00:01 +0000',
+     'message': 'a "quoted", comma', 'status': '502'},
+    {'line_number': 3, 'log_type': 'syslog', 'ip': 'N/A', 'timestamp': 'Jan 22 16:14:23',
+     'message': 'Failed login', 'status': None},
+    {'line_number': 4, 'log_type': 'firewall', 'ip': '10.0.0.4', 'timestamp': '2023-01-01 12:00:04',
+     'message': 'DROP', 'status': 'n/a'},
+    {'line_number': 5, 'log_type': 'custom_app', 'ip': '10.0.0.5', 'timestamp': '2023-01-01T12:00:05.000Z',
+     'message': 'ok', 'status': '200'},
+]
+
+
+def write(tmp_path, output_format, records=RECORDS, **options):
+    writer_class = get_writer(output_format)
+    path = str(tmp_path / f'out.{output_extension(writer_class, options.get("compression"))}')
+    with writer_class(path, FIELDNAMES, batch_size=2, **options) as writer:
+        writer.write_many(records)
+    return path
+
+
+def test_csv_round_trip(tmp_path):
+    with open(write(tmp_path, 'csv'), newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['message'] for row in rows] == [record['message'] for record in RECORDS]
+    assert rows[2]['status'] == ''
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zstd'])
+def test_jsonl_round_trip(tmp_path, compression):
+    if compression == 'zstd':
+        zstandard = pytest.importorskip('zstandard')
+    path = write(tmp_path, 'jsonl', compression=compression)
+    if compression is None:
+        with open(path) as f:
+            text = f.read()
+    elif compression == 'gzip':
+        import gzip
+        with gzip.open(path, 'rt') as f:
+            text = f.read()
+    else:
+        with zstandard.open(path, 'r') as f:
+            text = f.read()
+    assert [json.loads(line) for line in text.splitlines()] == RECORDS
+
+
+def test_csv_appends(tmp_path):
+    path = write(tmp_path, 'csv', RECORDS[:2])
+    writer_class = get_writer('csv')
+    with writer_class(path, FIELDNAMES, append=True) as writer:
+        writer.write_many(RECORDS[2:])
+    with open(path, newline='') as f:
+        assert [int(row['line_number']) for row in csv.DictReader(f)] == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_columnar_round_trip(tmp_path, output_format):
+    pa = pytest.importorskip('pyarrow')
+    path = write(tmp_path, output_format)
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        with pa.ipc.open_file(path) as reader:
+            assert reader.num_record_batches == 3
+            table = reader.read_all()
+    assert table.column('line_number').to_pylist() == [1, 2, 3, 4, 5]
+    assert table.column('log_type').to_pylist() == [record['log_type'] for record in RECORDS]
+    assert table.column('status').to_pylist() == [200, 502, None, None, 200]
+    timestamps = table.column('timestamp').to_pylist()
+    assert timestamps[0].isoformat() == '2023-01-01T12:00:00+00:00'
+    assert timestamps[3].isoformat() == '2023-01-01T12:00:04+00:00'
+
+
+def test_sqlite_tables_per_log_type_and_view(tmp_path):
+    with sqlite3.connect(write(tmp_path, 'sqlite')) as connection:
+        assert connection.execute('SELECT line_number, status FROM nginx_access').fetchall() == [(1, 200), (2, 502)]
+        assert connection.execute('SELECT timestamp FROM custom_app').fetchone() == ('2023-01-01 12:00:05+00:00',)
+        assert [row[0] for row in connection.execute('SELECT line_number FROM logs ORDER BY 1')] == [1, 2, 3, 4, 5]
+
+
+def test_sqlite_view_steps_aside_for_a_logs_table(tmp_path, capsys):
+    records = RECORDS[:2] + [dict(RECORDS[2], log_type='logs')]
+    path = write(tmp_path, 'sqlite', records)
+    assert "'logs_1' instead" in capsys.readouterr().out
+    # Appending rebuilds the view, under whatever name is free
+    with get_writer('sqlite')(path, FIELDNAMES, append=True) as writer:
+        writer.write_many(RECORDS[3:])
+    with sqlite3.connect(path) as connection:
+        assert connection.execute('SELECT message FROM logs').fetchall() == [('Failed login',)]
+        views = connection.execute("SELECT name FROM sqlite_master WHERE type = 'view'").fetchall()
+        assert views == [('logs_1',)]
+        assert connection.execute('SELECT count(*) FROM logs_1').fetchone() == (5,)
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_parser_columnar_output_has_the_csv_rows(workspace, output_format):
+    pa = pytest.importorskip('pyarrow')
+    LogParser(**parser_options(workspace)).process_all_logs()
+    with open(workspace / 'out' / 'mixed.csv', newline='') as f:
+        expected = list(csv.DictReader(f))
+    LogParser(**parser_options(workspace, output_format=output_format)).process_all_logs()
+    path = workspace / 'out' / f'mixed.{output_format}'
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+    else:
+        with pa.ipc.open_file(path) as reader:
+            table = reader.read_all()
+    assert table.column('line_number').to_pylist() == [int(row['line_number']) for row in expected]
+    assert table.column('log_type').to_pylist() == [row['log_type'] for row in expected]
+    assert table.column('message').to_pylist() == [row['message'] for row in expected]
+
+
+@pytest.mark.parametrize('output_format', ['parquet', 'arrow'])
+def test_columnar_formats_need_pyarrow(monkeypatch, output_format):
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    with pytest.raises(ImportError, match="'arrow' extra"):
+        get_writer(output_format)
+    assert get_writer('csv').extension == 'csv'
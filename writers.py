@@ -0,0 +1,567 @@
+import os
+import csv
+import glob
+import gzip
+import json
+import sqlite3
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# Columns written as integers by the typed (columnar) writers
+INTEGER_FIELDS = ('line_number', 'status', 'size')
+# Timestamp layouts produced by the built-in patterns, tried in order
+TIMESTAMP_FORMATS = (
+    '%d/%b/%Y:%H:%M:%S %z',     # apache / nginx
+    '%Y-%m-%d %H:%M:%S',        # firewall
+    '%Y-%m-%dT%H:%M:%S.%fZ',    # custom_app
+    '%b %d %H:%M:%S',           # syslog (no year)
+)
+
+# Compressions the text writers (CSV, JSONL) can apply, with their file suffix
+COMPRESSIONS = {
+    'gzip': 'gz',
+    'zstd': 'zst',
+}
+
+
+def open_text_output(output_file, mode, compression=None, level=None):
+    """Open a text file for writing, gzip/zstd compressed on the fly if asked"""
+    if compression is None:
+        return open(output_file, mode, newline='', encoding='utf-8')
+    if compression == 'gzip':
+        # Appending adds another gzip member, which readers treat as one stream
+        return gzip.open(output_file, mode + 't', compresslevel=6 if level is None else level,
+                         newline='', encoding='utf-8')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard is required for zstd output: pip install zstandard") from None
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        return zstandard.open(output_file, mode, cctx=compressor, newline='', encoding='utf-8')
+    raise ValueError(f"Unknown compression: {compression}. Choose from {', '.join(COMPRESSIONS)}")
+
+
+class BufferedWriter:
+    """Base class for the streaming output writers
+
+    Rows are buffered and handed to write_batch() once batch_size of them are
+    queued, so memory stays bounded no matter how many records are written.
+    Subclasses set the file extension and implement write_batch()/close_file().
+    """
+
+    extension = None
+    # Whether rows can be appended to an existing output file
+    supports_append = False
+    # Whether the writer wants table_fields (the columns of each log type) to lay out its output
+    splits_log_types = False
+
+    def __init__(self, output_file, fieldnames, batch_size=10000, append=False):
+        if append and not self.supports_append:
+            raise ValueError(f"{type(self).__name__} can't append to an existing file")
+        self.output_file = output_file
+        self.fieldnames = list(fieldnames)
+        self.batch_size = max(1, batch_size)
+        self.append = append
+        self.rows_written = 0
+        self._buffer = []
+
+    @classmethod
+    def check_dependencies(cls):
+        """Raise ImportError up front if an optional package the format needs is missing"""
+
+    def write(self, record):
+        """Queue a single record, flushing when the batch is full"""
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, records):
+        """Queue every record from an iterable"""
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Write buffered rows to disk"""
+        if not self._buffer:
+            return
+        self.write_batch(self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def sync(self):
+        """Flush pending rows and push them through to the file, so readers see them"""
+        self.flush()
+        self.sync_file()
+
+    def write_batch(self, rows):
+        raise NotImplementedError
+
+    def sync_file(self):
+        pass
+
+    def close_file(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Flush pending rows and close the file"""
+        self.flush()
+        self.close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class TextStreamWriter(BufferedWriter):
+    """Base class for the line-oriented text writers, optionally gzip/zstd compressed"""
+
+    supports_append = True
+    # Whether compression can be applied on top of the format
+    compressible = True
+
+    def __init__(self, output_file, fieldnames, batch_size=10000, append=False,
+                 compression=None, compression_level=None):
+        super().__init__(output_file, fieldnames, batch_size, append)
+        self.compression = compression
+        self.compression_level = compression_level
+        self._file = None
+
+    def _open(self):
+        # Decided before opening, which creates the file
+        self._appending_to_data = self.append and os.path.exists(self.output_file) \
+            and os.path.getsize(self.output_file) > 0
+        mode = 'a' if self.append else 'w'
+        self._file = open_text_output(self.output_file, mode, self.compression, self.compression_level)
+
+    def write_batch(self, rows):
+        if self._file is None:
+            self._open()
+        self.write_rows(rows)
+
+    def write_rows(self, rows):
+        raise NotImplementedError
+
+    def sync_file(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CSVStreamWriter(TextStreamWriter):
+    """Incremental CSV writer that buffers rows and writes them in fixed-size batches
+
+    The header is fixed up front, so records can be written as they are produced
+    instead of collecting the whole file first to work out the columns.
+    """
+
+    extension = 'csv'
+
+    def _open(self):
+        super()._open()
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction='ignore')
+        # Appending to an existing file keeps its header
+        if not self._appending_to_data:
+            self._writer.writeheader()
+
+    def write_rows(self, rows):
+        self._writer.writerows(rows)
+
+
+class JSONLStreamWriter(TextStreamWriter):
+    """JSON Lines output: one object per record, with every column present (missing ones as null)"""
+
+    extension = 'jsonl'
+
+    def write_rows(self, rows):
+        fieldnames = self.fieldnames
+        dumps = json.dumps
+        self._file.write(''.join(
+            dumps({name: row.get(name) for name in fieldnames}, ensure_ascii=False) + '\n' for row in rows
+        ))
+
+
+@lru_cache(maxsize=65536)
+def parse_timestamp(value):
+    """Parse a captured timestamp into a UTC datetime, or None if no known layout fits"""
+    if not value or value == 'N/A':
+        return None
+    for timestamp_format in TIMESTAMP_FORMATS:
+        try:
+            parsed = datetime.strptime(value, timestamp_format)
+        except ValueError:
+            continue
+        if parsed.tzinfo is None:
+            return parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc)
+    return None
+
+
+@lru_cache(maxsize=65536)
+def sqlite_timestamp(value):
+    """A captured timestamp as ISO 8601 UTC text, which SQLite compares chronologically"""
+    parsed = parse_timestamp(value)
+    return None if parsed is None else parsed.isoformat(sep=' ')
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def import_pyarrow():
+    """pyarrow, an optional dependency (the 'arrow' extra) only the columnar formats need"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for parquet/arrow files: pip install pyarrow, "
+                          "or install this package with its 'arrow' extra") from None
+    return pyarrow
+
+
+class RollingWriter(BufferedWriter):
+    """Splits the output into numbered parts, <stem>.part-0001.<ext> and so on
+
+    A new part is started once the current one holds max_rows rows or has grown
+    to max_bytes on disk (checked after each batch, so parts can overshoot the
+    byte limit by up to one batch). Every part is a complete file of the wrapped
+    format, so they can be loaded independently and in parallel. Parts left over
+    from an earlier, longer run are removed.
+    """
+
+    def __init__(self, writer_class, output_file, fieldnames, batch_size=10000, max_rows=None, max_bytes=None,
+                 **writer_options):
+        super().__init__(output_file, fieldnames, batch_size)
+        if not max_rows and not max_bytes:
+            raise ValueError("RollingWriter needs max_rows or max_bytes")
+        self.writer_class = writer_class
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.writer_options = writer_options
+        self.parts = []
+        self._part = None
+        self._part_rows = 0
+        # output_file is <stem>.<extension>; parts go next to it
+        self.extension = output_extension(writer_class, writer_options.get('compression'))
+        self._stem = output_file[:-len(self.extension) - 1]
+        for stale_part in glob.glob(glob.escape(self._stem) + '.part-*.' + glob.escape(self.extension)):
+            os.remove(stale_part)
+
+    def part_path(self, number):
+        return f"{self._stem}.part-{number:04d}.{self.extension}"
+
+    def _next_part(self):
+        self._close_part()
+        path = self.part_path(len(self.parts) + 1)
+        self._part = self.writer_class(path, self.fieldnames, self.batch_size, **self.writer_options)
+        self._part_rows = 0
+        self.parts.append(path)
+
+    def _close_part(self):
+        if self._part is not None:
+            self._part.close()
+            self._part = None
+
+    def write_batch(self, rows):
+        while rows:
+            if self._part is None:
+                self._next_part()
+            take = len(rows) if not self.max_rows else min(len(rows), self.max_rows - self._part_rows)
+            self._part.write_batch(rows[:take])
+            self._part.rows_written += take
+            self._part_rows += take
+            rows = rows[take:]
+            full = self.max_rows and self._part_rows >= self.max_rows
+            if not full and self.max_bytes:
+                full = os.path.exists(self._part.output_file) and \
+                    os.path.getsize(self._part.output_file) >= self.max_bytes
+            if full:
+                self._close_part()
+
+    def sync_file(self):
+        if self._part is not None:
+            self._part.sync_file()
+
+    def close_file(self):
+        self._close_part()
+
+
+class ArrowBatchWriter(BufferedWriter):
+    """Columnar writer base: converts each batch of rows into a typed Arrow record batch
+
+    line_number, status and size become int64, timestamp a UTC timestamp and
+    log_type a dictionary (categorical) column; everything else stays a string.
+    Values that don't convert are written as nulls.
+    """
+
+    # The columnar formats compress internally
+    compressible = False
+
+    @classmethod
+    def check_dependencies(cls):
+        import_pyarrow()
+
+    def __init__(self, output_file, fieldnames, batch_size=10000, append=False):
+        super().__init__(output_file, fieldnames, batch_size, append)
+        self.pa = import_pyarrow()
+        self.schema = self.pa.schema([self._field(name) for name in self.fieldnames])
+        self._dictionary = {}
+        self._sink = None
+
+    def _field(self, name):
+        pa = self.pa
+        if name in INTEGER_FIELDS:
+            return pa.field(name, pa.int64())
+        if name == 'timestamp':
+            return pa.field(name, pa.timestamp('us', tz='UTC'))
+        if name == 'log_type':
+            return pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+        return pa.field(name, pa.string())
+
+    def _column(self, name, rows):
+        values = [row.get(name) for row in rows]
+        if name in INTEGER_FIELDS:
+            values = [_to_int(value) for value in values]
+        elif name == 'timestamp':
+            values = [parse_timestamp(value) for value in values]
+        elif name == 'log_type':
+            return self._dictionary_column(values)
+        else:
+            values = [None if value is None else str(value) for value in values]
+        return self.pa.array(values, type=self.schema.field(name).type)
+
+    def _dictionary_column(self, values):
+        # One dictionary for the whole file that only ever grows at the end, so
+        # later batches can be written as deltas of it
+        index = self._dictionary
+        for value in values:
+            if value is not None and value not in index:
+                index[value] = len(index)
+        indices = self.pa.array([None if value is None else index[value] for value in values], self.pa.int32())
+        return self.pa.DictionaryArray.from_arrays(indices, self.pa.array(list(index), self.pa.string()))
+
+    def to_record_batch(self, rows):
+        columns = [self._column(name, rows) for name in self.fieldnames]
+        return self.pa.RecordBatch.from_arrays(columns, schema=self.schema)
+
+    def open_sink(self):
+        raise NotImplementedError
+
+    def write_batch(self, rows):
+        if self._sink is None:
+            self._sink = self.open_sink()
+        self._sink.write_batch(self.to_record_batch(rows))
+
+    def close_file(self):
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+
+class ParquetStreamWriter(ArrowBatchWriter):
+    """Parquet output, one row group per batch"""
+
+    extension = 'parquet'
+
+    def open_sink(self):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.output_file, self.schema, compression='zstd')
+
+
+class ArrowStreamWriter(ArrowBatchWriter):
+    """Arrow IPC (Feather v2) output, one record batch per batch
+
+    The IPC file format allows one dictionary per field, which later batches
+    may only extend. log_type is therefore encoded against the dictionary the
+    writer keeps for the whole file, and each batch that brings new log types
+    writes them as a dictionary delta rather than a dictionary of its own.
+    """
+
+    extension = 'arrow'
+
+    def open_sink(self):
+        options = self.pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        return self.pa.ipc.new_file(self.output_file, self.schema, options=options)
+
+
+def quote_identifier(name):
+    """Quote a table or column name for SQLite"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class SQLiteWriter(BufferedWriter):
+    """SQLite output with one table per log type, indexed for lookups by time, IP and status
+
+    Each table has the columns of its log type only: table_fields maps a log
+    type to them (the required fields, the pattern's named groups and the raw
+    line). Types not in table_fields get the columns of their first rows, and
+    columns a later row brings along are added as it arrives. line_number,
+    status and size are stored as integers and timestamp as ISO 8601 UTC text,
+    so it sorts and compares chronologically; values that don't convert are
+    stored as NULL. A logs view unions the fields every table shares; it is
+    named logs_1 (logs_2...) instead if a log type's table is called logs.
+
+    Every batch is inserted in one transaction with executemany() into a WAL
+    mode database. Indexes are built when the writer closes, after the bulk
+    load, unless they already exist from an earlier run being appended to.
+    """
+
+    extension = 'sqlite'
+    supports_append = True
+    compressible = False
+    splits_log_types = True
+    INDEXED_FIELDS = ('timestamp', 'ip', 'status')
+    VIEW = 'logs'
+
+    def __init__(self, output_file, fieldnames, batch_size=10000, append=False, table_fields=None):
+        super().__init__(output_file, fieldnames, batch_size, append)
+        self.table_fields = dict(table_fields or {})
+        # log_type -> columns of its table, as created so far
+        self._tables = {}
+        self._connection = None
+
+    def _connect(self):
+        if not self.append:
+            for path in (self.output_file, self.output_file + '-wal', self.output_file + '-shm'):
+                if os.path.exists(path):
+                    os.remove(path)
+        connection = sqlite3.connect(self.output_file)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # With WAL, NORMAL only syncs at checkpoints and still can't corrupt the database
+        connection.execute('PRAGMA synchronous=NORMAL')
+        for table, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'"):
+            info = connection.execute(f'PRAGMA table_info({quote_identifier(table)})')
+            self._tables[table] = [column[1] for column in info]
+        # An earlier run's view is rebuilt on close, and may hold a name a new log type's table needs
+        views = [view for view, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'view'")]
+        with connection:
+            for view in views:
+                if self._is_view_name(view):
+                    connection.execute(f'DROP VIEW {quote_identifier(view)}')
+        return connection
+
+    @classmethod
+    def _is_view_name(cls, name):
+        suffix = name[len(cls.VIEW) + 1:]
+        return name == cls.VIEW or name.startswith(cls.VIEW + '_') and suffix.isdigit()
+
+    def _view_name(self):
+        """VIEW, or VIEW_1, VIEW_2... when a log type's table is already named that"""
+        name, suffix = self.VIEW, 0
+        while name in self._tables:
+            suffix += 1
+            name = f'{self.VIEW}_{suffix}'
+        if name != self.VIEW:
+            print(f"A log type's table is named {self.VIEW!r}, so the view of every table is {name!r} instead")
+        return name
+
+    @staticmethod
+    def _column_type(name):
+        return 'INTEGER' if name in INTEGER_FIELDS else 'TEXT'
+
+    def _ensure_table(self, log_type, rows):
+        """Create or widen log_type's table so it has a column for every field in rows"""
+        seen = set()
+        for row in rows:
+            seen.update(row)
+        columns = self._tables.get(log_type)
+        if columns is None:
+            columns = list(self.table_fields.get(log_type, ()))
+            columns += [name for name in self.fieldnames if name in seen and name not in columns]
+            definition = ', '.join(f'{quote_identifier(name)} {self._column_type(name)}' for name in columns)
+            self._connection.execute(f'CREATE TABLE {quote_identifier(log_type)} ({definition})')
+            self._tables[log_type] = columns
+            return columns
+        for name in self.fieldnames:
+            if name in seen and name not in columns:
+                self._connection.execute(f'ALTER TABLE {quote_identifier(log_type)} '
+                                         f'ADD COLUMN {quote_identifier(name)} {self._column_type(name)}')
+                columns.append(name)
+        return columns
+
+    @staticmethod
+    def _column(name, rows):
+        values = [row.get(name) for row in rows]
+        if name in INTEGER_FIELDS:
+            return [_to_int(value) for value in values]
+        if name == 'timestamp':
+            return [sqlite_timestamp(value) for value in values]
+        return values
+
+    def write_batch(self, rows):
+        if self._connection is None:
+            self._connection = self._connect()
+        by_type = {}
+        for row in rows:
+            by_type.setdefault(row.get('log_type'), []).append(row)
+        with self._connection:
+            for log_type, type_rows in by_type.items():
+                columns = self._ensure_table(log_type, type_rows)
+                placeholders = ', '.join('?' * len(columns))
+                names = ', '.join(quote_identifier(name) for name in columns)
+                # Built column by column, then transposed: much faster than converting row by row
+                values = zip(*(self._column(name, type_rows) for name in columns))
+                self._connection.executemany(
+                    f'INSERT INTO {quote_identifier(log_type)} ({names}) VALUES ({placeholders})', values)
+
+    def _create_indexes(self):
+        for table, columns in self._tables.items():
+            for name in self.INDEXED_FIELDS:
+                if name in columns:
+                    index = quote_identifier(f'{table}_{name}_idx')
+                    self._connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS {index} ON {quote_identifier(table)} ({quote_identifier(name)})')
+
+    def _create_view(self):
+        if not self._tables:
+            return
+        tables = list(self._tables.values())
+        shared = [name for name in tables[0] if all(name in columns for columns in tables[1:])]
+        names = ', '.join(quote_identifier(name) for name in shared)
+        selects = ' UNION ALL '.join(f'SELECT {names} FROM {quote_identifier(table)}' for table in self._tables)
+        self._connection.execute(f'CREATE VIEW {quote_identifier(self._view_name())} AS {selects}')
+
+    def close_file(self):
+        if self._connection is None:
+            return
+        with self._connection:
+            self._create_indexes()
+            self._create_view()
+        self._connection.close()
+        self._connection = None
+
+
+# Output formats selectable from the CLI
+WRITERS = {
+    'csv': CSVStreamWriter,
+    'jsonl': JSONLStreamWriter,
+    'parquet': ParquetStreamWriter,
+    'arrow': ArrowStreamWriter,
+    'sqlite': SQLiteWriter,
+}
+
+
+def get_writer(output_format):
+    """Return the writer class for an output format name; ImportError if its dependencies are missing"""
+    try:
+        writer_class = WRITERS[output_format]
+    except KeyError:
+        raise ValueError(f"Unknown output format: {output_format}. Choose from {', '.join(WRITERS)}") from None
+    writer_class.check_dependencies()
+    return writer_class
+
+
+def output_extension(writer_class, compression=None):
+    """File extension of an output, including the compression suffix: csv, csv.gz, jsonl.zst..."""
+    if compression is None:
+        return writer_class.extension
+    return f"{writer_class.extension}.{COMPRESSIONS[compression]}"